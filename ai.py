@@ -1,9 +1,32 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy.orm import joinedload
 from src.models.models import Fixture, FixtureStatistics, Prediction
 from src.models.database import db
-from src.models.ai_model import BettingModel
+from src.models.ai_model import BettingModel, MAX_EPOCHS
+from src.models.feature_engine import FeatureEngine, labels_from_goals
+from src.models.feature_cache import FeatureCache
+from src.models.team_state import TeamStateStore
+from src.models.standings import StandingsEngine
+from src.models.training_stream import FixtureStream
+from src.models.training_jobs import TrainingJobManager
+from src.models.model_search import ModelSearch, load_best_config
+from src.models.markets import odds_matrix, selection_matrix, to_odds, SELECTION_INDEX
+from src.models.odds import latest_odds, best_odds, started_fixtures, odds_updated_at
+from src.models.odds_history import OddsHistoryStore
+from src.models.value_bets import detect_value_bets, value_bets_to_dicts
+from src.models.staking import stake_value_bets
+from src.models.arbitrage import ArbitrageScanner
+from src.models.backtest import run_backtest, betting_model_factory
+from src.models.model_registry import ModelRegistry
+from src.models.prediction_cache import PredictionCache
+from src.models.inference import InferenceEngine
+from src.models.api_client import DataManager
+from src.models.quantization import export_quantized, QuantizedEngine, quantization_report, artifact_size, QUANTIZED_DTYPES
 import os
 import pickle
+import threading
+import numpy as np
+from datetime import datetime, timezone
 
 ai_bp = Blueprint('ai', __name__)
 
@@ -11,46 +34,534 @@ ai_bp = Blueprint('ai', __name__)
 MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'model')
 os.makedirs(MODEL_PATH, exist_ok=True)
 MODEL_FILE = os.path.join(MODEL_PATH, 'betting_model.h5')
+INFERENCE_FILE = os.path.join(MODEL_PATH, 'betting_model.npz')
 SCALER_FILE = os.path.join(MODEL_PATH, 'scaler.pkl')
+TEAM_STATE_FILE = os.path.join(MODEL_PATH, 'team_state.pkl')
+STANDINGS_FILE = os.path.join(MODEL_PATH, 'standings.pkl')
+FEATURE_CACHE_PATH = os.path.join(MODEL_PATH, 'feature_cache')
+TRAINED_IDS_FILE = os.path.join(MODEL_PATH, 'trained_ids.npy')
+HOLDOUT_IDS_FILE = os.path.join(MODEL_PATH, 'holdout_ids.npy')
+SEARCH_PATH = os.path.join(MODEL_PATH, 'search')
+VERSION_FILE = os.path.join(MODEL_PATH, 'version.json')
+GOAL_MODEL_FILE = os.path.join(MODEL_PATH, 'goal_model.npz')
 
-# Instância global do modelo
-betting_model = BettingModel()
+# Odds fixas usadas no backtest quando não há odds históricas
+SIMULATED_ODDS = {
+    '1X2': {
+        'Home': 2.0,
+        'Draw': 3.5,
+        'Away': 3.8
+    },
+    'BTTS': {
+        'Yes': 1.9,
+        'No': 1.9
+    },
+    'Over/Under 2.5': {
+        'Over': 1.85,
+        'Under': 1.95
+    }
+}
+
+# Versão em uso do modelo, carregada sob demanda e recarregada quando os artefatos mudam
+model_registry = ModelRegistry(
+    MODEL_FILE, SCALER_FILE, INFERENCE_FILE, TEAM_STATE_FILE, STANDINGS_FILE, VERSION_FILE,
+    goal_model_file=GOAL_MODEL_FILE
+)
+
+# Previsões já calculadas (memória + banco), por jogo, versão do modelo e características
+prediction_cache = PredictionCache()
+
+# Coletor de dados da API-Football (chave na variável de ambiente API_FOOTBALL_KEY),
+# criado na primeira sincronização; as sincronizações são feitas uma de cada vez
+data_manager = None
+sync_lock = threading.Lock()
+
+# Índice de surebets, atualizado a cada cotação sincronizada e lido pela rota /arbitrage
+arbitrage_scanner = ArbitrageScanner()
+
+# Treinamentos, buscas e backtests executados em segundo plano, um de cada vez: todos
+# atualizam o mesmo cache de características, lido pelos processos da busca. Enquanto
+# esperam, as respostas informam quantos jobs estão à frente (jobs_ahead)
+training_jobs = TrainingJobManager(max_workers=1)
+
+def _read_ids(path):
+    """Retorna os ids de jogos salvos pelo último treinamento (ou None)"""
+    try:
+        return np.load(path)
+    except (OSError, ValueError):
+        return None
+
+def _write_ids(path, ids):
+    """Salva ids de jogos do treinamento (sem ids, remove o arquivo anterior)"""
+    if ids is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, np.asarray(ids, dtype=np.int64))
+    os.replace(tmp_path, path)
+
+def _load_current_model(model):
+    """Carrega o modelo e o scaler salvos numa instância de BettingModel"""
+    if not os.path.exists(MODEL_FILE) or not os.path.exists(SCALER_FILE):
+        return False
+    if not model.load_model(MODEL_FILE):
+        return False
+    with open(SCALER_FILE, 'rb') as f:
+        model.scaler = pickle.load(f)
+    return True
+
+def _updated_feature_cache():
+    """Atualiza o cache de características com os jogos do banco e o retorna
+
+    As classificações são recalculadas pelo próprio FeatureEngine, sem alterar o
+    estado do modelo em uso.
+    """
+    engine = FeatureEngine.from_sql(db.engine)
+    cache = FeatureCache(FEATURE_CACHE_PATH, BettingModel().features)
+    cache.update(engine)
+    return cache
+
+def _get_data_manager():
+    """Retorna o coletor de dados, ligado ao estado dos times e às classificações do modelo em uso
+
+    Assim os jogos finalizados numa sincronização atualizam na hora as
+    características usadas nas previsões (e os arquivos desses estados).
+    """
+    global data_manager
+    if data_manager is None:
+        api_key = os.environ.get('API_FOOTBALL_KEY')
+        if not api_key:
+            return None
+        data_manager = DataManager(api_key, arbitrage=arbitrage_scanner)
+    betting_model = model_registry.get()
+    data_manager.team_state = betting_model.team_state
+    data_manager.standings = betting_model.standings
+    return data_manager
+
+def _history():
+    """Histórico completo do banco, para as características de jogos anteriores ao estado dos times"""
+    return FeatureEngine.from_sql(db.engine)
+
+def _staking_options(options, keys=('kelly_fraction', 'max_bet', 'max_fixture_exposure', 'max_exposure')):
+    """Extrai do corpo da requisição os parâmetros de stake informados"""
+    return {key: float(options[key]) for key in keys if options.get(key) is not None}
+
+def _run_training(options, job):
+    """Executa o treinamento (em segundo plano) e salva os artefatos"""
+    betting_model = model_registry.get()
+    
+    if options.get('mode') == 'stream':
+        # Leitura em blocos direto do SQLite, com memória limitada
+        stream = FixtureStream(db.engine.url.database)
+        n_fixtures = stream.count()
+    else:
+        # Carregar jogos e estatísticas em formato colunar (sem objetos ORM)
+        engine = FeatureEngine.from_sql(db.engine)
+        n_fixtures = len(engine.finished_fixtures())
+    
+    if n_fixtures < 100:
+        return {
+            'success': False,
+            'message': f'Dados insuficientes para treinamento. Necessário pelo menos 100 jogos, encontrados {n_fixtures}.'
+        }
+    
+    # O modelo em uso continua servindo previsões até o fim do treinamento; o novo
+    # modelo trabalha com cópias do estado dos times e das classificações (lidas do disco)
+    model = BettingModel(
+        team_state=TeamStateStore.load(TEAM_STATE_FILE),
+        standings=StandingsEngine.load(STANDINGS_FILE),
+        config=load_best_config(SEARCH_PATH)
+    )
+    model.goal_model = betting_model.goal_model
+    trained_ids = _read_ids(TRAINED_IDS_FILE)
+    
+    if options.get('mode') == 'stream':
+        success = model.train_streaming(stream, on_epoch=job.record_epoch)
+    elif options.get('mode') == 'incremental' and trained_ids is not None and _load_current_model(model):
+        # Ajuste fino do modelo atual com os jogos ainda não usados no treinamento
+        cache = FeatureCache(FEATURE_CACHE_PATH, model.features)
+        model._sync_state(engine)
+        cache.update(engine)
+        job.total_epochs = int(options.get('epochs', 5))
+        n_new = model.train_incremental(
+            cache, trained_ids,
+            replay_size=int(options.get('replay_size', 2000)),
+            epochs=job.total_epochs,
+            on_epoch=job.record_epoch,
+            holdout_ids=_read_ids(HOLDOUT_IDS_FILE)
+        )
+        if not n_new:
+            return {
+                'success': False,
+                'message': 'Nenhum jogo novo desde o último treinamento.'
+            }
+        success = True
+    else:
+        # Treinar modelo ou ensemble (apenas jogos novos ou alterados são recalculados no cache)
+        cache = FeatureCache(FEATURE_CACHE_PATH, model.features)
+        success = model.train_cached(engine, cache, on_epoch=job.record_epoch,
+                                     n_members=int(options.get('ensemble', 1)))
+    
+    if not success:
+        return {
+            'success': False,
+            'message': 'Falha ao treinar o modelo.'
+        }
+    
+    # Salvar modelo treinado
+    model.save_model(MODEL_FILE)
+    
+    # Salvar scaler
+    with open(SCALER_FILE, 'wb') as f:
+        pickle.dump(model.scaler, f)
+    
+    # Exportar pesos e normalização para a inferência em NumPy
+    model.export_inference(INFERENCE_FILE)
+    
+    # Modelo de taxa de gols (no modo stream, mantém o atual)
+    if options.get('mode') != 'stream' and model.train_goal_model(engine):
+        model.goal_model.save(GOAL_MODEL_FILE)
+    
+    # Salvar estado dos times e classificações
+    model.team_state.save(TEAM_STATE_FILE)
+    model.standings.save(STANDINGS_FILE)
+    _write_ids(TRAINED_IDS_FILE, model.trained_ids)
+    _write_ids(HOLDOUT_IDS_FILE, model.holdout_ids)
+    
+    # Nova versão passa a servir as previsões (e é detectada pelos outros processos)
+    model_registry.publish(model)
+    
+    return {
+        'success': True,
+        'message': f'Modelo treinado com sucesso usando {n_fixtures} jogos.',
+        'artifact_path': MODEL_FILE
+    }
 
 @ai_bp.route('/train', methods=['POST'])
 def train_model():
-    """Treina o modelo com dados históricos"""
-    from src.models.models import Fixture, FixtureStatistics
+    """Agenda o treinamento do modelo com dados históricos"""
+    options = request.get_json(silent=True) or {}
     
-    # Obter todos os jogos finalizados com estatísticas
-    fixtures = Fixture.query.filter_by(status='Match Finished').all()
-    statistics = FixtureStatistics.query.all()
+    job, created = training_jobs.submit(
+        'betting_model',
+        lambda job: _run_training(options, job),
+        app=current_app._get_current_object(),
+        total_epochs=MAX_EPOCHS
+    )
     
-    if len(fixtures) < 100:
+    if not created:
         return jsonify({
             'success': False,
-            'message': f'Dados insuficientes para treinamento. Necessário pelo menos 100 jogos, encontrados {len(fixtures)}.'
-        })
+            'message': 'Já existe um treinamento em andamento para este modelo.',
+            'job_id': job.id
+        }), 409
     
-    # Treinar modelo
-    success = betting_model.train(fixtures, statistics)
+    return jsonify({
+        'success': True,
+        'message': 'Treinamento iniciado.',
+        'job_id': job.id,
+        'jobs_ahead': training_jobs.jobs_ahead(job)
+    }), 202
+
+@ai_bp.route('/train/<job_id>', methods=['GET'])
+def train_status(job_id):
+    """Retorna o andamento de um treinamento"""
+    job = training_jobs.get(job_id)
+    if not job:
+        return jsonify({
+            'success': False,
+            'message': 'Treinamento não encontrado.'
+        }), 404
     
-    if success:
-        # Salvar modelo treinado
-        betting_model.save_model(MODEL_FILE)
-        
-        # Salvar scaler
-        with open(SCALER_FILE, 'wb') as f:
-            pickle.dump(betting_model.scaler, f)
-        
+    return jsonify(training_jobs.status(job))
+
+def _run_search(options, job):
+    """Executa a busca de hiperparâmetros (em segundo plano)"""
+    cache = _updated_feature_cache()
+    
+    _, X, _ = cache.load()
+    if len(X) < 100:
+        return {
+            'success': False,
+            'message': f'Dados insuficientes para a busca: {len(X)} amostras.'
+        }
+    
+    search = ModelSearch(FEATURE_CACHE_PATH, SEARCH_PATH, n_workers=options.get('workers'))
+    best, trials = search.run(
+        budget_seconds=int(options.get('budget_seconds', 600)),
+        max_trials=int(options.get('max_trials', 50)),
+        on_trial=job.record_epoch
+    )
+    
+    if not best:
+        return {
+            'success': False,
+            'message': 'Nenhuma tentativa da busca foi concluída.'
+        }
+    
+    return {
+        'success': True,
+        'message': f'Busca concluída com {len(trials)} tentativas.',
+        'artifact_path': os.path.join(SEARCH_PATH, 'best_config.json'),
+        'best': best
+    }
+
+@ai_bp.route('/search', methods=['POST'])
+def search_model():
+    """Agenda a busca de arquitetura e hiperparâmetros do modelo"""
+    options = request.get_json(silent=True) or {}
+    
+    job, created = training_jobs.submit(
+        'model_search',
+        lambda job: _run_search(options, job),
+        app=current_app._get_current_object(),
+        total_epochs=int(options.get('max_trials', 50))
+    )
+    
+    if not created:
         return jsonify({
-            'success': True,
-            'message': f'Modelo treinado com sucesso usando {len(fixtures)} jogos.'
-        })
+            'success': False,
+            'message': 'Já existe uma busca em andamento.',
+            'job_id': job.id
+        }), 409
+    
+    return jsonify({
+        'success': True,
+        'message': 'Busca iniciada.',
+        'job_id': job.id,
+        'jobs_ahead': training_jobs.jobs_ahead(job)
+    }), 202
+
+def _run_backtest(options, job):
+    """Executa o backtest walk-forward da estratégia de value bets (em segundo plano)"""
+    # Todos os jogos finalizados, inclusive os sem gols de um dos lados: o conjunto de
+    # treino do cache descarta esses jogos pelo resultado, o que distorceria ROI e acertos
+    engine = FeatureEngine.from_sql(db.engine)
+    ids, X, _ = engine.build(include_scoreless=True)
+    goals = engine.goals(ids)
+    y = labels_from_goals(goals[:, 0], goals[:, 1])
+    dates = engine.fixtures.set_index('id').reindex(ids)['date'].to_numpy(dtype='datetime64[ns]')
+    if len(X) < 200:
+        return {
+            'success': False,
+            'message': f'Dados insuficientes para o backtest: {len(X)} amostras.'
+        }
+    
+    if options.get('odds_source') == 'closing':
+        # Odds de fechamento do histórico (melhor preço entre as casas); jogos sem histórico não são apostados
+        _, closing, _ = OddsHistoryStore().opening_closing(
+            [int(fixture_id) for fixture_id in ids], dates.astype('datetime64[ns]'))
+        odds = best_odds(closing)
     else:
+        odds = odds_matrix(options.get('odds') or SIMULATED_ODDS, len(X))
+    
+    margins = options.get('margins')
+    result = run_backtest(
+        dates, X, y,
+        odds,
+        betting_model_factory(load_best_config(SEARCH_PATH), epochs=int(options.get('epochs', 20))),
+        margin=float(options.get('margin', 0.1)),
+        step_days=int(options.get('step_days', 30)),
+        min_train=int(options.get('min_train', 100)),
+        train_days=int(options['train_days']) if options.get('train_days') else None,
+        staking=options.get('staking', 'flat'),
+        kelly_fraction=float(options.get('kelly_fraction', 0.25)),
+        bankroll=float(options.get('bankroll', 100.0)),
+        margins=[float(m) for m in margins] if margins else None,
+        limits=_staking_options(options, ('max_bet', 'max_fixture_exposure', 'max_exposure')) or None
+    )
+    
+    return dict(result, success=True, message=f"Backtest concluído com {result['scored_fixtures']} jogos avaliados.")
+
+@ai_bp.route('/backtest', methods=['POST'])
+def backtest_model():
+    """Agenda o backtest walk-forward da estratégia de value bets"""
+    options = request.get_json(silent=True) or {}
+    
+    job, created = training_jobs.submit(
+        'backtest',
+        lambda job: _run_backtest(options, job),
+        app=current_app._get_current_object()
+    )
+    
+    if not created:
         return jsonify({
             'success': False,
-            'message': 'Falha ao treinar o modelo.'
+            'message': 'Já existe um backtest em andamento.',
+            'job_id': job.id
+        }), 409
+    
+    return jsonify({
+        'success': True,
+        'message': 'Backtest iniciado.',
+        'job_id': job.id,
+        'jobs_ahead': training_jobs.jobs_ahead(job)
+    }), 202
+
+def _run_quantization(dtype, options, job):
+    """Gera a versão quantizada do modelo e a compara com a float32 (em segundo plano)"""
+    reference = InferenceEngine.load(INFERENCE_FILE) if os.path.exists(INFERENCE_FILE) else None
+    holdout_ids = _read_ids(HOLDOUT_IDS_FILE)
+    if reference is None or holdout_ids is None:
+        return {
+            'success': False,
+            'message': 'Modelo não treinado. Execute o treinamento primeiro.'
+        }
+    
+    path = os.path.join(MODEL_PATH, f'betting_model_{dtype}')
+    export_quantized(reference, path, dtype)
+    
+    # Conjunto separado: jogos de teste do treinamento, que não entraram no ajuste do modelo
+    cached = _updated_feature_cache().load()
+    if cached is None:
+        return {
+            'success': False,
+            'message': 'Cache de características indisponível para avaliar o modelo quantizado.'
+        }
+    ids, X, y = cached
+    holdout = np.flatnonzero(np.isin(ids, holdout_ids))
+    if not len(holdout):
+        return {
+            'success': False,
+            'message': 'Nenhum jogo separado para avaliar o modelo quantizado.'
+        }
+    
+    candidate = QuantizedEngine.load(path)
+    if candidate is None:
+        return {
+            'success': False,
+            'message': f'Falha ao carregar o modelo quantizado em {dtype} ({path}).'
+        }
+    
+    report = quantization_report(reference, candidate, X[holdout], y[holdout])
+    
+    # Opcionalmente, a versão quantizada passa a servir as previsões
+    if options.get('serve'):
+        model_registry.publish_inference(path)
+    
+    return {
+        'success': True,
+        'message': f'Modelo quantizado em {dtype} avaliado em {len(holdout)} jogos.',
+        'artifact_path': path,
+        'size': {
+            'float32': artifact_size(INFERENCE_FILE),
+            dtype: artifact_size(path)
+        },
+        'report': report,
+        'serving': bool(options.get('serve'))
+    }
+
+@ai_bp.route('/quantize', methods=['POST'])
+def quantize_model():
+    """Agenda a quantização do modelo e a comparação de sua precisão com a do modelo float32"""
+    options = request.get_json(silent=True) or {}
+    dtype = options.get('dtype', 'int8')
+    if dtype not in QUANTIZED_DTYPES:
+        return jsonify({
+            'success': False,
+            'message': f'Formato inválido. Use um de: {", ".join(QUANTIZED_DTYPES)}.'
+        }), 400
+    
+    job, created = training_jobs.submit(
+        'quantize',
+        lambda job: _run_quantization(dtype, options, job),
+        app=current_app._get_current_object()
+    )
+    
+    if not created:
+        return jsonify({
+            'success': False,
+            'message': 'Já existe uma quantização em andamento.',
+            'job_id': job.id
+        }), 409
+    
+    return jsonify({
+        'success': True,
+        'message': 'Quantização iniciada.',
+        'job_id': job.id,
+        'jobs_ahead': training_jobs.jobs_ahead(job)
+    }), 202
+
+def _quota_deferred(manager):
+    """Total de requisições recusadas por falta de cota da API"""
+    return sum(manager.api.scheduler.deferred.values())
+
+def _quota_exhausted():
+    return jsonify({
+        'success': False,
+        'message': 'Cota da API-Football esgotada; tente novamente mais tarde.'
+    }), 429
+
+@ai_bp.route('/sync/fixtures', methods=['POST'])
+def sync_fixtures():
+    """Sincroniza os jogos de uma liga e atualiza o estado dos times com os jogos finalizados"""
+    data = request.get_json(silent=True) or {}
+    if not data.get('league_id') or not data.get('season'):
+        return jsonify({
+            'success': False,
+            'message': 'Informe league_id e season.'
+        }), 400
+    
+    with sync_lock:
+        manager = _get_data_manager()
+        if manager is None:
+            return jsonify({
+                'success': False,
+                'message': 'Chave da API-Football não configurada (API_FOOTBALL_KEY).'
+            }), 503
+        deferred = _quota_deferred(manager)
+        added = manager.sync_fixtures(int(data['league_id']), int(data['season']))
+        quota_exhausted = _quota_deferred(manager) > deferred
+    
+    if added is False:
+        if quota_exhausted:
+            return _quota_exhausted()
+        return jsonify({
+            'success': False,
+            'message': 'Falha ao sincronizar os jogos (liga não cadastrada ou erro na API).'
+        })
+    
+    return jsonify({
+        'success': True,
+        'message': f'{added} jogos novos sincronizados.'
+    })
+
+@ai_bp.route('/sync/odds', methods=['POST'])
+def sync_odds():
+    """Sincroniza as odds de uma liga (league_id e season) ou de um jogo (fixture_id, id da API)"""
+    data = request.get_json(silent=True) or {}
+    if not data.get('fixture_id') and not (data.get('league_id') and data.get('season')):
+        return jsonify({
+            'success': False,
+            'message': 'Informe fixture_id ou league_id e season.'
+        }), 400
+    
+    with sync_lock:
+        manager = _get_data_manager()
+        if manager is None:
+            return jsonify({
+                'success': False,
+                'message': 'Chave da API-Football não configurada (API_FOOTBALL_KEY).'
+            }), 503
+        deferred = _quota_deferred(manager)
+        updated = manager.sync_odds(league_id=data.get('league_id'), season=data.get('season'),
+                                    fixture_id=data.get('fixture_id'), bookmaker_id=data.get('bookmaker_id'))
+        quota_exhausted = _quota_deferred(manager) > deferred
+    
+    if updated is False:
+        if quota_exhausted:
+            return _quota_exhausted()
+        return jsonify({
+            'success': False,
+            'message': 'Falha ao sincronizar as odds.'
         })
+    
+    return jsonify({
+        'success': True,
+        'message': f'{updated} cotações atualizadas.'
+    })
 
 @ai_bp.route('/predict', methods=['POST'])
 def predict():
@@ -64,78 +575,93 @@ def predict():
             'message': 'Nenhum jogo selecionado para análise.'
         })
     
-    # Verificar se o modelo está carregado
-    if not betting_model.model:
-        # Tentar carregar modelo salvo
-        if os.path.exists(MODEL_FILE):
-            betting_model.load_model(MODEL_FILE)
-            
-            # Carregar scaler
-            if os.path.exists(SCALER_FILE):
-                with open(SCALER_FILE, 'rb') as f:
-                    betting_model.scaler = pickle.load(f)
-        else:
+    # Instante das odds do histórico (ISO 8601; com fuso, convertido para UTC como o histórico)
+    odds_as_of = None
+    if data.get('odds_as_of'):
+        try:
+            odds_as_of = datetime.fromisoformat(str(data['odds_as_of']).replace('Z', '+00:00'))
+        except ValueError:
             return jsonify({
                 'success': False,
-                'message': 'Modelo não treinado. Execute o treinamento primeiro.'
-            })
+                'message': 'odds_as_of inválido. Use uma data ISO 8601 (ex.: 2024-05-01T18:00:00Z).'
+            }), 400
+        if odds_as_of.tzinfo is not None:
+            odds_as_of = odds_as_of.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    # Modelo em uso (carregado na primeira chamada e recarregado quando houver nova versão)
+    betting_model = model_registry.get()
+    if not betting_model or not betting_model.model:
+        return jsonify({
+            'success': False,
+            'message': 'Modelo não treinado. Execute o treinamento primeiro.'
+        })
+    
+    # Carregar jogos, times e estatísticas com poucas consultas
+    fixtures_by_id = {
+        fixture.id: fixture
+        for fixture in Fixture.query.options(
+            joinedload(Fixture.home_team), joinedload(Fixture.away_team)
+        ).filter(Fixture.id.in_(fixture_ids)).all()
+    }
+    fixtures = [fixtures_by_id[fixture_id] for fixture_id in dict.fromkeys(fixture_ids) if fixture_id in fixtures_by_id]
+    
+    statistics = {}
+    for stats in FixtureStatistics.query.filter(
+            FixtureStatistics.fixture_id.in_(list(fixtures_by_id))).order_by(FixtureStatistics.id):
+        statistics.setdefault(stats.fixture_id, stats)
+    
+    # Reaproveitar previsões já calculadas; os demais jogos passam pelo modelo numa única chamada
+    predictions = prediction_cache.predict(betting_model, betting_model.version, fixtures, statistics, _history)
+    analyzed = [(fixture, prediction, spread, cached)
+                for fixture, (prediction, spread, cached) in zip(fixtures, predictions) if prediction]
+    
+    # Odds mais recentes de todas as casas para os jogos analisados (uma consulta),
+    # ou as odds do histórico em vigor no instante odds_as_of
+    analyzed_ids = [fixture.id for fixture, _, _, _ in analyzed]
+    if odds_as_of is not None:
+        market_odds, bookmakers = OddsHistoryStore().as_of(analyzed_ids, np.datetime64(odds_as_of, 's'))
+    else:
+        market_odds, bookmakers = latest_odds(analyzed_ids)
+    best_prices = best_odds(market_odds)
+    
+    # Detectar value bets de todos os jogos de uma vez (num ensemble, exige concordância entre os membros)
+    bets = detect_value_bets(
+        selection_matrix([prediction for _, prediction, _, _ in analyzed]),
+        market_odds,
+        spread=selection_matrix([spread for _, _, spread, _ in analyzed])
+    )
+    
+    # Com a banca informada, sugerir o valor de cada aposta (Kelly fracionado com limites de exposição)
+    stakes = None
+    if data.get('bankroll'):
+        stakes = stake_value_bets(bets, float(data['bankroll']), **_staking_options(data))
+    value_bets_by_row = value_bets_to_dicts(bets, bookmakers=bookmakers, stakes=stakes)
     
     results = []
     
-    for fixture_id in fixture_ids:
-        fixture = Fixture.query.get(fixture_id)
-        if not fixture:
-            continue
-        
-        statistics = FixtureStatistics.query.filter_by(fixture_id=fixture_id).first()
-        if not statistics:
-            continue
-        
-        # Gerar previsão
-        prediction = betting_model.predict(fixture, statistics)
+    for row, (fixture, prediction, spread, cached) in enumerate(analyzed):
+        value_bets = value_bets_by_row.get(row, [])
         
-        if not prediction:
-            continue
-        
-        # Simular odds do mercado (em produção, seriam obtidas da API)
-        market_odds = {
-            '1X2': {
-                'Home': 2.0,
-                'Draw': 3.5,
-                'Away': 3.8
-            },
-            'BTTS': {
-                'Yes': 1.9,
-                'No': 1.9
-            },
-            'Over/Under 2.5': {
-                'Over': 1.85,
-                'Under': 1.95
-            }
-        }
-        
-        # Detectar value bets
-        value_bets = betting_model.detect_value_bets(prediction, market_odds)
-        
-        # Salvar previsões no banco de dados
-        for market, values in prediction.items():
-            for selection, confidence in values.items():
-                # Verificar se é uma value bet
-                is_value = any(vb['market'] == market and vb['selection'] == selection for vb in value_bets)
-                
-                # Obter odds do mercado
-                odds = market_odds.get(market, {}).get(selection, None)
-                
-                # Criar previsão
-                pred = Prediction(
-                    fixture_id=fixture.id,
-                    prediction_type=market,
-                    prediction_value=selection,
-                    confidence=float(confidence),
-                    is_value_bet=is_value,
-                    odds=odds
-                )
-                db.session.add(pred)
+        # Salvar previsões no banco de dados (apenas na primeira análise com esta versão do modelo)
+        if not cached:
+            for market, values in prediction.items():
+                for selection, confidence in values.items():
+                    # Verificar se é uma value bet
+                    is_value = any(vb['market'] == market and vb['selection'] == selection for vb in value_bets)
+                    
+                    # Melhor odd do mercado (None sem cotação)
+                    odds = best_prices[row, SELECTION_INDEX[(market, selection)]]
+                    
+                    # Criar previsão
+                    pred = Prediction(
+                        fixture_id=fixture.id,
+                        prediction_type=market,
+                        prediction_value=selection,
+                        confidence=float(confidence),
+                        is_value_bet=is_value,
+                        odds=None if np.isnan(odds) else float(odds)
+                    )
+                    db.session.add(pred)
         
         # Adicionar ao resultado
         results.append({
@@ -143,7 +669,10 @@ def predict():
             'home_team': fixture.home_team.name,
             'away_team': fixture.away_team.name,
             'predictions': prediction,
-            'value_bets': value_bets
+            'spread': spread,
+            'odds': to_odds(best_prices[row]),
+            'value_bets': value_bets,
+            'cached': cached
         })
     
     db.session.commit()
@@ -153,3 +682,86 @@ def predict():
         'message': f'Análise concluída para {len(results)} jogos.',
         'results': results
     })
+
+@ai_bp.route('/arbitrage', methods=['POST'])
+def arbitrage():
+    """Procura surebets entre as casas nos jogos selecionados"""
+    data = request.get_json(silent=True) or {}
+    fixture_ids = data.get('fixture_ids', [])
+    
+    if not fixture_ids:
+        return jsonify({
+            'success': False,
+            'message': 'Nenhum jogo selecionado para análise.'
+        })
+    
+    # Jogos já iniciados saem do índice. Os que ainda não estão nele, ou cujas cotações no
+    # banco são mais novas que o índice (sincronizadas por outro processo), são recarregados
+    # com as odds mais recentes do banco; as sincronizações deste processo o mantêm em dia
+    now = datetime.utcnow()
+    started = set(started_fixtures(fixture_ids))
+    for fixture_id in started:
+        arbitrage_scanner.remove(fixture_id)
+    updated_at = odds_updated_at([fixture_id for fixture_id in fixture_ids if fixture_id not in started])
+    stale = [fixture_id for fixture_id, updated in updated_at.items()
+             if not arbitrage_scanner.is_current(fixture_id, updated)]
+    if stale:
+        market_odds, bookmakers, bookmaker_ids = latest_odds(stale, with_ids=True)
+        arbitrage_scanner.load(market_odds, stale, bookmaker_ids, bookmakers, as_of=now)
+    
+    surebets = arbitrage_scanner.surebets(fixture_ids, total_stake=float(data.get('total_stake', 100.0)))
+    
+    # Instante mais antigo até o qual o índice reflete as cotações do banco nesta resposta
+    freshness = [arbitrage_scanner.as_of(fixture_id) for fixture_id in updated_at]
+    freshness = [as_of for as_of in freshness if as_of is not None]
+    
+    return jsonify({
+        'success': True,
+        'message': f'{len(surebets)} surebets encontradas.',
+        'surebets': surebets,
+        'as_of': min(freshness).isoformat() if freshness else None
+    })
+
+@ai_bp.route('/markets', methods=['POST'])
+def markets():
+    """Precifica todos os mercados (linhas de gols, placar exato, dupla chance, handicap asiático) dos jogos selecionados"""
+    data = request.get_json(silent=True) or {}
+    fixture_ids = data.get('fixture_ids', [])
+    
+    if not fixture_ids:
+        return jsonify({
+            'success': False,
+            'message': 'Nenhum jogo selecionado para análise.'
+        })
+    
+    betting_model = model_registry.get()
+    if not betting_model or not betting_model.goal_model:
+        return jsonify({
+            'success': False,
+            'message': 'Modelo de gols não treinado. Execute o treinamento primeiro.'
+        })
+    
+    fixtures_by_id = {
+        fixture.id: fixture
+        for fixture in Fixture.query.options(
+            joinedload(Fixture.home_team), joinedload(Fixture.away_team)
+        ).filter(Fixture.id.in_(fixture_ids)).all()
+    }
+    fixtures = [fixtures_by_id[fixture_id] for fixture_id in dict.fromkeys(fixture_ids) if fixture_id in fixtures_by_id]
+    
+    statistics = {}
+    for stats in FixtureStatistics.query.filter(
+            FixtureStatistics.fixture_id.in_(list(fixtures_by_id))).order_by(FixtureStatistics.id):
+        statistics.setdefault(stats.fixture_id, stats)
+    
+    # Uma passada pelo modelo de gols e uma matriz de placares para todos os jogos
+    results = [
+        dict(priced, fixture_id=fixture.id, home_team=fixture.home_team.name, away_team=fixture.away_team.name)
+        for fixture, priced in zip(fixtures, betting_model.predict_markets(fixtures, statistics, _history)) if priced
+    ]
+    
+    return jsonify({
+        'success': True,
+        'message': f'Mercados calculados para {len(results)} jogos.',
+        'results': results
+    })
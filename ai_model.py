@@ -1,18 +1,82 @@
+import os
+import tempfile
 import numpy as np
-import tensorflow as tf
-from tensorflow import keras
-from tensorflow.keras import layers
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 import pandas as pd
 from datetime import datetime, timedelta
+from src.models.feature_engine import FeatureEngine, stats_vector
+from src.models.team_state import TeamStateStore
+from src.models.standings import StandingsEngine
+from src.models.markets import selection_probabilities, to_prediction, odds_matrix, selection_matrix
+from src.models.value_bets import detect_value_bets, value_bets_to_dicts
+from src.models.inference import InferenceEngine, export_inference, verify_inference, VERIFY_TOLERANCE
+from src.models.quantization import load_engine
+from src.models.goal_model import GoalRateModel
+from src.models.score_matrix import to_markets
+
+# Número máximo de épocas de treinamento (o early stopping pode encerrar antes)
+MAX_EPOCHS = 100
+
+# Arquitetura e hiperparâmetros padrão da rede
+DEFAULT_CONFIG = {
+    'layers': [64, 32, 16],
+    'dropout': 0.2,
+    'learning_rate': 0.001,
+    'batch_size': 32
+}
+
+
+def epoch_callback(on_epoch):
+    """Cria um callback que repassa as métricas de cada época para uma função (ex.: progresso de um job)"""
+    # O TensorFlow só é importado quando há treinamento
+    from tensorflow import keras
+    
+    class EpochCallback(keras.callbacks.Callback):
+        def on_epoch_end(self, epoch, logs=None):
+            on_epoch(epoch, logs)
+    
+    return EpochCallback()
+
+
+def member_path(path, index):
+    """Arquivo do membro index (a partir de 1) de um ensemble salvo em path"""
+    root, ext = os.path.splitext(path)
+    return f'{root}_member{index}{ext}'
+
+
+def _mapped_ids(file):
+    """Ids gravados num arquivo temporário, lidos por memory mapping (fora da memória do processo)"""
+    file.flush()
+    if not file.tell():
+        return np.empty(0, dtype=np.int64)
+    return np.memmap(file, dtype=np.int64, mode='r')
+
 
 class BettingModel:
     """Classe para o modelo de IA para análise de apostas esportivas"""
     
-    def __init__(self):
+    def __init__(self, team_state=None, standings=None, config=None):
         self.model = None
         self.scaler = StandardScaler()
+        # Versão dos artefatos carregados (definida pelo ModelRegistry)
+        self.version = None
+        # Membros do ensemble (modelos Keras), quando treinado com fit_ensemble
+        self.members = None
+        # Modelo de taxa de gols (GoalRateModel), que precifica os demais mercados
+        self.goal_model = None
+        # Ids dos jogos já usados no treinamento (base do treinamento incremental)
+        self.trained_ids = None
+        # Ids dos jogos deixados de fora do ajuste (conjunto de teste), para avaliações posteriores
+        self.holdout_ids = None
+        # Linhas de X usadas como teste no último fit
+        self.test_rows = None
+        # Arquitetura e hiperparâmetros (ex.: melhor configuração da busca)
+        self.config = dict(DEFAULT_CONFIG, **(config or {}))
+        # Estado recente de cada time (forma e médias de gols)
+        self.team_state = team_state or TeamStateStore()
+        # Classificação das ligas por temporada
+        self.standings = standings or StandingsEngine()
         self.features = [
             'home_possession', 'away_possession',
             'home_shots', 'away_shots',
@@ -28,21 +92,26 @@ class BettingModel:
         ]
         self.prediction_types = ['1X2', 'BTTS', 'Over/Under 2.5']
     
-    def _build_model(self, input_shape):
+    def _build_model(self, input_shape, config=None):
         """Constrói a arquitetura da rede neural"""
-        model = keras.Sequential([
-            layers.Input(shape=(input_shape,)),
-            layers.Dense(64, activation='relu'),
-            layers.Dropout(0.2),
-            layers.Dense(32, activation='relu'),
-            layers.Dropout(0.2),
-            layers.Dense(16, activation='relu'),
-            # Saída para múltiplas previsões (1X2, BTTS, Over/Under)
-            layers.Dense(5, activation='softmax')  # [Home, Draw, Away, BTTS-Yes, Over2.5]
-        ])
+        from tensorflow import keras
+        from tensorflow.keras import layers
+        
+        config = config or self.config
+        units = config['layers']
+        
+        model_layers = [layers.Input(shape=(input_shape,))]
+        for i, n_units in enumerate(units):
+            model_layers.append(layers.Dense(n_units, activation='relu'))
+            # Dropout entre as camadas ocultas (não após a última)
+            if config['dropout'] and i < len(units) - 1:
+                model_layers.append(layers.Dropout(config['dropout']))
+        # Saída para múltiplas previsões (1X2, BTTS, Over/Under)
+        model_layers.append(layers.Dense(5, activation='softmax'))  # [Home, Draw, Away, BTTS-Yes, Over2.5]
+        model = keras.Sequential(model_layers)
         
         model.compile(
-            optimizer='adam',
+            optimizer=keras.optimizers.Adam(learning_rate=config['learning_rate']),
             loss='categorical_crossentropy',
             metrics=['accuracy']
         )
@@ -51,287 +120,418 @@ class BettingModel:
     
     def _prepare_data(self, fixtures, statistics):
         """Prepara os dados para treinamento"""
-        data = []
-        labels = []
-        
-        for fixture in fixtures:
-            # Pular jogos sem estatísticas ou resultados
-            if fixture.status != 'Match Finished' or not fixture.home_goals or not fixture.away_goals:
-                continue
-            
-            # Encontrar estatísticas do jogo
-            stats = next((s for s in statistics if s.fixture_id == fixture.id), None)
-            if not stats:
-                continue
-            
-            # Calcular métricas de forma (últimos 5 jogos)
-            home_team_fixtures = [f for f in fixtures if 
-                                 (f.home_team_id == fixture.home_team_id or f.away_team_id == fixture.home_team_id) and
-                                 f.date < fixture.date and f.status == 'Match Finished']
-            home_team_fixtures = sorted(home_team_fixtures, key=lambda x: x.date, reverse=True)[:5]
-            
-            away_team_fixtures = [f for f in fixtures if 
-                                 (f.home_team_id == fixture.away_team_id or f.away_team_id == fixture.away_team_id) and
-                                 f.date < fixture.date and f.status == 'Match Finished']
-            away_team_fixtures = sorted(away_team_fixtures, key=lambda x: x.date, reverse=True)[:5]
-            
-            # Calcular forma (pontos nos últimos 5 jogos)
-            home_form = 0
-            for f in home_team_fixtures:
-                if f.home_team_id == fixture.home_team_id:
-                    if f.home_goals > f.away_goals:
-                        home_form += 3
-                    elif f.home_goals == f.away_goals:
-                        home_form += 1
-                else:
-                    if f.away_goals > f.home_goals:
-                        home_form += 3
-                    elif f.away_goals == f.home_goals:
-                        home_form += 1
-            
-            away_form = 0
-            for f in away_team_fixtures:
-                if f.home_team_id == fixture.away_team_id:
-                    if f.home_goals > f.away_goals:
-                        away_form += 3
-                    elif f.home_goals == f.away_goals:
-                        away_form += 1
-                else:
-                    if f.away_goals > f.home_goals:
-                        away_form += 3
-                    elif f.away_goals == f.home_goals:
-                        away_form += 1
-            
-            # Calcular médias de gols
-            home_goals_scored = []
-            home_goals_conceded = []
-            for f in home_team_fixtures:
-                if f.home_team_id == fixture.home_team_id:
-                    home_goals_scored.append(f.home_goals)
-                    home_goals_conceded.append(f.away_goals)
-                else:
-                    home_goals_scored.append(f.away_goals)
-                    home_goals_conceded.append(f.home_goals)
-            
-            away_goals_scored = []
-            away_goals_conceded = []
-            for f in away_team_fixtures:
-                if f.home_team_id == fixture.away_team_id:
-                    away_goals_scored.append(f.home_goals)
-                    away_goals_conceded.append(f.away_goals)
-                else:
-                    away_goals_scored.append(f.away_goals)
-                    away_goals_conceded.append(f.home_goals)
-            
-            home_goals_scored_avg = sum(home_goals_scored) / len(home_goals_scored) if home_goals_scored else 0
-            home_goals_conceded_avg = sum(home_goals_conceded) / len(home_goals_conceded) if home_goals_conceded else 0
-            away_goals_scored_avg = sum(away_goals_scored) / len(away_goals_scored) if away_goals_scored else 0
-            away_goals_conceded_avg = sum(away_goals_conceded) / len(away_goals_conceded) if away_goals_conceded else 0
-            
-            # Posição na liga (simplificada)
-            home_league_position = 10  # Placeholder
-            away_league_position = 10  # Placeholder
-            
-            # Criar vetor de características
-            feature_vector = [
-                stats.home_possession if stats.home_possession else 50,
-                stats.away_possession if stats.away_possession else 50,
-                stats.home_shots if stats.home_shots else 0,
-                stats.away_shots if stats.away_shots else 0,
-                stats.home_shots_on_target if stats.home_shots_on_target else 0,
-                stats.away_shots_on_target if stats.away_shots_on_target else 0,
-                stats.home_corners if stats.home_corners else 0,
-                stats.away_corners if stats.away_corners else 0,
-                stats.home_fouls if stats.home_fouls else 0,
-                stats.away_fouls if stats.away_fouls else 0,
-                stats.home_yellow_cards if stats.home_yellow_cards else 0,
-                stats.away_yellow_cards if stats.away_yellow_cards else 0,
-                stats.home_red_cards if stats.home_red_cards else 0,
-                stats.away_red_cards if stats.away_red_cards else 0,
-                home_form,
-                away_form,
-                home_league_position,
-                away_league_position,
-                home_goals_scored_avg,
-                away_goals_scored_avg,
-                home_goals_conceded_avg,
-                away_goals_conceded_avg
-            ]
-            
-            # Criar rótulos (1X2, BTTS, Over/Under 2.5)
-            result_1x2 = 0  # Home win
-            if fixture.home_goals < fixture.away_goals:
-                result_1x2 = 2  # Away win
-            elif fixture.home_goals == fixture.away_goals:
-                result_1x2 = 1  # Draw
-            
-            btts = 1 if fixture.home_goals > 0 and fixture.away_goals > 0 else 0
-            over_under = 1 if (fixture.home_goals + fixture.away_goals) > 2.5 else 0
-            
-            # One-hot encoding para resultado 1X2
-            label_1x2 = [0, 0, 0]
-            label_1x2[result_1x2] = 1
-            
-            # Combinar todos os rótulos
-            label = label_1x2 + [btts, over_under]
-            
-            data.append(feature_vector)
-            labels.append(label)
-        
-        return np.array(data), np.array(labels)
+        engine = FeatureEngine.from_orm(fixtures, statistics)
+        self._sync_state(engine)
+        _, X, y = engine.build()
+        return X, y
     
-    def train(self, fixtures, statistics):
+    def _sync_state(self, engine):
+        """Alinha o estado dos times e a classificação com o histórico usado no treino"""
+        self.team_state.rebuild_from(engine)
+        engine.standings = self.standings.rebuild_from(engine)
+    
+    def _callbacks(self, on_epoch=None):
+        """Callbacks de treinamento (early stopping e, opcionalmente, progresso por época)"""
+        from tensorflow import keras
+        
+        callbacks = [keras.callbacks.EarlyStopping(
+            monitor='val_loss',
+            patience=10,
+            restore_best_weights=True
+        )]
+        if on_epoch:
+            callbacks.append(epoch_callback(on_epoch))
+        return callbacks
+    
+    def train(self, fixtures, statistics, on_epoch=None):
         """Treina o modelo com dados históricos"""
         X, y = self._prepare_data(fixtures, statistics)
+        return self.fit(X, y, on_epoch=on_epoch)
+    
+    def train_cached(self, engine, cache, on_epoch=None, n_members=1):
+        """Treina o modelo a partir do cache de características, recalculando apenas jogos novos ou alterados"""
+        self._sync_state(engine)
+        updated = cache.update(engine)
+        print(f"Cache de características: {updated} jogos recalculados")
+        
+        ids, X, y = cache.load()
+        if n_members > 1:
+            success = self.fit_ensemble(X, y, n_members, on_epoch=on_epoch)
+        else:
+            success = self.fit(X, y, on_epoch=on_epoch)
+        if success:
+            self.trained_ids = np.array(ids)
+            self.holdout_ids = self.trained_ids[self.test_rows]
+        return success
+    
+    def train_streaming(self, stream, batch_size=None, on_epoch=None):
+        """Treina o modelo lendo os jogos do banco em blocos via tf.data (memória limitada)
+        
+        A validação controla o early stopping; a avaliação final usa a divisão
+        de teste, que não participa do ajuste. A primeira leitura atualiza as
+        classificações (self.standings) e grava os ids dos jogos em arquivos
+        temporários, lidos por memory mapping.
+        """
+        batch_size = batch_size or self.config['batch_size']
+        # Primeira leitura: estatísticas do scaler calculadas incrementalmente
+        self.scaler = StandardScaler()
+        n_samples = 0
+        trained_file, holdout_file = tempfile.TemporaryFile(), tempfile.TemporaryFile()
+        for ids_chunk, X_chunk, _ in stream.iter_chunks(standings=self.standings):
+            self.scaler.partial_fit(X_chunk)
+            n_samples += len(X_chunk)
+            ids_chunk.tofile(trained_file)
+            ids_chunk[[stream.split_of(fixture_id) == 'test' for fixture_id in ids_chunk]].tofile(holdout_file)
+        
+        if n_samples < 100:
+            print(f"Dados insuficientes para treinamento: {n_samples} amostras")
+            return False
+        
+        train_dataset = stream.dataset(self.scaler, 'train', batch_size=batch_size)
+        validation_dataset = stream.dataset(self.scaler, 'validation', batch_size=batch_size)
+        test_dataset = stream.dataset(self.scaler, 'test', batch_size=batch_size)
         
+        # Construir e treinar modelo
+        self.model = self._build_model(len(self.features))
+        
+        self.model.fit(
+            train_dataset,
+            epochs=MAX_EPOCHS,
+            validation_data=validation_dataset,
+            callbacks=self._callbacks(on_epoch),
+            verbose=1
+        )
+        
+        # Avaliar modelo
+        loss, accuracy = self.model.evaluate(test_dataset)
+        print(f"Acurácia do modelo: {accuracy:.4f}")
+        
+        # O estado final da leitura corresponde ao estado atual dos times
+        if stream.team_state is not None:
+            stream.team_state.path = self.team_state.path
+            self.team_state = stream.team_state
+        
+        self.trained_ids = _mapped_ids(trained_file)
+        self.holdout_ids = _mapped_ids(holdout_file)
+        return True
+    
+    def train_incremental(self, cache, trained_ids, replay_size=2000, epochs=5, learning_rate=1e-4,
+                          on_epoch=None, random_state=None, holdout_ids=None):
+        """Ajusta o modelo atual com os jogos do cache ainda não usados no treinamento
+        
+        Os jogos novos são identificados pelo id, não pela data: um jogo antigo
+        cujas estatísticas chegaram depois do último treinamento também entra.
+        Eles são misturados a uma amostra de jogos antigos (replay) para evitar
+        que o modelo esqueça o histórico; os jogos de holdout_ids (teste do
+        treinamento completo) não entram no replay. Retorna o número de jogos novos.
+        """
+        if not self.model:
+            print("Nenhum modelo carregado para o treinamento incremental")
+            return 0
+        
+        ids, X, y = cache.load()
+        trained = np.isin(ids, trained_ids)
+        
+        new_rows = np.flatnonzero(~trained)
+        if not len(new_rows):
+            print("Nenhum jogo novo desde o último treinamento")
+            return 0
+        
+        old_rows = np.flatnonzero(trained & ~np.isin(ids, [] if holdout_ids is None else holdout_ids))
+        rng = np.random.default_rng(random_state)
+        replay_rows = rng.choice(old_rows, size=min(replay_size, len(old_rows)), replace=False)
+        
+        # Atualiza média e variância do scaler apenas com os dados novos
+        self.scaler.partial_fit(X[new_rows])
+        
+        # Otimizador novo com taxa de aprendizado menor para o ajuste fino (de cada membro, num ensemble)
+        from tensorflow import keras
+        rows = np.sort(np.concatenate([new_rows, replay_rows]))
+        X_rows = self.scaler.transform(X[rows])
+        for network in self.members or [self.model]:
+            network.compile(
+                optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+                loss='categorical_crossentropy',
+                metrics=['accuracy']
+            )
+            network.fit(
+                X_rows, y[rows],
+                epochs=epochs,
+                batch_size=self.config['batch_size'],
+                shuffle=True,
+                callbacks=[epoch_callback(on_epoch)] if on_epoch else [],
+                verbose=1
+            )
+        
+        self.trained_ids = np.array(ids)
+        self.holdout_ids = holdout_ids
+        print(f"Treinamento incremental: {len(new_rows)} jogos novos, {len(replay_rows)} de replay")
+        return len(new_rows)
+    
+    def fit(self, X, y, on_epoch=None, epochs=MAX_EPOCHS, verbose=1, seed=42, split_seed=None):
+        """Normaliza os dados e treina a rede neural
+        
+        split_seed define a divisão de treino e teste (por padrão, seed); as
+        linhas de teste ficam em self.test_rows.
+        """
         if len(X) < 100:
             print(f"Dados insuficientes para treinamento: {len(X)} amostras")
             return False
         
         # Normalizar dados
         X = self.scaler.fit_transform(X)
+        y = np.asarray(y)
         
         # Dividir em treino e teste
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        train_rows, self.test_rows = train_test_split(
+            np.arange(len(X)), test_size=0.2, random_state=seed if split_seed is None else split_seed)
+        X_train, X_test, y_train, y_test = X[train_rows], X[self.test_rows], y[train_rows], y[self.test_rows]
         
         # Construir e treinar modelo
+        from tensorflow import keras
+        keras.utils.set_random_seed(seed)
         self.model = self._build_model(X_train.shape[1])
-        
-        # Callback para early stopping
-        early_stopping = keras.callbacks.EarlyStopping(
-            monitor='val_loss',
-            patience=10,
-            restore_best_weights=True
-        )
+        self.members = None
         
         history = self.model.fit(
             X_train, y_train,
-            epochs=100,
-            batch_size=32,
+            epochs=epochs,
+            batch_size=self.config['batch_size'],
             validation_split=0.2,
-            callbacks=[early_stopping],
-            verbose=1
+            callbacks=self._callbacks(on_epoch),
+            verbose=verbose
         )
         
         # Avaliar modelo
-        loss, accuracy = self.model.evaluate(X_test, y_test)
+        loss, accuracy = self.model.evaluate(X_test, y_test, verbose=verbose)
         print(f"Acurácia do modelo: {accuracy:.4f}")
         
         return True
     
-    def predict(self, fixture, statistics):
-        """Gera previsões para um jogo específico"""
+    def feature_matrix(self, fixtures, statistics, history=None):
+        """Monta a matriz de características de vários jogos a partir do estado atual
+        
+        statistics é um dicionário {fixture_id: estatísticas}. Retorna a matriz
+        e os índices dos jogos que têm estatísticas. O estado dos times só vale
+        para jogos posteriores ao último resultado registrado; para os demais
+        (ex.: jogos já finalizados, cujo resultado está no estado), a forma é
+        calculada antes da data do jogo com o FeatureEngine devolvido por
+        history(), chamado apenas quando necessário.
+        """
+        rows = [i for i, fixture in enumerate(fixtures) if statistics.get(fixture.id) is not None]
+        if not rows:
+            return np.empty((0, len(self.features))), rows
+        
+        selected = [fixtures[i] for i in rows]
+        
+        # Forma recente e médias de gols a partir do estado dos times (O(1) por time)
+        home_state = np.array([self.team_state.features(f.home_team_id) for f in selected], dtype=float)
+        away_state = np.array([self.team_state.features(f.away_team_id) for f in selected], dtype=float)
+        
+        # Jogos anteriores ao estado atual: forma antes da data, sem o próprio resultado
+        league_ids = [f.league_id for f in selected]
+        seasons = [f.season for f in selected]
+        dates = [f.date for f in selected]
+        past = [k for k, f in enumerate(selected)
+                if not (self.team_state.is_current(f.home_team_id, f.date) and
+                        self.team_state.is_current(f.away_team_id, f.date))]
+        if past and history is not None:
+            engine = history()
+            past_dates = [dates[k] for k in past]
+            home_state[past] = np.column_stack(engine.form_features([selected[k].home_team_id for k in past], past_dates))
+            away_state[past] = np.column_stack(engine.form_features([selected[k].away_team_id for k in past], past_dates))
+        
+        # Posição na liga (na temporada do jogo) antes da data de cada jogo (uma consulta por liga)
+        home_position = self.standings.positions(league_ids, [f.home_team_id for f in selected], dates, seasons)
+        away_position = self.standings.positions(league_ids, [f.away_team_id for f in selected], dates, seasons)
+        
+        X = np.column_stack([
+            np.array([stats_vector(statistics[f.id]) for f in selected], dtype=float),
+            home_state[:, 0], away_state[:, 0],
+            home_position, away_position,
+            home_state[:, 1], away_state[:, 1],
+            home_state[:, 2], away_state[:, 2]
+        ])
+        return X, rows
+    
+    def predict_batch(self, fixtures, statistics, history=None):
+        """Gera previsões para vários jogos com uma única passada pela rede
+        
+        Retorna uma lista alinhada com fixtures, com None nos jogos sem estatísticas.
+        """
+        results = [None] * len(fixtures)
         if not self.model:
-            return None
+            return results
         
-        # Encontrar estatísticas do jogo
-        stats = next((s for s in statistics if s.fixture_id == fixture.id), None)
-        if not stats:
-            return None
-        
-        # Preparar dados para previsão (similar ao método _prepare_data)
-        # Aqui precisaríamos implementar a mesma lógica de extração de características
-        
-        # Placeholder para demonstração
-        feature_vector = [
-            stats.home_possession if stats.home_possession else 50,
-            stats.away_possession if stats.away_possession else 50,
-            stats.home_shots if stats.home_shots else 0,
-            stats.away_shots if stats.away_shots else 0,
-            stats.home_shots_on_target if stats.home_shots_on_target else 0,
-            stats.away_shots_on_target if stats.away_shots_on_target else 0,
-            stats.home_corners if stats.home_corners else 0,
-            stats.away_corners if stats.away_corners else 0,
-            stats.home_fouls if stats.home_fouls else 0,
-            stats.away_fouls if stats.away_fouls else 0,
-            stats.home_yellow_cards if stats.home_yellow_cards else 0,
-            stats.away_yellow_cards if stats.away_yellow_cards else 0,
-            stats.home_red_cards if stats.home_red_cards else 0,
-            stats.away_red_cards if stats.away_red_cards else 0,
-            0,  # home_form (placeholder)
-            0,  # away_form (placeholder)
-            10,  # home_league_position (placeholder)
-            10,  # away_league_position (placeholder)
-            0,  # home_goals_scored_avg (placeholder)
-            0,  # away_goals_scored_avg (placeholder)
-            0,  # home_goals_conceded_avg (placeholder)
-            0   # away_goals_conceded_avg (placeholder)
-        ]
+        X, rows = self.feature_matrix(fixtures, statistics, history)
+        for i, prediction in zip(rows, self.predict_features(X)):
+            results[i] = prediction
         
-        # Normalizar dados
-        X = self.scaler.transform([feature_vector])
-        
-        # Fazer previsão
-        predictions = self.model.predict(X)[0]
-        
-        # Interpretar resultados
-        result = {
-            '1X2': {
-                'Home': predictions[0],
-                'Draw': predictions[1],
-                'Away': predictions[2]
-            },
-            'BTTS': {
-                'Yes': predictions[3],
-                'No': 1 - predictions[3]
-            },
-            'Over/Under 2.5': {
-                'Over': predictions[4],
-                'Under': 1 - predictions[4]
+        return results
+    
+    def train_goal_model(self, engine):
+        """Treina o modelo de taxa de gols com todos os jogos finalizados (inclusive sem gols de um lado)"""
+        ids, X, _ = engine.build(include_scoreless=True)
+        goal_model = GoalRateModel()
+        if not goal_model.fit(X, engine.goals(ids)):
+            return False
+        self.goal_model = goal_model
+        return True
+    
+    def predict_markets(self, fixtures, statistics, history=None):
+        """Precifica todos os mercados de vários jogos a partir dos gols esperados
+        
+        Uma passada pelo modelo de gols e uma matriz de placares para o lote
+        inteiro. Retorna uma lista alinhada com fixtures, com None nos jogos sem
+        estatísticas (ou sem modelo de gols).
+        """
+        results = [None] * len(fixtures)
+        if not self.goal_model:
+            return results
+        
+        X, rows = self.feature_matrix(fixtures, statistics, history)
+        if not rows:
+            return results
+        
+        rates, prices = self.goal_model.predict_markets(X)
+        for k, i in enumerate(rows):
+            results[i] = {
+                'expected_goals': {'home': float(rates[k, 0]), 'away': float(rates[k, 1])},
+                'markets': to_markets(prices, k)
             }
-        }
+        return results
+    
+    def fit_ensemble(self, X, y, n_members, on_epoch=None, epochs=MAX_EPOCHS, verbose=1):
+        """Treina n_members redes com sementes diferentes
+        
+        Todos os membros deixam de fora o mesmo conjunto de teste, de modo que
+        ele continua separado para o ensemble inteiro.
+        """
+        members = []
+        for k in range(n_members):
+            print(f"Treinando membro {k + 1} de {n_members} do ensemble")
+            member = BettingModel(config=self.config)
+            if not member.fit(X, y, on_epoch=on_epoch, epochs=epochs, verbose=verbose, seed=42 + k, split_seed=42):
+                return False
+            members.append(member.model)
         
-        return result
+        # Todos os membros normalizam os dados com o mesmo scaler (ajustado em X)
+        self.scaler = member.scaler
+        self.model = members[0]
+        self.members = members
+        self.test_rows = member.test_rows
+        return True
     
-    def detect_value_bets(self, prediction, odds):
-        """Detecta value bets comparando previsões com odds do mercado"""
-        value_bets = []
-        
-        # Converter probabilidades para odds implícitas
-        implied_odds = {
-            '1X2': {
-                'Home': 1 / prediction['1X2']['Home'] if prediction['1X2']['Home'] > 0 else float('inf'),
-                'Draw': 1 / prediction['1X2']['Draw'] if prediction['1X2']['Draw'] > 0 else float('inf'),
-                'Away': 1 / prediction['1X2']['Away'] if prediction['1X2']['Away'] > 0 else float('inf')
-            },
-            'BTTS': {
-                'Yes': 1 / prediction['BTTS']['Yes'] if prediction['BTTS']['Yes'] > 0 else float('inf'),
-                'No': 1 / prediction['BTTS']['No'] if prediction['BTTS']['No'] > 0 else float('inf')
-            },
-            'Over/Under 2.5': {
-                'Over': 1 / prediction['Over/Under 2.5']['Over'] if prediction['Over/Under 2.5']['Over'] > 0 else float('inf'),
-                'Under': 1 / prediction['Over/Under 2.5']['Under'] if prediction['Over/Under 2.5']['Under'] > 0 else float('inf')
-            }
-        }
-        
-        # Comparar com odds do mercado
-        # Exemplo: se odds implícitas < odds do mercado, é uma value bet
-        for market in odds:
-            for selection, market_odds in odds[market].items():
-                if market in implied_odds and selection in implied_odds[market]:
-                    implied = implied_odds[market][selection]
-                    if market_odds > implied * 1.1:  # 10% de margem para value bet
-                        value_bets.append({
-                            'market': market,
-                            'selection': selection,
-                            'implied_odds': implied,
-                            'market_odds': market_odds,
-                            'value': (market_odds / implied - 1) * 100  # Valor em percentual
-                        })
-        
-        return value_bets
+    def _member_outputs(self, X):
+        """Saídas de cada membro para dados já normalizados: (membros, jogos, saídas)"""
+        if hasattr(self.model, 'predict_members'):
+            return self.model.predict_members(X)
+        if self.members:
+            return np.stack([np.asarray(member.predict_on_batch(X)) for member in self.members])
+        return np.asarray(self.model.predict_on_batch(X))[None]
+    
+    def predict_features(self, X, with_spread=False):
+        """Gera previsões a partir de uma matriz de características (uma passada pela rede)
+        
+        Com with_spread, retorna também o desvio padrão entre os membros do
+        ensemble para cada seleção (None para um modelo simples).
+        """
+        if not self.model or not len(X):
+            return ([], []) if with_spread else []
+        
+        # Normalizar dados e fazer a previsão de todos os jogos (e membros) de uma vez
+        outputs = self._member_outputs(self.scaler.transform(X))
+        probabilities = np.stack([selection_probabilities(member) for member in outputs])
+        predictions = [to_prediction(row) for row in probabilities.mean(axis=0)]
+        if not with_spread:
+            return predictions
+        
+        if len(probabilities) < 2:
+            return predictions, [None] * len(predictions)
+        return predictions, [to_prediction(row) for row in probabilities.std(axis=0)]
+    
+    def predict(self, fixture, statistics):
+        """Gera previsões para um jogo específico"""
+        if not isinstance(statistics, (list, tuple)):
+            statistics = [statistics]
+        
+        # Encontrar estatísticas do jogo
+        stats = next((s for s in statistics if s is not None and s.fixture_id == fixture.id), None)
+        return self.predict_batch([fixture], {fixture.id: stats})[0]
+    
+    def detect_value_bets(self, prediction, odds, spread=None, agreement=1.0):
+        """Detecta value bets comparando previsões com odds do mercado
+        
+        Com o desvio entre os membros de um ensemble (spread), a aposta só é
+        aceita se a margem se mantiver para a probabilidade prevista menos
+        agreement desvios, isto é, se os membros concordarem que há valor.
+        """
+        bets = detect_value_bets(
+            selection_matrix([prediction]),
+            odds_matrix(odds),
+            spread=selection_matrix([spread]) if spread else None,
+            agreement=agreement
+        )
+        return value_bets_to_dicts(bets).get(0, [])
     
     def save_model(self, path):
-        """Salva o modelo treinado"""
-        if self.model:
-            self.model.save(path)
-            return True
-        return False
+        """Salva o modelo treinado
+        
+        Num ensemble, o primeiro membro fica em path e os demais em arquivos
+        ao lado (member_path); arquivos de membros de um ensemble anterior são
+        removidos.
+        """
+        if not self.model:
+            return False
+        
+        members = self.members or [self.model]
+        members[0].save(path)
+        for k, member in enumerate(members[1:], start=1):
+            member.save(member_path(path, k))
+        
+        k = len(members)
+        while os.path.exists(member_path(path, k)):
+            os.remove(member_path(path, k))
+            k += 1
+        return True
     
     def load_model(self, path):
-        """Carrega um modelo treinado"""
+        """Carrega um modelo treinado (com todos os membros, se for um ensemble)"""
         try:
-            self.model = keras.models.load_model(path)
+            from tensorflow import keras
+            members = [keras.models.load_model(path)]
+            while os.path.exists(member_path(path, len(members))):
+                members.append(keras.models.load_model(member_path(path, len(members))))
+            self.model = members[0]
+            self.members = members if len(members) > 1 else None
             return True
         except:
             return False
+    
+    def export_inference(self, path):
+        """Exporta o modelo para inferência em NumPy e confere se as saídas são idênticas"""
+        if not self.model:
+            return False
+        
+        model = self.members or self.model
+        export_inference(model, self.scaler, path)
+        engine = InferenceEngine.load(path)
+        difference = verify_inference(model, self.scaler, engine) if engine else float('inf')
+        if difference > VERIFY_TOLERANCE:
+            print(f"Modelo de inferência divergente do Keras (diferença máxima {difference:.2e})")
+            os.remove(path)
+            return False
+        
+        print(f"Modelo de inferência exportado (diferença máxima {difference:.2e})")
+        return True
+    
+    def load_inference(self, path):
+        """Carrega o modelo exportado em NumPy (float32 ou quantizado), sem importar o TensorFlow"""
+        engine = load_engine(path)
+        if engine is None:
+            return False
+        # O mesmo objeto normaliza as entradas e executa a rede (ou o ensemble)
+        self.model = engine
+        self.scaler = engine
+        self.members = None
+        return True
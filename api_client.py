@@ -1,26 +1,153 @@
+import os
 import requests
 import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sqlalchemy.orm import joinedload
+from datetime import datetime, timezone
 from src.models.database import db
-from src.models.models import League, Team, Fixture, FixtureStatistics
+from src.models.models import League, Team, Fixture, FixtureStatistics, Odds
+from src.models.markets import SELECTION_INDEX
+from src.models.feature_engine import FINISHED_STATUS
+from src.models.odds_history import OddsHistoryStore
+from src.models.odds import started_fixtures
+from src.models.arbitrage import ArbitrageScanner
+from src.models.http_session import PooledSession
+from src.models.response_cache import ResponseCache
+from src.models.request_scheduler import RequestScheduler, LIVE, UPCOMING, BACKFILL
+
+# Diretório padrão do cache de respostas da API
+RESPONSE_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'api_cache')
+
+# Espera máxima por cota (segundos) de cada prioridade: requisições ao vivo e de próximos jogos
+# falham logo quando a cota acaba; só o backfill espera a próxima janela diária (None)
+DEFAULT_MAX_WAIT = {LIVE: 30.0, UPCOMING: 30.0, BACKFILL: None}
+
+# Apostas da API mapeadas para os mercados do modelo: nome da aposta -> {valor: (mercado, seleção)}
+API_BETS = {
+    'Match Winner': {
+        'Home': ('1X2', 'Home'),
+        'Draw': ('1X2', 'Draw'),
+        'Away': ('1X2', 'Away')
+    },
+    'Both Teams Score': {
+        'Yes': ('BTTS', 'Yes'),
+        'No': ('BTTS', 'No')
+    },
+    'Goals Over/Under': {
+        'Over 2.5': ('Over/Under 2.5', 'Over'),
+        'Under 2.5': ('Over/Under 2.5', 'Under')
+    }
+}
+
+# Estatísticas da API mapeadas para as colunas de FixtureStatistics (sem o prefixo home_/away_)
+API_STATISTICS = {
+    'Ball Possession': 'possession',
+    'Total Shots': 'shots',
+    'Shots on Goal': 'shots_on_target',
+    'Corner Kicks': 'corners',
+    'Fouls': 'fouls',
+    'Yellow Cards': 'yellow_cards',
+    'Red Cards': 'red_cards'
+}
+
+# Requisições simultâneas na sincronização de estatísticas em lote
+STATISTICS_WORKERS = 8
+
+def _parse_statistics(response, home_team_api_id, away_team_api_id):
+    """Converte a resposta de 'fixtures/statistics' em {coluna de FixtureStatistics: valor}"""
+    values = {}
+    for side, team_api_id in (('home', home_team_api_id), ('away', away_team_api_id)):
+        team_stats = next((item for item in response['response'] if item['team']['id'] == team_api_id), None)
+        if not team_stats or 'statistics' not in team_stats:
+            continue
+        for stat in team_stats['statistics']:
+            column = API_STATISTICS.get(stat['type'])
+            if column is None:
+                continue
+            value = stat['value']
+            if column == 'possession':
+                values[f'{side}_{column}'] = float(value.replace('%', '')) if value else None
+            else:
+                values[f'{side}_{column}'] = int(value) if value else None
+    return values
+
+def _parse_update(value):
+    """Converte o campo 'update' da API (ISO 8601) em datetime UTC sem fuso"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.utcnow()
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
 
 class FootballAPI:
     """Classe para interagir com a API-Football"""
     
     BASE_URL = "https://api-football-v1.p.rapidapi.com/v3"
     
-    def __init__(self, api_key):
+    def __init__(self, api_key, pool_size=10, connect_timeout=5.0, read_timeout=30.0, max_retries=3, backoff=0.5,
+                 cache_dir=None, cache_ttls=None, offline=False, per_minute=None, per_day=None, max_wait=None):
         self.headers = {
             "X-RapidAPI-Key": api_key,
             "X-RapidAPI-Host": "api-football-v1.p.rapidapi.com"
         }
+        # Conexões reaproveitadas entre as chamadas, com timeouts e novas tentativas em 429/5xx
+        self.http = PooledSession(self.headers, pool_size=pool_size, connect_timeout=connect_timeout,
+                                  read_timeout=read_timeout, max_retries=max_retries, backoff=backoff)
+        # Respostas guardadas em disco (validade por endpoint); offline não acessa a rede
+        self.cache = ResponseCache(cache_dir, ttls=cache_ttls, offline=offline) if cache_dir else None
+        self.offline = offline
+        # Ritmo das requisições dentro dos limites por minuto e por dia (ajustados pelos
+        # cabeçalhos x-ratelimit); max_wait limita a espera por cota de todas as prioridades
+        # (por padrão, DEFAULT_MAX_WAIT)
+        self.scheduler = RequestScheduler(per_minute=per_minute, per_day=per_day)
+        self.max_wait = max_wait
+    
+    def _max_wait(self, priority):
+        """Espera máxima por cota de uma requisição (None espera a próxima janela)"""
+        if self.max_wait is not None:
+            return self.max_wait
+        return DEFAULT_MAX_WAIT.get(priority)
     
-    def _make_request(self, endpoint, params=None):
-        """Faz uma requisição para a API com tratamento de limites de requisição"""
+    def _make_request(self, endpoint, params=None, priority=UPCOMING, final=False):
+        """Faz uma requisição para a API, reaproveitando as respostas guardadas no cache
+        
+        Requisições que consomem cota aguardam a vez no agendador, por prioridade
+        (LIVE, UPCOMING ou BACKFILL). final indica que a resposta não muda mais e
+        pode ficar no cache para sempre.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(endpoint, params)
+            if cached is not None:
+                return cached
+        if self.offline:
+            return None
+        
+        if not self.scheduler.acquire(priority, timeout=self._max_wait(priority)):
+            print(f"Requisição adiada por falta de cota: {endpoint} {params or ''}")
+            return None
+        
+        response = self._fetch(endpoint, params, priority)
+        if response is not None and self.cache is not None:
+            self.cache.put(endpoint, params, response, final=final)
+        return response
+    
+    def _fetch(self, endpoint, params=None, priority=UPCOMING):
+        """Faz uma requisição para a API com tratamento de limites de requisição
+        
+        Cada nova tentativa (após 429, 5xx ou falha de conexão) também aguarda
+        uma ficha do agendador, e os cabeçalhos de todas as respostas atualizam
+        os limites.
+        """
         url = f"{self.BASE_URL}/{endpoint}"
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.http.get(
+                url, endpoint=endpoint, params=params,
+                before_retry=lambda: self.scheduler.acquire(priority, timeout=self._max_wait(priority)),
+                on_response=lambda attempt: self.scheduler.update(attempt.headers)
+            )
             response.raise_for_status()
             
             # Verificar limites de requisição
@@ -33,42 +160,81 @@ class FootballAPI:
             print(f"Erro na requisição: {e}")
             return None
     
-    def get_leagues(self, current=True):
+    def request_stats(self):
+        """Latência, tentativas extras e falhas por endpoint desde a criação do cliente"""
+        stats = self.http.stats()
+        if self.cache is not None:
+            stats['cache'] = self.cache.stats()
+        stats['scheduler'] = self.scheduler.stats()
+        return stats
+    
+    def get_leagues(self, current=True, priority=UPCOMING):
         """Obtém as principais ligas disponíveis"""
         params = {"current": "true" if current else "false"}
-        return self._make_request("leagues", params)
+        return self._make_request("leagues", params, priority)
     
-    def get_league_by_id(self, league_id):
+    def get_league_by_id(self, league_id, priority=UPCOMING):
         """Obtém informações de uma liga específica"""
         params = {"id": league_id}
-        return self._make_request("leagues", params)
+        return self._make_request("leagues", params, priority)
     
-    def get_fixtures_by_league(self, league_id, season):
+    def get_fixtures_by_league(self, league_id, season, priority=UPCOMING):
         """Obtém jogos de uma liga específica"""
         params = {"league": league_id, "season": season}
-        return self._make_request("fixtures", params)
+        return self._make_request("fixtures", params, priority)
     
-    def get_fixture_by_id(self, fixture_id):
+    def get_fixture_by_id(self, fixture_id, priority=LIVE):
         """Obtém informações de um jogo específico"""
         params = {"id": fixture_id}
-        return self._make_request("fixtures", params)
+        return self._make_request("fixtures", params, priority)
     
-    def get_fixture_statistics(self, fixture_id):
-        """Obtém estatísticas de um jogo específico"""
+    def get_fixture_statistics(self, fixture_id, priority=BACKFILL, finished=False):
+        """Obtém estatísticas de um jogo específico
+        
+        Só as estatísticas de um jogo finalizado (finished) ficam no cache para sempre.
+        """
         params = {"fixture": fixture_id}
-        return self._make_request("fixtures/statistics", params)
+        return self._make_request("fixtures/statistics", params, priority, final=finished)
     
-    def get_teams_by_league(self, league_id, season):
+    def get_teams_by_league(self, league_id, season, priority=UPCOMING):
         """Obtém times de uma liga específica"""
         params = {"league": league_id, "season": season}
-        return self._make_request("teams", params)
+        return self._make_request("teams", params, priority)
+    
+    def get_odds(self, fixture_id=None, league_id=None, season=None, bookmaker_id=None, page=1, priority=UPCOMING):
+        """Obtém as odds pré-jogo de um jogo ou de uma liga (resposta paginada)"""
+        params = {"page": page}
+        if fixture_id:
+            params["fixture"] = fixture_id
+        if league_id:
+            params["league"] = league_id
+            params["season"] = season
+        if bookmaker_id:
+            params["bookmaker"] = bookmaker_id
+        return self._make_request("odds", params, priority)
+    
+    def get_bookmakers(self, priority=UPCOMING):
+        """Obtém as casas de apostas disponíveis"""
+        return self._make_request("odds/bookmakers", priority=priority)
 
 
 class DataManager:
     """Classe para gerenciar a coleta e armazenamento de dados"""
     
-    def __init__(self, api_key):
-        self.api = FootballAPI(api_key)
+    def __init__(self, api_key, team_state=None, standings=None, api=None,
+                 cache_dir=RESPONSE_CACHE_PATH, offline=False, arbitrage=None):
+        # api permite usar outro cliente (ex.: FakeFootballAPI nos testes); o
+        # cliente padrão guarda as respostas em cache_dir e, offline, só usa o cache
+        self.api = api or FootballAPI(api_key, cache_dir=cache_dir, offline=offline)
+        # Estado dos times (TeamStateStore) e classificações (StandingsEngine),
+        # atualizados quando um jogo é finalizado
+        self.team_state = team_state
+        self.standings = standings
+        # Histórico de preços das odds (movimento de linha)
+        self.odds_history = OddsHistoryStore()
+        # Melhores odds por seleção entre as casas, para detectar surebets a cada cotação
+        # (arbitrage permite compartilhar o índice, ex.: com a rota de surebets)
+        self.arbitrage = arbitrage or ArbitrageScanner()
     
     def sync_leagues(self, leagues_to_sync=None):
         """Sincroniza as ligas principais com o banco de dados"""
@@ -144,6 +310,7 @@ class DataManager:
             return False
         
         fixtures_added = 0
+        finished_fixtures = []
         
         for fixture_data in response['response']:
             fixture_info = fixture_data['fixture']
@@ -174,13 +341,15 @@ class DataManager:
                 db.session.add(away_team)
                 db.session.flush()  # Para obter o ID gerado
             
+            # Converter timestamp para datetime UTC sem fuso (como o histórico de odds)
+            date = datetime.fromtimestamp(fixture_info['timestamp'], timezone.utc).replace(tzinfo=None)
+            fixture_season = (fixture_data.get('league') or {}).get('season') or season
+            
             if not fixture:
-                # Converter timestamp para datetime
-                date = datetime.fromtimestamp(fixture_info['timestamp'])
-                
                 fixture = Fixture(
                     api_id=fixture_info['id'],
                     league_id=league.id,
+                    season=fixture_season,
                     home_team_id=home_team.id,
                     away_team_id=away_team.id,
                     date=date,
@@ -190,68 +359,225 @@ class DataManager:
                 )
                 db.session.add(fixture)
                 fixtures_added += 1
+                
+                if fixture.status == 'Match Finished':
+                    finished_fixtures.append(fixture)
             else:
-                # Atualizar informações do jogo se já existir
+                # Atualizar informações do jogo se já existir (a data também, para jogos
+                # adiados e registros antigos gravados no horário local)
+                changed = (fixture.status != fixture_info['status']['long'] or
+                           fixture.home_goals != goals_info['home'] or
+                           fixture.away_goals != goals_info['away'] or
+                           fixture.date != date or
+                           fixture.season != fixture_season)
+                fixture.date = date
+                fixture.season = fixture_season
                 fixture.status = fixture_info['status']['long']
                 fixture.home_goals = goals_info['home']
                 fixture.away_goals = goals_info['away']
+                
+                if changed and fixture.status == 'Match Finished':
+                    finished_fixtures.append(fixture)
         
         db.session.commit()
+        
+        # Atualizar o estado dos times e as classificações com os jogos que acabaram de ser finalizados
+        for store in (self.team_state, self.standings):
+            if store is not None and finished_fixtures:
+                for fixture in finished_fixtures:
+                    store.record(fixture)
+                store.save()
+        
         return fixtures_added
     
+    def _statistics_row(self, fixture, values, existing=None):
+        """Grava os valores de estatísticas de um jogo, criando o registro se necessário"""
+        stats = existing
+        if not stats:
+            stats = FixtureStatistics(fixture_id=fixture.id)
+            db.session.add(stats)
+        for column, value in values.items():
+            setattr(stats, column, value)
+        return stats
+    
     def sync_fixture_statistics(self, fixture_id):
         """Sincroniza as estatísticas de um jogo com o banco de dados"""
         fixture = Fixture.query.filter_by(api_id=fixture_id).first()
         if not fixture:
             return False
         
-        response = self.api.get_fixture_statistics(fixture_id)
+        response = self.api.get_fixture_statistics(fixture_id, finished=fixture.status == FINISHED_STATUS)
         if not response or 'response' not in response:
             return False
         
         # Verificar se já existem estatísticas para este jogo
         stats = FixtureStatistics.query.filter_by(fixture_id=fixture.id).first()
-        if not stats:
-            stats = FixtureStatistics(fixture_id=fixture.id)
-            db.session.add(stats)
-        
-        # Processar estatísticas do time da casa
-        home_stats = next((item for item in response['response'] if item['team']['id'] == fixture.home_team.api_id), None)
-        if home_stats and 'statistics' in home_stats:
-            for stat in home_stats['statistics']:
-                if stat['type'] == 'Ball Possession':
-                    stats.home_possession = float(stat['value'].replace('%', '')) if stat['value'] else None
-                elif stat['type'] == 'Total Shots':
-                    stats.home_shots = int(stat['value']) if stat['value'] else None
-                elif stat['type'] == 'Shots on Goal':
-                    stats.home_shots_on_target = int(stat['value']) if stat['value'] else None
-                elif stat['type'] == 'Corner Kicks':
-                    stats.home_corners = int(stat['value']) if stat['value'] else None
-                elif stat['type'] == 'Fouls':
-                    stats.home_fouls = int(stat['value']) if stat['value'] else None
-                elif stat['type'] == 'Yellow Cards':
-                    stats.home_yellow_cards = int(stat['value']) if stat['value'] else None
-                elif stat['type'] == 'Red Cards':
-                    stats.home_red_cards = int(stat['value']) if stat['value'] else None
-        
-        # Processar estatísticas do time visitante
-        away_stats = next((item for item in response['response'] if item['team']['id'] == fixture.away_team.api_id), None)
-        if away_stats and 'statistics' in away_stats:
-            for stat in away_stats['statistics']:
-                if stat['type'] == 'Ball Possession':
-                    stats.away_possession = float(stat['value'].replace('%', '')) if stat['value'] else None
-                elif stat['type'] == 'Total Shots':
-                    stats.away_shots = int(stat['value']) if stat['value'] else None
-                elif stat['type'] == 'Shots on Goal':
-                    stats.away_shots_on_target = int(stat['value']) if stat['value'] else None
-                elif stat['type'] == 'Corner Kicks':
-                    stats.away_corners = int(stat['value']) if stat['value'] else None
-                elif stat['type'] == 'Fouls':
-                    stats.away_fouls = int(stat['value']) if stat['value'] else None
-                elif stat['type'] == 'Yellow Cards':
-                    stats.away_yellow_cards = int(stat['value']) if stat['value'] else None
-                elif stat['type'] == 'Red Cards':
-                    stats.away_red_cards = int(stat['value']) if stat['value'] else None
+        self._statistics_row(fixture, _parse_statistics(response, fixture.home_team.api_id, fixture.away_team.api_id),
+                             stats)
         
         db.session.commit()
         return True
+    
+    def sync_statistics_for(self, fixture_ids, max_workers=STATISTICS_WORKERS, priority=BACKFILL):
+        """Sincroniza as estatísticas de vários jogos (ids da API) com requisições simultâneas
+        
+        As requisições são feitas em paralelo por max_workers threads, no ritmo
+        do agendador de cota; as respostas são processadas à medida que chegam e
+        todas as estatísticas são gravadas numa única transação. Retorna
+        {'synced': [ids], 'failed': {id: motivo}}.
+        """
+        fixture_ids = list(dict.fromkeys(fixture_ids))
+        fixtures = {
+            fixture.api_id: fixture
+            for fixture in Fixture.query.options(
+                joinedload(Fixture.home_team), joinedload(Fixture.away_team)
+            ).filter(Fixture.api_id.in_(fixture_ids))
+        } if fixture_ids else {}
+        existing = {}
+        for stats in FixtureStatistics.query.filter(
+                FixtureStatistics.fixture_id.in_([fixture.id for fixture in fixtures.values()])
+        ).order_by(FixtureStatistics.id):
+            existing.setdefault(stats.fixture_id, stats)
+        
+        synced = []
+        failed = {fixture_id: 'Jogo não encontrado' for fixture_id in fixture_ids if fixture_id not in fixtures}
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='statistics') as executor:
+            futures = {
+                executor.submit(self.api.get_fixture_statistics, fixture_id, priority=priority,
+                                finished=fixtures[fixture_id].status == FINISHED_STATUS): fixture_id
+                for fixture_id in fixture_ids if fixture_id in fixtures
+            }
+            for future in as_completed(futures):
+                fixture_id = futures[future]
+                fixture = fixtures[fixture_id]
+                try:
+                    response = future.result()
+                    if not response or 'response' not in response:
+                        failed[fixture_id] = 'Falha na requisição (ou cota esgotada)'
+                        continue
+                    if not response['response']:
+                        failed[fixture_id] = 'Estatísticas indisponíveis'
+                        continue
+                    values = _parse_statistics(response, fixture.home_team.api_id, fixture.away_team.api_id)
+                except Exception as e:
+                    failed[fixture_id] = f'Erro: {e}'
+                    continue
+                
+                existing[fixture.id] = self._statistics_row(fixture, values, existing.get(fixture.id))
+                synced.append(fixture_id)
+        
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erro ao gravar estatísticas: {e}")
+            failed.update({fixture_id: str(e) for fixture_id in synced})
+            synced = []
+        
+        if failed:
+            print(f"Estatísticas: {len(synced)} jogos sincronizados, {len(failed)} com falha")
+        return {'synced': synced, 'failed': failed}
+    
+    def sync_odds(self, league_id=None, season=None, fixture_id=None, bookmaker_id=None):
+        """Sincroniza as odds de uma liga ou de um jogo com o banco de dados
+        
+        Mantém a cotação mais recente de cada (jogo, casa, mercado, seleção),
+        acrescenta as mudanças de preço ao histórico de odds e atualiza o índice
+        de arbitragem (self.arbitrage.surebets()), de onde saem os jogos já
+        iniciados. Retorna o número de cotações inseridas ou atualizadas.
+        """
+        odds_updated = 0
+        page = 1
+        
+        while True:
+            response = self.api.get_odds(fixture_id=fixture_id, league_id=league_id, season=season,
+                                         bookmaker_id=bookmaker_id, page=page)
+            if not response or 'response' not in response:
+                if page == 1:
+                    return False
+                break
+            
+            # Jogos e cotações já existentes da página, com uma consulta cada
+            api_ids = [item['fixture']['id'] for item in response['response']]
+            fixtures = {fixture.api_id: fixture.id for fixture in Fixture.query.filter(Fixture.api_id.in_(api_ids))}
+            existing = {
+                (odds.fixture_id, odds.bookmaker_id, odds.market, odds.selection): odds
+                for odds in Odds.query.filter(Odds.fixture_id.in_(list(fixtures.values())))
+            }
+            
+            # Jogos fora do índice de arbitragem (ou com cotações salvas por outro processo
+            # depois da última carga) começam com as cotações já salvas
+            saved_at = {}
+            for odds in existing.values():
+                if odds.updated_at and (odds.fixture_id not in saved_at or odds.updated_at > saved_at[odds.fixture_id]):
+                    saved_at[odds.fixture_id] = odds.updated_at
+            untracked = {fixture for fixture in fixtures.values()
+                         if not self.arbitrage.is_current(fixture, saved_at.get(fixture))}
+            for fixture in untracked:
+                self.arbitrage.remove(fixture)
+            for odds in existing.values():
+                if odds.fixture_id in untracked:
+                    self.arbitrage.update(odds.fixture_id, SELECTION_INDEX[(odds.market, odds.selection)],
+                                          odds.bookmaker_id, odds.odd, odds.bookmaker_name)
+            
+            history = {}
+            
+            for item in response['response']:
+                fixture = fixtures.get(item['fixture']['id'])
+                if fixture is None:
+                    continue
+                
+                # Instante da cotação informado pela API (UTC), ou o momento da sincronização
+                updated_at = _parse_update(item.get('update'))
+                
+                for bookmaker in item.get('bookmakers', []):
+                    for bet in bookmaker.get('bets', []):
+                        selections = API_BETS.get(bet['name'])
+                        if not selections:
+                            continue
+                        
+                        for value in bet.get('values', []):
+                            market_selection = selections.get(str(value['value']))
+                            if not market_selection or not value.get('odd'):
+                                continue
+                            
+                            key = (fixture, bookmaker['id']) + market_selection
+                            odd = float(value['odd'])
+                            history.setdefault(fixture, []).append(
+                                (updated_at, SELECTION_INDEX[market_selection], bookmaker['id'], odd))
+                            self.arbitrage.update(fixture, SELECTION_INDEX[market_selection],
+                                                  bookmaker['id'], odd, bookmaker.get('name'))
+                            odds = existing.get(key)
+                            if odds is None:
+                                odds = Odds(
+                                    fixture_id=fixture,
+                                    bookmaker_id=bookmaker['id'],
+                                    bookmaker_name=bookmaker.get('name'),
+                                    market=market_selection[0],
+                                    selection=market_selection[1],
+                                    odd=odd
+                                )
+                                db.session.add(odds)
+                                existing[key] = odds
+                                odds_updated += 1
+                            elif odds.odd != odd:
+                                odds.odd = odd
+                                odds.updated_at = datetime.utcnow()
+                                odds_updated += 1
+            
+            # Pontos com o mesmo preço da última cotação são descartados pelo histórico
+            self.odds_history.append(history)
+            db.session.commit()
+            self.arbitrage.mark_current(fixtures.values(), datetime.utcnow())
+            
+            paging = response.get('paging') or {}
+            if page >= paging.get('total', 1):
+                break
+            page += 1
+        
+        # Jogos que já começaram saem do índice de arbitragem (as cotações pré-jogo não valem mais)
+        for started in started_fixtures(self.arbitrage.fixture_ids()):
+            self.arbitrage.remove(started)
+        
+        return odds_updated
@@ -5,6 +5,7 @@ import requests
 import sqlite3
 import os
 import json
+import hashlib
 import tensorflow as tf
 from tensorflow import keras
 from sklearn.preprocessing import StandardScaler
@@ -133,6 +134,21 @@ def init_db():
     )
     ''')
     
+    c.execute('''
+    CREATE TABLE IF NOT EXISTS odds (
+        id INTEGER PRIMARY KEY,
+        fixture_id INTEGER NOT NULL,
+        bookmaker_id INTEGER NOT NULL,
+        bookmaker_name TEXT,
+        market TEXT NOT NULL,
+        selection TEXT NOT NULL,
+        odd REAL NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (fixture_id, bookmaker_id, market, selection),
+        FOREIGN KEY (fixture_id) REFERENCES fixtures (id)
+    )
+    ''')
+    
     c.execute('''
     CREATE TABLE IF NOT EXISTS predictions (
         id INTEGER PRIMARY KEY,
@@ -142,11 +158,19 @@ def init_db():
         confidence REAL NOT NULL,
         is_value_bet INTEGER,
         odds REAL,
+        model_version TEXT,
+        input_hash TEXT,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY (fixture_id) REFERENCES fixtures (id)
     )
     ''')
     
+    # Colunas acrescentadas depois da criação da tabela (bancos já existentes)
+    columns = {row[1] for row in c.execute("PRAGMA table_info(predictions)")}
+    for column in ('model_version', 'input_hash'):
+        if column not in columns:
+            c.execute(f"ALTER TABLE predictions ADD COLUMN {column} TEXT")
+    
     # Inserir dados de exemplo para demonstração
     # Ligas
     sample_leagues = [
@@ -250,6 +274,8 @@ class BettingModel:
         )
         
         self.model = model
+        # Versão do modelo: hash dos pesos (muda a cada novo modelo)
+        self.version = hashlib.sha1(b''.join(w.tobytes() for w in model.get_weights())).hexdigest()[:12]
     
     def predict(self, fixture_data):
         """Gera previsões para um jogo específico"""
@@ -295,40 +321,27 @@ class BettingModel:
     
     def detect_value_bets(self, prediction, odds):
         """Detecta value bets comparando previsões com odds do mercado"""
-        value_bets = []
+        # Pares (mercado, seleção) cotados e previstos, avaliados de uma só vez
+        pairs = [(market, selection) for market in odds for selection in odds[market]
+                 if selection in prediction.get(market, {})]
+        if not pairs:
+            return []
         
-        # Converter probabilidades para odds implícitas
-        implied_odds = {
-            '1X2': {
-                'Home': 1 / prediction['1X2']['Home'] if prediction['1X2']['Home'] > 0 else float('inf'),
-                'Draw': 1 / prediction['1X2']['Draw'] if prediction['1X2']['Draw'] > 0 else float('inf'),
-                'Away': 1 / prediction['1X2']['Away'] if prediction['1X2']['Away'] > 0 else float('inf')
-            },
-            'BTTS': {
-                'Yes': 1 / prediction['BTTS']['Yes'] if prediction['BTTS']['Yes'] > 0 else float('inf'),
-                'No': 1 / prediction['BTTS']['No'] if prediction['BTTS']['No'] > 0 else float('inf')
-            },
-            'Over/Under 2.5': {
-                'Over': 1 / prediction['Over/Under 2.5']['Over'] if prediction['Over/Under 2.5']['Over'] > 0 else float('inf'),
-                'Under': 1 / prediction['Over/Under 2.5']['Under'] if prediction['Over/Under 2.5']['Under'] > 0 else float('inf')
-            }
-        }
+        probabilities = np.array([prediction[market][selection] for market, selection in pairs], dtype=float)
+        market_odds = np.array([odds[market][selection] for market, selection in pairs], dtype=float)
         
-        # Comparar com odds do mercado
-        for market in odds:
-            for selection, market_odds in odds[market].items():
-                if market in implied_odds and selection in implied_odds[market]:
-                    implied = implied_odds[market][selection]
-                    if market_odds > implied * 1.1:  # 10% de margem para value bet
-                        value_bets.append({
-                            'market': market,
-                            'selection': selection,
-                            'implied_odds': implied,
-                            'market_odds': market_odds,
-                            'value': (market_odds / implied - 1) * 100  # Valor em percentual
-                        })
+        # Value bet: odd do mercado acima da odd implícita com 10% de margem
+        with np.errstate(divide='ignore'):
+            implied = np.where(probabilities > 0, 1 / probabilities, np.inf)
+        is_value = market_odds > implied * 1.1
         
-        return value_bets
+        return [{
+            'market': pairs[i][0],
+            'selection': pairs[i][1],
+            'implied_odds': float(implied[i]),
+            'market_odds': float(market_odds[i]),
+            'value': float((market_odds[i] / implied[i] - 1) * 100)  # Valor em percentual
+        } for i in np.flatnonzero(is_value)]
 
 # Funções para interagir com o banco de dados
 def get_leagues():
@@ -371,26 +384,52 @@ def get_fixture_by_id(fixture_id):
         return fixture.iloc[0]
     return None
 
-def save_prediction(fixture_id, predictions, value_bets):
+# Odds de demonstração, usadas apenas para jogos sem odds sincronizadas
+DEMO_ODDS = {
+    '1X2': {
+        'Home': 2.0,
+        'Draw': 3.5,
+        'Away': 3.8
+    },
+    'BTTS': {
+        'Yes': 1.9,
+        'No': 1.9
+    },
+    'Over/Under 2.5': {
+        'Over': 1.85,
+        'Under': 1.95
+    }
+}
+
+def get_latest_odds(fixture_ids):
+    """Retorna a melhor odd atual de cada seleção para vários jogos (uma única consulta)"""
+    if not fixture_ids:
+        return {}
+    conn = sqlite3.connect('database.db')
+    placeholders = ', '.join('?' for _ in fixture_ids)
+    rows = conn.execute(f"""
+    SELECT fixture_id, market, selection, MAX(odd) FROM odds
+    WHERE fixture_id IN ({placeholders})
+    GROUP BY fixture_id, market, selection
+    """, [int(fixture_id) for fixture_id in fixture_ids]).fetchall()
+    conn.close()
+    
+    odds = {}
+    for fixture_id, market, selection, odd in rows:
+        odds.setdefault(fixture_id, {}).setdefault(market, {})[selection] = odd
+    return odds
+
+def prediction_input_hash(fixture_data, market_odds):
+    """Hash das entradas de uma análise (dados do jogo e odds usadas)"""
+    payload = json.dumps({'fixture': fixture_data.to_dict(), 'odds': market_odds}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+def save_prediction(fixture_id, predictions, value_bets, market_odds, model_version=None, input_hash=None):
     conn = sqlite3.connect('database.db')
     c = conn.cursor()
     
-    # Simular odds do mercado
-    market_odds = {
-        '1X2': {
-            'Home': 2.0,
-            'Draw': 3.5,
-            'Away': 3.8
-        },
-        'BTTS': {
-            'Yes': 1.9,
-            'No': 1.9
-        },
-        'Over/Under 2.5': {
-            'Over': 1.85,
-            'Under': 1.95
-        }
-    }
+    # A nova análise substitui a anterior do jogo
+    c.execute("DELETE FROM predictions WHERE fixture_id = ?", (fixture_id,))
     
     # Salvar previsões
     for market, values in predictions.items():
@@ -402,13 +441,31 @@ def save_prediction(fixture_id, predictions, value_bets):
             odds = market_odds.get(market, {}).get(selection, None)
             
             c.execute("""
-            INSERT INTO predictions (fixture_id, prediction_type, prediction_value, confidence, is_value_bet, odds)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """, (fixture_id, market, selection, confidence, 1 if is_value else 0, odds))
+            INSERT INTO predictions (fixture_id, prediction_type, prediction_value, confidence, is_value_bet, odds,
+                                     model_version, input_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (fixture_id, market, selection, confidence, 1 if is_value else 0, odds, model_version, input_hash))
     
     conn.commit()
     conn.close()
 
+def get_analyzed_fixture_ids(fixture_ids, model_version):
+    """Retorna os pares (jogo, hash das entradas) já analisados por esta versão do modelo (uma única consulta)
+
+    Um jogo volta a ser analisado quando o modelo ou as entradas (dados do
+    jogo, odds) mudam.
+    """
+    if not fixture_ids:
+        return set()
+    conn = sqlite3.connect('database.db')
+    placeholders = ', '.join('?' for _ in fixture_ids)
+    rows = conn.execute(f"""
+    SELECT DISTINCT fixture_id, input_hash FROM predictions
+    WHERE model_version = ? AND fixture_id IN ({placeholders})
+    """, [model_version] + [int(fixture_id) for fixture_id in fixture_ids]).fetchall()
+    conn.close()
+    return set(rows)
+
 def get_predictions_by_fixture(fixture_id):
     conn = sqlite3.connect('database.db')
     query = """
@@ -600,35 +657,31 @@ elif page == "Selecionar Competição":
             if st.session_state.selected_fixtures:
                 st.markdown(f"**{len(st.session_state.selected_fixtures)} jogos selecionados**")
                 if st.button("Analisar Jogos Selecionados"):
+                    # Jogos já analisados pelo mesmo modelo, com as mesmas entradas, não são reprocessados
+                    analyzed = get_analyzed_fixture_ids(st.session_state.selected_fixtures, betting_model.version)
+                    
+                    # Odds atuais de todos os jogos selecionados
+                    latest_odds = get_latest_odds(st.session_state.selected_fixtures)
+                    
                     # Simular análise para cada jogo
                     for fixture_id in st.session_state.selected_fixtures:
                         fixture_data = get_fixture_by_id(fixture_id)
                         if fixture_data is not None:
+                            # Odds sincronizadas (ou de demonstração, se o jogo ainda não tiver odds)
+                            market_odds = latest_odds.get(fixture_id, DEMO_ODDS)
+                            input_hash = prediction_input_hash(fixture_data, market_odds)
+                            if (fixture_id, input_hash) in analyzed:
+                                continue
+                            
                             # Gerar previsão
                             prediction = betting_model.predict(fixture_data)
                             
-                            # Simular odds do mercado
-                            market_odds = {
-                                '1X2': {
-                                    'Home': 2.0,
-                                    'Draw': 3.5,
-                                    'Away': 3.8
-                                },
-                                'BTTS': {
-                                    'Yes': 1.9,
-                                    'No': 1.9
-                                },
-                                'Over/Under 2.5': {
-                                    'Over': 1.85,
-                                    'Under': 1.95
-                                }
-                            }
-                            
                             # Detectar value bets
                             value_bets = betting_model.detect_value_bets(prediction, market_odds)
                             
                             # Salvar previsão
-                            save_prediction(fixture_id, prediction, value_bets)
+                            save_prediction(fixture_id, prediction, value_bets, market_odds,
+                                            betting_model.version, input_hash)
                     
                     # Redirecionar para página de análises
                     st.session_state.page = "Análises"
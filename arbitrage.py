@@ -0,0 +1,227 @@
+import threading
+import numpy as np
+from src.models.markets import SELECTIONS, MARKETS, MARKET_COLUMNS
+
+# Mercado de cada coluna de SELECTIONS
+COLUMN_MARKET = [market for market, _ in SELECTIONS]
+
+
+def stake_split(odds, total_stake=100.0):
+    """Divide total_stake entre as seleções de um mercado para que o retorno seja igual em qualquer resultado
+
+    A seleção i recebe total_stake * (1 / odd_i) / soma(1 / odd). Retorna
+    (stakes, retorno garantido); o último eixo de odds são as seleções.
+    """
+    inverse = 1 / np.asarray(odds, dtype=float)
+    overround = inverse.sum(axis=-1, keepdims=True)
+    return total_stake * inverse / overround, total_stake / overround[..., 0]
+
+
+def _surebet(fixture_id, market, odds, bookmakers, total_stake):
+    """Monta o dicionário de uma surebet a partir das melhores odds do mercado"""
+    stakes, payout = stake_split(odds, total_stake)
+    return {
+        'fixture_id': fixture_id,
+        'market': market,
+        'profit': float((payout / total_stake - 1) * 100),
+        'total_stake': float(total_stake),
+        'payout': float(payout),
+        'selections': [
+            {
+                'selection': SELECTIONS[column][1],
+                'bookmaker': bookmaker,
+                'odds': float(odd),
+                'stake': float(stake)
+            }
+            for column, odd, bookmaker, stake in zip(MARKET_COLUMNS[market], odds, bookmakers, stakes)
+        ]
+    }
+
+
+def find_surebets(odds, fixture_ids, bookmakers, total_stake=100.0):
+    """Procura surebets em todos os jogos e mercados de uma vez
+
+    odds tem forma (jogos, seleções, casas), como em latest_odds. Um mercado é
+    surebet quando todas as seleções têm cotação e a soma dos inversos das
+    melhores odds entre as casas é menor que 1.
+    """
+    odds = np.asarray(odds, dtype=float)
+    if not odds.size:
+        return []
+
+    priced = ~np.isnan(odds)
+    best_bookmaker = np.where(priced, odds, -np.inf).argmax(axis=2)
+    best = np.take_along_axis(odds, best_bookmaker[:, :, None], axis=2)[:, :, 0]
+
+    surebets = []
+    for market in MARKETS:
+        columns = MARKET_COLUMNS[market]
+        overround = (1 / best[:, columns]).sum(axis=1)
+        for row in np.flatnonzero(overround < 1):
+            surebets.append(_surebet(
+                fixture_ids[row], market, best[row, columns],
+                [bookmakers[b] for b in best_bookmaker[row, columns]], total_stake))
+    return surebets
+
+
+class ArbitrageScanner:
+    """Índice incremental das melhores odds por seleção, para detectar surebets a cada cotação
+
+    Para cada jogo guarda a melhor odd de cada seleção e a casa que a oferece.
+    Uma nova cotação só afeta a sua seleção: se supera a melhor odd, basta
+    trocá-la; só quando a própria melhor odd cai (ou é retirada) o máximo é
+    recalculado, entre as casas daquela seleção. Em seguida apenas o mercado
+    da seleção (2 ou 3 odds) é reavaliado, então o custo por atualização não
+    depende do número de jogos nem de mercados acompanhados. As casas são
+    identificadas pelo id da API; o nome serve apenas para exibição.
+
+    Cada jogo guarda também o instante (UTC) até o qual o índice reflete as
+    cotações salvas no banco (as_of), para que outros processos saibam quando
+    recarregá-lo.
+    """
+
+    def __init__(self, total_stake=100.0):
+        self.total_stake = total_stake
+        self._prices = {}          # (jogo, coluna) -> {casa: odd}
+        self._best = {}            # jogo -> melhores odds (7,), NaN sem cotação
+        self._best_bookmaker = {}  # jogo -> casa da melhor odd de cada seleção
+        self._surebets = {}        # (jogo, mercado) -> surebet
+        self._names = {}
+        self._as_of = {}           # jogo -> instante das cotações refletidas no índice
+        self._lock = threading.Lock()
+
+    def __contains__(self, fixture_id):
+        return fixture_id in self._best
+
+    def fixture_ids(self):
+        """Jogos acompanhados pelo índice"""
+        with self._lock:
+            return list(self._best)
+
+    def update(self, fixture_id, column, bookmaker, odd, name=None):
+        """Registra a cotação de uma casa (odd None ou NaN retira a cotação)
+
+        bookmaker é o id da casa. Retorna a surebet do mercado da seleção após a
+        atualização, ou None.
+        """
+        with self._lock:
+            return self._update(fixture_id, column, bookmaker, odd, name)
+
+    def _update(self, fixture_id, column, bookmaker, odd, name=None):
+        if name:
+            self._names[bookmaker] = name
+        market = COLUMN_MARKET[column]
+        prices = self._prices.setdefault((fixture_id, column), {})
+        if odd is None or np.isnan(odd):
+            if prices.pop(bookmaker, None) is None:
+                return self._surebets.get((fixture_id, market))
+        elif prices.get(bookmaker) == odd:
+            return self._surebets.get((fixture_id, market))
+        else:
+            prices[bookmaker] = odd
+
+        if fixture_id not in self._best:
+            self._best[fixture_id] = np.full(len(SELECTIONS), np.nan)
+            self._best_bookmaker[fixture_id] = [None] * len(SELECTIONS)
+        best = self._best[fixture_id]
+        best_bookmaker = self._best_bookmaker[fixture_id]
+
+        if bookmaker in prices and not best[column] >= prices[bookmaker]:
+            best[column] = prices[bookmaker]
+            best_bookmaker[column] = bookmaker
+        elif best_bookmaker[column] == bookmaker:
+            # A melhor odd caiu ou foi retirada: recalcula entre as casas da seleção
+            if prices:
+                best_bookmaker[column] = max(prices, key=prices.get)
+                best[column] = prices[best_bookmaker[column]]
+            else:
+                best_bookmaker[column] = None
+                best[column] = np.nan
+        else:
+            return self._surebets.get((fixture_id, market))
+
+        return self._check(fixture_id, market)
+
+    def _check(self, fixture_id, market):
+        """Reavalia um mercado de um jogo com as melhores odds atuais"""
+        columns = MARKET_COLUMNS[market]
+        odds = self._best[fixture_id][columns]
+        if np.isnan(odds).any() or (1 / odds).sum() >= 1:
+            self._surebets.pop((fixture_id, market), None)
+            return None
+
+        bookmakers = [self._names.get(b, b) for b in (self._best_bookmaker[fixture_id][c] for c in columns)]
+        surebet = _surebet(fixture_id, market, odds, bookmakers, self.total_stake)
+        self._surebets[(fixture_id, market)] = surebet
+        return surebet
+
+    def load(self, odds, fixture_ids, bookmaker_ids, names=None, as_of=None):
+        """Carrega no índice uma matriz (jogos, seleções, casas) de latest_odds(..., with_ids=True)
+
+        O estado anterior desses jogos é substituído. bookmaker_ids identificam
+        as casas (como em update); names são os nomes para exibição, na mesma
+        ordem; as_of é o instante em que as cotações foram lidas.
+        """
+        with self._lock:
+            for fixture_id in fixture_ids:
+                self._remove(fixture_id)
+            for row, column, b in zip(*np.nonzero(~np.isnan(odds))):
+                self._update(fixture_ids[row], int(column), bookmaker_ids[b], float(odds[row, column, b]),
+                             names[b] if names else None)
+            if as_of is not None:
+                for fixture_id in fixture_ids:
+                    if fixture_id in self._best:
+                        self._as_of[fixture_id] = as_of
+
+    def mark_current(self, fixture_ids, as_of):
+        """Registra que o índice reflete as cotações salvas até as_of (após uma sincronização)"""
+        with self._lock:
+            for fixture_id in fixture_ids:
+                if fixture_id in self._best:
+                    self._as_of[fixture_id] = as_of
+
+    def as_of(self, fixture_id):
+        """Instante das cotações refletidas no índice para o jogo (ou None)"""
+        with self._lock:
+            return self._as_of.get(fixture_id)
+
+    def is_current(self, fixture_id, updated_at):
+        """Verifica se o índice acompanha o jogo e já reflete as cotações salvas até updated_at"""
+        with self._lock:
+            as_of = self._as_of.get(fixture_id)
+        return fixture_id in self and as_of is not None and (updated_at is None or updated_at <= as_of)
+
+    def remove(self, fixture_id):
+        """Deixa de acompanhar um jogo (por exemplo, após o início da partida)"""
+        with self._lock:
+            self._remove(fixture_id)
+
+    def _remove(self, fixture_id):
+        self._best.pop(fixture_id, None)
+        self._best_bookmaker.pop(fixture_id, None)
+        self._as_of.pop(fixture_id, None)
+        for column in range(len(SELECTIONS)):
+            self._prices.pop((fixture_id, column), None)
+        for market in MARKETS:
+            self._surebets.pop((fixture_id, market), None)
+
+    def surebets(self, fixture_ids=None, total_stake=None):
+        """Surebets atuais (dos jogos informados), da mais lucrativa para a menos
+
+        Com total_stake, as apostas são redistribuídas para esse valor total.
+        """
+        with self._lock:
+            if fixture_ids is None:
+                selected = list(self._surebets.values())
+            else:
+                fixture_ids = set(fixture_ids)
+                selected = [surebet for (fixture_id, _), surebet in self._surebets.items() if fixture_id in fixture_ids]
+
+        if total_stake is not None and total_stake != self.total_stake:
+            selected = [
+                _surebet(surebet['fixture_id'], surebet['market'],
+                         np.array([selection['odds'] for selection in surebet['selections']]),
+                         [selection['bookmaker'] for selection in surebet['selections']], total_stake)
+                for surebet in selected
+            ]
+        return sorted(selected, key=lambda surebet: surebet['profit'], reverse=True)
@@ -0,0 +1,165 @@
+import numpy as np
+from src.models.markets import MARKETS, MARKET_COLUMNS, selection_probabilities, selection_outcomes
+from src.models.staking import kelly_fractions, allocate
+
+DAY_NS = np.timedelta64(1, 'D').astype('timedelta64[ns]').astype(np.int64)
+
+
+def walk_forward_predictions(dates, X, y, fit_predict, step_days=30, min_train=100, train_days=None):
+    """Gera previsões fora da amostra repetindo o histórico em ordem cronológica
+
+    A cada janela de step_days, o modelo é treinado apenas com jogos anteriores
+    ao início da janela (todos, ou os últimos train_days dias) e pontua todos
+    os jogos da janela de uma só vez. fit_predict(X_train, y_train) deve
+    retornar uma função que recebe X e devolve as 5 saídas da rede (ou None,
+    se o treinamento falhar).
+
+    Retorna a matriz de probabilidades (n, 7), com NaN nos jogos sem previsão.
+    """
+    dates = np.asarray(dates, dtype=np.int64)
+    order = np.argsort(dates, kind='stable')
+    sorted_dates = dates[order]
+    probabilities = np.full((len(dates), 7), np.nan)
+
+    if len(dates) <= min_train:
+        return probabilities
+
+    window_start = sorted_dates[min_train]
+    step = step_days * DAY_NS
+    while window_start <= sorted_dates[-1]:
+        window_end = window_start + step
+        train_begin = 0 if train_days is None else np.searchsorted(sorted_dates, window_start - train_days * DAY_NS)
+        train_end = np.searchsorted(sorted_dates, window_start, side='left')
+        test_end = np.searchsorted(sorted_dates, window_end, side='left')
+
+        train_rows = order[train_begin:train_end]
+        test_rows = order[train_end:test_end]
+        if len(test_rows) and len(train_rows) >= min_train:
+            predict = fit_predict(X[train_rows], y[train_rows])
+        else:
+            predict = None
+        if predict is not None:
+            probabilities[test_rows] = selection_probabilities(predict(X[test_rows]))
+        window_start = window_end
+
+    return probabilities
+
+
+def betting_model_factory(config=None, epochs=20):
+    """Cria um fit_predict que treina um BettingModel a cada janela do walk-forward"""
+    def fit_predict(X, y):
+        from src.models.ai_model import BettingModel
+
+        model = BettingModel(config=config)
+        if not model.fit(np.asarray(X), np.asarray(y), epochs=epochs, verbose=0):
+            return None
+        return lambda X_test: model.model.predict(model.scaler.transform(np.asarray(X_test)), verbose=0)
+    return fit_predict
+
+
+def _stakes(probabilities, odds, is_bet, dates, staking, kelly_fraction, bankroll, limits):
+    """Calcula o valor apostado em cada seleção e margem: 1 unidade (flat) ou fração de Kelly da banca inicial
+
+    Com limits (argumentos de staking.allocate), as apostas Kelly de cada margem
+    respeitam os limites por aposta, por jogo e por rodada (jogos do mesmo dia).
+    """
+    if staking != 'kelly':
+        return is_bet.astype(float)
+
+    fractions = np.where(is_bet, kelly_fractions(probabilities, odds, kelly_fraction)[None], 0)
+    if limits is not None and fractions.size:
+        n_margins, n_fixtures, _ = is_bet.shape
+        _, slate = np.unique(dates // DAY_NS, return_inverse=True)
+        fixtures = np.arange(n_margins * n_fixtures).reshape(n_margins, n_fixtures, 1)
+        slates = (np.arange(n_margins)[:, None] * (slate.max() + 1) + slate[None])[:, :, None]
+        fractions = allocate(
+            fractions.ravel(),
+            np.broadcast_to(fixtures, is_bet.shape).ravel(),
+            np.broadcast_to(slates, is_bet.shape).ravel(),
+            **limits
+        ).reshape(is_bet.shape)
+    return fractions * bankroll
+
+
+def _max_drawdown(profits):
+    """Maior queda acumulada a partir de um pico, por coluna (linhas em ordem cronológica)"""
+    cumulative = np.cumsum(profits, axis=0)
+    peaks = np.maximum.accumulate(np.maximum(cumulative, 0), axis=0)
+    return (peaks - cumulative).max(axis=0) if len(profits) else np.zeros(profits.shape[1:])
+
+
+def sweep_margins(probabilities, odds, outcomes, dates, margins, staking='flat',
+                  kelly_fraction=0.25, bankroll=100.0, limits=None):
+    """Avalia a regra de value bet para vários valores de margem de uma só vez
+
+    Uma seleção é apostada quando odd > odd implícita * (1 + margem), isto é,
+    quando probabilidade * odd > 1 + margem. Retorna, para cada margem e
+    mercado, número de apostas, valor apostado, lucro, retorno sobre a banca
+    inicial (bankroll_return), yield (ROI sobre o valor apostado), drawdown
+    máximo e taxa de acerto.
+    """
+    margins = np.atleast_1d(np.asarray(margins, dtype=float))
+    dates = np.asarray(dates, dtype=np.int64)
+    order = np.argsort(dates, kind='stable')
+    dates = dates[order]
+    probabilities = np.asarray(probabilities, dtype=float)[order]
+    odds = np.asarray(odds, dtype=float)[order]
+    outcomes = np.asarray(outcomes, dtype=bool)[order]
+
+    valid = ~np.isnan(probabilities) & ~np.isnan(odds)
+    with np.errstate(invalid='ignore'):
+        expected = np.where(valid, probabilities * odds, 0)
+
+    # (margens, jogos, seleções)
+    is_bet = expected[None] > 1 + margins[:, None, None]
+    stakes = _stakes(probabilities, odds, is_bet, dates, staking, kelly_fraction, bankroll, limits)
+    returns = np.where(outcomes, np.nan_to_num(odds) - 1, -1)
+    profits = stakes * returns[None]
+    wins = is_bet & outcomes[None]
+
+    report = []
+    for m, margin in enumerate(margins):
+        by_market = {}
+        for market in MARKETS + ['Total']:
+            columns = MARKET_COLUMNS.get(market, slice(None))
+            n_bets = int(is_bet[m][:, columns].sum())
+            staked = float(stakes[m][:, columns].sum())
+            profit_series = profits[m][:, columns].sum(axis=1)
+            profit = float(profit_series.sum())
+            by_market[market] = {
+                'bets': n_bets,
+                'staked': staked,
+                'profit': profit,
+                'bankroll_return': profit / bankroll * 100,
+                'yield': profit / staked * 100 if staked else 0.0,
+                'max_drawdown': float(_max_drawdown(profit_series[:, None])[0]),
+                'hit_rate': float(wins[m][:, columns].sum()) / n_bets if n_bets else 0.0
+            }
+        report.append({'margin': float(margin), 'markets': by_market})
+    return report
+
+
+def run_backtest(dates, X, y, odds, fit_predict, margin=0.1, step_days=30, min_train=100,
+                 train_days=None, staking='flat', kelly_fraction=0.25, bankroll=100.0, margins=None,
+                 limits=None):
+    """Executa o backtest walk-forward completo da estratégia de value bets
+
+    Retorna o relatório da margem principal e, se margins for informado, a
+    varredura de margens reaproveitando as mesmas previsões.
+    """
+    probabilities = walk_forward_predictions(dates, X, y, fit_predict, step_days=step_days,
+                                             min_train=min_train, train_days=train_days)
+    outcomes = selection_outcomes(y)
+    scored = ~np.isnan(probabilities).any(axis=1)
+
+    args = (probabilities[scored], np.asarray(odds)[scored], outcomes[scored], np.asarray(dates)[scored])
+    result = {
+        'fixtures': int(len(dates)),
+        'scored_fixtures': int(scored.sum()),
+        'report': sweep_margins(*args, [margin], staking=staking,
+                                kelly_fraction=kelly_fraction, bankroll=bankroll, limits=limits)[0]
+    }
+    if margins is not None:
+        result['sweep'] = sweep_margins(*args, margins, staking=staking,
+                                        kelly_fraction=kelly_fraction, bankroll=bankroll, limits=limits)
+    return result
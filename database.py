@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
 import os
 
 db = SQLAlchemy()
@@ -14,3 +15,9 @@ def init_db(app):
     # Cria todas as tabelas se não existirem
     with app.app_context():
         db.create_all()
+        
+        # Colunas acrescentadas depois da criação das tabelas (bancos já existentes)
+        columns = {column['name'] for column in inspect(db.engine).get_columns('fixture')}
+        if 'season' not in columns:
+            db.session.execute(text('ALTER TABLE fixture ADD COLUMN season INTEGER'))
+            db.session.commit()
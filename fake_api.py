@@ -0,0 +1,76 @@
+import copy
+import json
+import os
+from src.models.api_client import FootballAPI
+
+
+class FakeFootballAPI(FootballAPI):
+    """API-Football local, com respostas registradas em memória ou lidas de arquivos JSON
+
+    Usada nos testes e no desenvolvimento sem chave da API. As respostas são
+    procuradas pelo endpoint e pelos parâmetros da requisição; todas as chamadas
+    que chegariam à API (isto é, não atendidas pelo cache) ficam registradas
+    em calls.
+    """
+
+    def __init__(self, directory=None, **kwargs):
+        super().__init__(api_key='fake', **kwargs)
+        self.directory = directory
+        self.responses = {}
+        self.calls = []
+
+    @staticmethod
+    def _key(endpoint, params):
+        return endpoint, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+
+    def register(self, endpoint, params, response):
+        """Registra a resposta de um endpoint para os parâmetros informados"""
+        self.responses[self._key(endpoint, params)] = response
+
+    def _fetch(self, endpoint, params=None, priority=None):
+        """Retorna a resposta registrada (ou None, como numa falha da API real)"""
+        self.calls.append((endpoint, dict(params or {})))
+        key = self._key(endpoint, params)
+        if key in self.responses:
+            return copy.deepcopy(self.responses[key])
+
+        # Arquivo <endpoint com / trocado por _>.json com uma lista de {params, response}
+        if self.directory:
+            path = os.path.join(self.directory, endpoint.replace('/', '_') + '.json')
+            if os.path.exists(path):
+                with open(path) as f:
+                    for entry in json.load(f):
+                        if self._key(endpoint, entry.get('params')) == key:
+                            return entry['response']
+        return None
+
+    def add_odds(self, fixture_api_id, bookmaker_id, bookmaker_name, odds, league_id=None, season=None, update=None):
+        """Adiciona as odds de uma casa para um jogo, no formato do endpoint 'odds'
+
+        odds é um dicionário {nome da aposta: {valor: odd}}, por exemplo
+        {'Match Winner': {'Home': 2.1, 'Draw': 3.3, 'Away': 3.6}}. As odds ficam
+        disponíveis tanto na consulta por jogo quanto na consulta por liga;
+        update é o instante da cotação (ISO 8601), como no campo da API.
+        """
+        bookmaker = {
+            'id': bookmaker_id,
+            'name': bookmaker_name,
+            'bets': [{'id': i + 1, 'name': name, 'values': [{'value': value, 'odd': str(odd)}
+                                                           for value, odd in values.items()]}
+                     for i, (name, values) in enumerate(odds.items())]
+        }
+
+        queries = [{'page': 1, 'fixture': fixture_api_id}]
+        if league_id:
+            queries.append({'page': 1, 'league': league_id, 'season': season})
+
+        for params in queries:
+            key = self._key('odds', params)
+            response = self.responses.setdefault(key, {'response': [], 'paging': {'current': 1, 'total': 1}})
+            item = next((item for item in response['response'] if item['fixture']['id'] == fixture_api_id), None)
+            if item is None:
+                item = {'fixture': {'id': fixture_api_id}, 'bookmakers': []}
+                response['response'].append(item)
+            item['bookmakers'] = [b for b in item['bookmakers'] if b['id'] != bookmaker_id] + [bookmaker]
+            if update:
+                item['update'] = update
@@ -0,0 +1,212 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+from src.models.feature_engine import FIXTURE_COLUMNS, STAT_COLUMNS
+
+# Incrementar quando a forma de calcular as características mudar
+FEATURE_SCHEMA_VERSION = 3
+
+# Colunas que, se alteradas, mudam o histórico (forma e classificação) dos times
+HISTORY_COLUMNS = ['league_id', 'season', 'home_team_id', 'away_team_id', 'date', 'home_goals', 'away_goals']
+
+ROW_ARRAYS = ['ids', 'dates', 'fingerprints', 'X', 'y']
+HISTORY_ARRAYS = ['history_ids', 'history_dates', 'history_fingerprints']
+
+
+def schema_hash(features):
+    """Calcula o hash do esquema de características"""
+    payload = json.dumps({'features': list(features), 'version': FEATURE_SCHEMA_VERSION})
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _fingerprints(frame, columns):
+    """Calcula um hash por linha das colunas informadas"""
+    if frame.empty:
+        return np.empty(0, dtype=np.uint64)
+    return pd.util.hash_pandas_object(frame[columns], index=False).to_numpy(dtype=np.uint64)
+
+
+class FeatureCache:
+    """Cache em disco da matriz de características, com uma linha por jogo
+
+    Os arrays ficam em arquivos .npy ao lado do modelo e são lidos com memory
+    mapping. Apenas jogos novos ou alterados (e os que dependem deles na forma
+    recente ou na classificação) são recalculados a cada atualização.
+
+    Cada atualização grava uma geração completa num diretório novo e só então
+    aponta o meta.json para ela (troca atômica). Uma falha no meio da gravação
+    deixa o cache na geração anterior, nunca com arrays de gerações misturadas.
+    """
+
+    def __init__(self, directory, features):
+        self.directory = directory
+        self.schema = schema_hash(features)
+        os.makedirs(directory, exist_ok=True)
+
+    def _generation_dir(self, generation):
+        return os.path.join(self.directory, f'generation_{generation}')
+
+    def _path(self, name, generation):
+        return os.path.join(self._generation_dir(generation), f'{name}.npy')
+
+    def _meta_path(self):
+        return os.path.join(self.directory, 'meta.json')
+
+    def _read_meta(self):
+        try:
+            with open(self._meta_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _current(self):
+        """Retorna o meta.json da geração em uso, se for do esquema atual, ou None"""
+        meta = self._read_meta()
+        if not meta or meta.get('schema') != self.schema or 'generation' not in meta:
+            return None
+        if not os.path.isdir(self._generation_dir(meta['generation'])):
+            return None
+        return meta
+
+    def is_valid(self):
+        """Verifica se o cache existe e foi gerado com o esquema atual"""
+        return self._current() is not None
+
+    def _load_arrays(self, names):
+        meta = self._current()
+        if meta is None:
+            return None
+        try:
+            arrays = {name: np.load(self._path(name, meta['generation']), mmap_mode='r') for name in names}
+        except (OSError, ValueError) as e:
+            print(f"Cache de características ilegível: {e}")
+            return None
+        # Arrays por jogo devem ter exatamente as linhas registradas no meta.json
+        if any(len(arrays[name]) != meta.get('rows') for name in names if name in ROW_ARRAYS):
+            print("Cache de características inconsistente; será recalculado")
+            return None
+        return arrays
+
+    def load(self):
+        """Retorna (ids, X, y) mapeados em memória, sem cópia"""
+        arrays = self._load_arrays(['ids', 'X', 'y'])
+        if arrays is None:
+            return None
+        return arrays['ids'], arrays['X'], arrays['y']
+
+    def load_dates(self):
+        """Retorna as datas (int64, ns) de cada linha, alinhadas com load()"""
+        arrays = self._load_arrays(['dates'])
+        return None if arrays is None else arrays['dates']
+
+    def _save_generation(self, arrays):
+        """Grava os arrays numa geração nova e aponta o meta.json para ela
+
+        A geração anterior é mantida (leitores podem ainda estar com ela
+        mapeada em memória); as mais antigas são removidas.
+        """
+        meta = self._read_meta() or {}
+        previous = meta.get('generation')
+        generation = previous + 1 if isinstance(previous, int) else 0
+
+        final_dir = self._generation_dir(generation)
+        tmp_dir = f'{final_dir}.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        shutil.rmtree(final_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name, values in arrays.items():
+            np.save(os.path.join(tmp_dir, f'{name}.npy'), np.ascontiguousarray(values))
+        os.replace(tmp_dir, final_dir)
+
+        tmp_path = f'{self._meta_path()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'schema': self.schema, 'rows': int(len(arrays['ids'])),
+                       'generation': generation}, f)
+        os.replace(tmp_path, self._meta_path())
+
+        keep = {self._generation_dir(generation)}
+        if isinstance(previous, int):
+            keep.add(self._generation_dir(previous))
+        for entry in os.listdir(self.directory):
+            path = os.path.join(self.directory, entry)
+            if entry.startswith('generation_') and path not in keep:
+                shutil.rmtree(path, ignore_errors=True)
+        # Arquivos do formato antigo (arrays soltos no diretório)
+        for name in ROW_ARRAYS + HISTORY_ARRAYS:
+            legacy = os.path.join(self.directory, f'{name}.npy')
+            if os.path.exists(legacy):
+                os.remove(legacy)
+
+    def update(self, engine):
+        """Atualiza o cache com os jogos novos ou alterados do motor de características
+
+        Retorna o número de linhas recalculadas.
+        """
+        history = engine.finished_fixtures()
+        history_ids = history['id'].to_numpy(dtype=np.int64)
+        history_dates = history['date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        history_fps = _fingerprints(history, HISTORY_COLUMNS)
+
+        trainable = engine.trainable_fixtures()
+        rows = trainable[FIXTURE_COLUMNS].merge(engine.statistics, left_on='id',
+                                                right_on='fixture_id', how='left')
+        row_ids = rows['id'].to_numpy(dtype=np.int64)
+        row_dates = rows['date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        row_fps = _fingerprints(rows, FIXTURE_COLUMNS + STAT_COLUMNS)
+
+        cached = self._load_arrays(ROW_ARRAYS + HISTORY_ARRAYS)
+
+        if cached is None:
+            dirty = np.ones(len(row_ids), dtype=bool)
+            history_changed = True
+        else:
+            # Mudanças no histórico afetam a forma de todos os jogos a partir da data alterada
+            old_history_ids = np.asarray(cached['history_ids'])
+            old_history_dates = np.asarray(cached['history_dates'])
+            position = pd.Index(old_history_ids).get_indexer(history_ids)
+            found = position >= 0
+            changed = ~found
+            changed[found] = np.asarray(cached['history_fingerprints'])[position[found]] != history_fps[found]
+            removed = ~np.isin(old_history_ids, history_ids)
+            changed_dates = np.concatenate([
+                history_dates[changed],
+                old_history_dates[position[changed & found]],
+                old_history_dates[removed]
+            ])
+            history_changed = len(changed_dates) > 0
+            cutoff = changed_dates.min() if history_changed else np.iinfo(np.int64).max
+
+            position = pd.Index(np.asarray(cached['ids'])).get_indexer(row_ids)
+            found = position >= 0
+            dirty = ~found | (row_dates >= cutoff)
+            dirty[found] |= np.asarray(cached['fingerprints'])[position[found]] != row_fps[found]
+
+            if not dirty.any() and not history_changed and len(cached['ids']) == len(row_ids):
+                return 0
+
+        new_ids, new_X, new_y = engine.build(row_ids[dirty])
+        order = pd.Index(new_ids).get_indexer(row_ids[dirty])
+        new_X, new_y = new_X[order], new_y[order]
+
+        if cached is not None:
+            # Linhas mantidas preservam a ordem do cache; as recalculadas são anexadas ao final
+            old_ids = np.asarray(cached['ids'])
+            keep = np.isin(old_ids, row_ids[~dirty])
+            X = np.concatenate([cached['X'][keep], new_X])
+            y = np.concatenate([cached['y'][keep], new_y])
+            ids = np.concatenate([old_ids[keep], row_ids[dirty]])
+            dates = np.concatenate([np.asarray(cached['dates'])[keep], row_dates[dirty]])
+            fps = np.concatenate([np.asarray(cached['fingerprints'])[keep], row_fps[dirty]])
+        else:
+            ids, dates, fps, X, y = row_ids, row_dates, row_fps, new_X, new_y
+
+        self._save_generation({
+            'ids': ids, 'dates': dates, 'fingerprints': fps, 'X': X, 'y': y,
+            'history_ids': history_ids, 'history_dates': history_dates,
+            'history_fingerprints': history_fps
+        })
+
+        return int(dirty.sum())
@@ -0,0 +1,231 @@
+import numpy as np
+import pandas as pd
+
+FINISHED_STATUS = 'Match Finished'
+
+# Número de jogos considerados no cálculo da forma recente
+FORM_WINDOW = 5
+
+# Posição na liga usada quando não há informação (placeholder histórico)
+LEAGUE_POSITION_PLACEHOLDER = 10
+
+# Colunas de estatísticas na mesma ordem de BettingModel.features
+STAT_COLUMNS = [
+    'home_possession', 'away_possession',
+    'home_shots', 'away_shots',
+    'home_shots_on_target', 'away_shots_on_target',
+    'home_corners', 'away_corners',
+    'home_fouls', 'away_fouls',
+    'home_yellow_cards', 'away_yellow_cards',
+    'home_red_cards', 'away_red_cards'
+]
+
+# Valor usado quando a estatística está ausente (ou zerada)
+STAT_DEFAULTS = {
+    'home_possession': 50,
+    'away_possession': 50
+}
+
+FIXTURE_COLUMNS = [
+    'id', 'league_id', 'season', 'home_team_id', 'away_team_id',
+    'date', 'status', 'home_goals', 'away_goals'
+]
+
+
+def stats_vector(stats):
+    """Converte um objeto FixtureStatistics no trecho de estatísticas do vetor de características"""
+    return [getattr(stats, column) or STAT_DEFAULTS.get(column, 0) for column in STAT_COLUMNS]
+
+
+class FeatureEngine:
+    """Motor colunar de características para o BettingModel
+
+    Carrega jogos e estatísticas uma única vez em arrays e calcula a forma
+    recente de todos os jogos com janelas deslizantes ordenadas por time.
+    """
+
+    def __init__(self, fixtures, statistics, standings=None):
+        self.fixtures = fixtures.reset_index(drop=True)
+        # Mantém apenas o primeiro registro de estatísticas por jogo
+        self.statistics = statistics.drop_duplicates('fixture_id', keep='first')
+        # Classificação das ligas (StandingsEngine), construída sob demanda
+        self.standings = standings
+        self._history = None
+
+    @classmethod
+    def from_orm(cls, fixtures, statistics):
+        """Cria o motor a partir de listas de objetos Fixture e FixtureStatistics"""
+        fixtures_frame = pd.DataFrame(
+            [[getattr(f, column) for column in FIXTURE_COLUMNS] for f in fixtures],
+            columns=FIXTURE_COLUMNS
+        )
+        statistics_frame = pd.DataFrame(
+            [[s.fixture_id] + [getattr(s, column) for column in STAT_COLUMNS] for s in statistics],
+            columns=['fixture_id'] + STAT_COLUMNS
+        )
+        return cls(fixtures_frame, statistics_frame)
+
+    @classmethod
+    def from_sql(cls, connectable):
+        """Cria o motor lendo as tabelas diretamente via SQL (sem objetos ORM)"""
+        fixtures_frame = pd.read_sql_query(
+            f"SELECT {', '.join(FIXTURE_COLUMNS)} FROM fixture ORDER BY id",
+            connectable, parse_dates=['date']
+        )
+        statistics_frame = pd.read_sql_query(
+            f"SELECT fixture_id, {', '.join(STAT_COLUMNS)} FROM fixture_statistics ORDER BY id",
+            connectable
+        )
+        return cls(fixtures_frame, statistics_frame)
+
+    def finished_fixtures(self):
+        """Retorna os jogos finalizados com placar, que formam o histórico dos times"""
+        fx = self.fixtures
+        return fx[(fx['status'] == FINISHED_STATUS) &
+                  fx['home_goals'].notna() & fx['away_goals'].notna()]
+
+    def _build_history(self):
+        """Monta a tabela longa (time, data, pontos, gols) ordenada por time e data"""
+        finished = self.finished_fixtures()
+
+        home_goals = finished['home_goals'].to_numpy(dtype=float)
+        away_goals = finished['away_goals'].to_numpy(dtype=float)
+        dates = finished['date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+        home_points = np.where(home_goals > away_goals, 3, np.where(home_goals == away_goals, 1, 0))
+        away_points = np.where(away_goals > home_goals, 3, np.where(home_goals == away_goals, 1, 0))
+
+        team = np.concatenate([finished['home_team_id'].to_numpy(dtype=np.int64),
+                               finished['away_team_id'].to_numpy(dtype=np.int64)])
+        date = np.concatenate([dates, dates])
+        points = np.concatenate([home_points, away_points]).astype(float)
+        scored = np.concatenate([home_goals, away_goals])
+        conceded = np.concatenate([away_goals, home_goals])
+        fixture_id = np.concatenate([finished['id'].to_numpy(dtype=np.int64)] * 2)
+        position = np.concatenate([finished.index.to_numpy(), finished.index.to_numpy()])
+
+        # Em empates de data, os jogos que aparecem primeiro na lista ficam no fim da janela
+        order = np.lexsort((-position, date, team))
+        self._history = {
+            'team': team[order],
+            'fixture_id': fixture_id[order],
+            'date': date[order],
+            'points': points[order],
+            'scored': scored[order],
+            'conceded': conceded[order]
+        }
+        return self._history
+
+    def form_features(self, team_ids, dates):
+        """Calcula forma, média de gols marcados e sofridos nos últimos jogos antes de cada data
+
+        Retorna três arrays alinhados com team_ids/dates.
+        """
+        history = self._history if self._history is not None else self._build_history()
+        team_ids = np.asarray(team_ids, dtype=np.int64)
+        dates = np.asarray(dates, dtype='datetime64[ns]').astype(np.int64)
+
+        # Chave composta (time, data) em espaço de ranks para evitar overflow
+        teams, team_rank = np.unique(np.concatenate([history['team'], team_ids]), return_inverse=True)
+        all_dates, date_rank = np.unique(np.concatenate([history['date'], dates]), return_inverse=True)
+        n_history = len(history['team'])
+        stride = len(all_dates) + 1
+
+        history_key = team_rank[:n_history] * stride + date_rank[:n_history]
+        query_team = team_rank[n_history:] * stride
+
+        # Jogos estritamente anteriores à data, dentro do grupo do time
+        end = np.searchsorted(history_key, query_team + date_rank[n_history:], side='left')
+        group_start = np.searchsorted(history_key, query_team, side='left')
+        start = np.maximum(group_start, end - FORM_WINDOW)
+        count = end - start
+
+        def window_sum(values):
+            cumulative = np.concatenate([[0.0], np.cumsum(values)])
+            return cumulative[end] - cumulative[start]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            form = window_sum(history['points'])
+            scored_avg = np.where(count > 0, window_sum(history['scored']) / count, 0.0)
+            conceded_avg = np.where(count > 0, window_sum(history['conceded']) / count, 0.0)
+
+        return form, scored_avg, conceded_avg
+
+    def league_positions(self, league_ids, team_ids, dates, seasons=None):
+        """Retorna a posição de cada time na liga (e temporada) antes de cada data"""
+        if self.standings is None:
+            from src.models.standings import StandingsEngine
+            self.standings = StandingsEngine().rebuild_from(self)
+        return self.standings.positions(league_ids, team_ids, dates, seasons)
+
+    def trainable_fixtures(self, include_scoreless=False):
+        """Retorna os jogos finalizados com resultado e estatísticas, na ordem original
+
+        Com include_scoreless, mantém também os jogos em que um dos times não
+        marcou (necessários para o modelo de taxa de gols).
+        """
+        fx = self.fixtures
+        if include_scoreless:
+            mask = ((fx['status'] == FINISHED_STATUS) &
+                    fx['home_goals'].notna() & fx['away_goals'].notna() &
+                    fx['id'].isin(self.statistics['fixture_id']))
+            return fx[mask]
+        # Mesmo critério do laço original: jogos com 0 gols de um lado são ignorados
+        mask = ((fx['status'] == FINISHED_STATUS) &
+                fx['home_goals'].fillna(0).astype(bool) &
+                fx['away_goals'].fillna(0).astype(bool) &
+                fx['id'].isin(self.statistics['fixture_id']))
+        return fx[mask]
+
+    def goals(self, fixture_ids):
+        """Retorna os gols de mandante e visitante dos jogos informados: (jogos, 2)"""
+        rows = self.fixtures.set_index('id').reindex(fixture_ids)
+        return rows[['home_goals', 'away_goals']].to_numpy(dtype=float)
+
+    def stats_matrix(self, fixture_ids):
+        """Retorna a matriz de estatísticas (com valores padrão) para os jogos informados"""
+        stats = self.statistics.set_index('fixture_id').reindex(fixture_ids)
+        columns = []
+        for column in STAT_COLUMNS:
+            values = stats[column].to_numpy(dtype=float)
+            default = STAT_DEFAULTS.get(column, 0)
+            columns.append(np.where(np.isnan(values) | (values == 0), default, values))
+        return np.column_stack(columns) if columns else np.empty((len(fixture_ids), 0))
+
+    def build(self, fixture_ids=None, include_scoreless=False):
+        """Gera ids, matriz de características e rótulos dos jogos treináveis
+
+        Se fixture_ids for informado, apenas esses jogos são processados.
+        """
+        rows = self.trainable_fixtures(include_scoreless)
+        if fixture_ids is not None:
+            rows = rows[rows['id'].isin(fixture_ids)]
+        fixture_ids = rows['id'].to_numpy(dtype=np.int64)
+        dates = rows['date'].to_numpy(dtype='datetime64[ns]')
+
+        home_form, home_scored, home_conceded = self.form_features(rows['home_team_id'], dates)
+        away_form, away_scored, away_conceded = self.form_features(rows['away_team_id'], dates)
+        home_position = self.league_positions(rows['league_id'], rows['home_team_id'], dates, rows['season'])
+        away_position = self.league_positions(rows['league_id'], rows['away_team_id'], dates, rows['season'])
+
+        X = np.column_stack([
+            self.stats_matrix(fixture_ids),
+            home_form, away_form,
+            home_position, away_position,
+            home_scored, away_scored,
+            home_conceded, away_conceded
+        ])
+        y = labels_from_goals(rows['home_goals'].to_numpy(dtype=float),
+                              rows['away_goals'].to_numpy(dtype=float))
+        return fixture_ids, X, y
+
+
+def labels_from_goals(home_goals, away_goals):
+    """Cria os rótulos [Home, Draw, Away, BTTS-Yes, Over2.5] a partir dos placares"""
+    labels = np.zeros((len(home_goals), 5), dtype=np.int64)
+    labels[:, 0] = home_goals > away_goals
+    labels[:, 1] = home_goals == away_goals
+    labels[:, 2] = home_goals < away_goals
+    labels[:, 3] = (home_goals > 0) & (away_goals > 0)
+    labels[:, 4] = (home_goals + away_goals) > 2.5
+    return labels
@@ -0,0 +1,89 @@
+import os
+import numpy as np
+from src.models.score_matrix import score_matrix, price_markets
+
+# Regularização L2 dos coeficientes (exceto o intercepto)
+L2_PENALTY = 1.0
+
+# Limites do ajuste por Newton-Raphson
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-8
+
+
+def _fit_poisson(X, y, l2=L2_PENALTY):
+    """Ajusta uma regressão de Poisson (ligação log) por Newton-Raphson; X já inclui o intercepto"""
+    penalty = np.full(X.shape[1], l2)
+    penalty[0] = 0
+    beta = np.zeros(X.shape[1])
+    beta[0] = np.log(max(y.mean(), 1e-6))
+    for _ in range(MAX_ITERATIONS):
+        rates = np.exp(np.clip(X @ beta, -20, 20))
+        gradient = X.T @ (y - rates) - penalty * beta
+        hessian = (X * rates[:, None]).T @ X + np.diag(penalty)
+        step = np.linalg.solve(hessian, gradient)
+        beta += step
+        if np.abs(step).max() < TOLERANCE:
+            break
+    return beta
+
+
+class GoalRateModel:
+    """Modelo de taxa de gols: prevê os gols esperados de mandante e visitante
+
+    Duas regressões de Poisson sobre as mesmas características do
+    BettingModel (normalizadas). A previsão de um lote é uma única
+    multiplicação de matrizes; a partir das duas taxas, score_matrix monta a
+    distribuição de placares e price_markets precifica todos os mercados.
+    """
+
+    def __init__(self, mean=None, scale=None, coefficients=None):
+        self.mean = mean
+        self.scale = scale
+        # (1 + características, 2): intercepto e coeficientes de mandante e visitante
+        self.coefficients = coefficients
+
+    def _design(self, X):
+        X = (np.asarray(X, dtype=float) - self.mean) / self.scale
+        return np.column_stack([np.ones(len(X)), X])
+
+    def fit(self, X, goals, l2=L2_PENALTY):
+        """Ajusta o modelo; goals tem forma (jogos, 2) com os gols de mandante e visitante"""
+        X = np.asarray(X, dtype=float)
+        goals = np.asarray(goals, dtype=float)
+        if len(X) < 2:
+            return False
+
+        self.mean = X.mean(axis=0)
+        scale = X.std(axis=0)
+        self.scale = np.where(scale > 0, scale, 1.0)
+        design = self._design(X)
+        self.coefficients = np.column_stack([_fit_poisson(design, goals[:, 0], l2),
+                                             _fit_poisson(design, goals[:, 1], l2)])
+        return True
+
+    def predict_rates(self, X):
+        """Gols esperados de mandante e visitante: (jogos, 2)"""
+        return np.exp(np.clip(self._design(X) @ self.coefficients, -20, 20))
+
+    def predict_markets(self, X):
+        """Taxas de gols e mercados precificados (price_markets) de vários jogos de uma vez"""
+        rates = self.predict_rates(X)
+        return rates, price_markets(score_matrix(rates[:, 0], rates[:, 1]))
+
+    def save(self, path):
+        """Salva o modelo em .npz (escrita atômica)"""
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, mean=self.mean, scale=self.scale, coefficients=self.coefficients)
+        os.replace(tmp_path, path)
+        return True
+
+    @classmethod
+    def load(cls, path):
+        """Carrega um modelo salvo (ou None se não existir ou for inválido)"""
+        try:
+            with np.load(path) as data:
+                return cls(data['mean'], data['scale'], data['coefficients'])
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Erro ao carregar o modelo de gols: {e}")
+            return None
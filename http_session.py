@@ -0,0 +1,115 @@
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+# Respostas que justificam uma nova tentativa (limite de requisições e falhas do servidor)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class EndpointStats:
+    """Contadores de requisições, tentativas extras, falhas e latência de um endpoint"""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'errors': self.errors,
+            'avg_latency': self.total_latency / self.requests if self.requests else 0.0,
+            'max_latency': self.max_latency
+        }
+
+
+class PooledSession:
+    """Sessão HTTP com conexões persistentes, timeouts e novas tentativas com espera aleatória
+
+    As conexões ficam num pool (até pool_size por host) e são reaproveitadas
+    entre as requisições, evitando um novo handshake TCP/TLS a cada chamada.
+    Falhas de conexão, timeouts e respostas 429/5xx são repetidas até
+    max_retries vezes, esperando o Retry-After da resposta ou um tempo
+    aleatório entre 0 e backoff * 2^tentativa (limitado a max_backoff). Cada
+    nova tentativa pode ser condicionada a before_retry (ex.: a cota de um
+    agendador de requisições), e cada resposta recebida é repassada a
+    on_response, inclusive as que serão repetidas.
+    """
+
+    def __init__(self, headers=None, pool_size=10, connect_timeout=5.0, read_timeout=30.0,
+                 max_retries=3, backoff=0.5, max_backoff=30.0):
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _delay(self, attempt, response=None):
+        """Tempo de espera antes da próxima tentativa"""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _record(self, endpoint, latency, retried=False, failed=False):
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, EndpointStats())
+            stats.requests += 1
+            stats.retries += retried
+            stats.errors += failed
+            stats.total_latency += latency
+            stats.max_latency = max(stats.max_latency, latency)
+
+    def get(self, url, endpoint=None, params=None, before_retry=None, on_response=None):
+        """Faz um GET com novas tentativas; retorna a última resposta ou propaga a última exceção
+
+        before_retry() é chamada antes de cada nova tentativa; se retornar False,
+        as tentativas param ali. on_response(response) recebe cada resposta.
+        """
+        endpoint = endpoint or url
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self._record(endpoint, time.perf_counter() - start, retried=not last_attempt, failed=True)
+                if last_attempt:
+                    raise
+                time.sleep(self._delay(attempt))
+                if before_retry is not None and not before_retry():
+                    raise
+                continue
+
+            if on_response is not None:
+                on_response(response)
+            failed = response.status_code >= 400
+            retry = response.status_code in RETRY_STATUS and not last_attempt
+            self._record(endpoint, time.perf_counter() - start, retried=retry, failed=failed)
+            if not retry:
+                return response
+            time.sleep(self._delay(attempt, response))
+            if before_retry is not None and not before_retry():
+                return response
+
+    def stats(self):
+        """Contadores por endpoint: {endpoint: {requests, retries, errors, avg_latency, max_latency}}"""
+        with self._lock:
+            return {endpoint: stats.to_dict() for endpoint, stats in self._stats.items()}
+
+    def close(self):
+        self.session.close()
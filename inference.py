@@ -0,0 +1,146 @@
+import os
+import numpy as np
+
+# Funções de ativação suportadas no passo à frente em NumPy
+def _relu(x):
+    return np.maximum(x, 0)
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+ACTIVATIONS = {
+    'relu': _relu,
+    'softmax': _softmax,
+    'sigmoid': _sigmoid,
+    'linear': lambda x: x
+}
+
+# Diferença máxima aceita entre as saídas do Keras e do NumPy
+VERIFY_TOLERANCE = 1e-5
+
+
+def _dense_layers(model):
+    """Retorna [(pesos, bias, ativação)] das camadas Dense de um modelo Keras"""
+    dense = []
+    for layer in model.layers:
+        if type(layer).__name__ == 'Dense':
+            kernel, bias = layer.get_weights()
+            dense.append((kernel.astype(np.float32), bias.astype(np.float32), layer.get_config()['activation']))
+    return dense
+
+
+def export_inference(model, scaler, path):
+    """Exporta os pesos das camadas Dense e a normalização do scaler para um arquivo .npz
+
+    As camadas de Dropout são ignoradas, pois não atuam na inferência. model
+    pode ser uma lista de modelos com a mesma arquitetura (ensemble); nesse
+    caso os pesos de cada camada são empilhados com um eixo inicial por membro.
+    """
+    members = [_dense_layers(m) for m in (model if isinstance(model, (list, tuple)) else [model])]
+    arrays = {'mean': np.asarray(scaler.mean_, dtype=np.float32),
+              'scale': np.asarray(scaler.scale_, dtype=np.float32)}
+    for i, layers in enumerate(zip(*members)):
+        kernels = [kernel for kernel, _, _ in layers]
+        biases = [bias for _, bias, _ in layers]
+        arrays[f'kernel_{i}'] = np.stack(kernels) if len(members) > 1 else kernels[0]
+        arrays[f'bias_{i}'] = np.stack(biases) if len(members) > 1 else biases[0]
+    activations = [activation for _, _, activation in members[0]]
+    arrays['activations'] = np.array(activations)
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+    return True
+
+
+def _dense(h, kernel, bias):
+    """Camada densa; pesos 3D (membros, entrada, saída) avaliam todos os membros de uma vez"""
+    if kernel.ndim == 2:
+        return h @ kernel + bias
+    if h.ndim == 2:
+        return np.einsum('ni,kio->kno', h, kernel) + bias[:, None, :]
+    return np.einsum('kni,kio->kno', h, kernel) + bias[:, None, :]
+
+
+class InferenceEngine:
+    """Passo à frente da rede em NumPy puro, sem depender do TensorFlow
+
+    Oferece transform (no lugar do StandardScaler) e predict_on_batch (no lugar
+    do modelo Keras), então pode substituir os dois num BettingModel. Num
+    ensemble, os pesos de cada camada têm um eixo inicial por membro e todos os
+    membros são avaliados na mesma passada; predict_on_batch retorna a média.
+    """
+
+    def __init__(self, kernels, biases, activations, mean, scale, kernel_scales=None):
+        self.kernels = kernels
+        self.biases = biases
+        self.activations = [ACTIVATIONS[name] for name in activations]
+        self.activation_names = list(activations)
+        self.mean = mean
+        self.scale = scale
+        # Escala de cada camada (pesos quantizados); 1 para pesos em float
+        self.kernel_scales = kernel_scales or [np.float32(1)] * len(kernels)
+
+    @property
+    def n_members(self):
+        """Número de membros do ensemble (1 para um modelo simples)"""
+        return self.kernels[0].shape[0] if self.kernels[0].ndim == 3 else 1
+
+    @classmethod
+    def load(cls, path):
+        """Carrega um modelo exportado (ou None, se não existir ou for inválido)"""
+        try:
+            with np.load(path) as data:
+                activations = [str(name) for name in data['activations']]
+                return cls(
+                    [data[f'kernel_{i}'] for i in range(len(activations))],
+                    [data[f'bias_{i}'] for i in range(len(activations))],
+                    activations,
+                    data['mean'],
+                    data['scale']
+                )
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Erro ao carregar o modelo de inferência: {e}")
+            return None
+
+    def transform(self, X):
+        """Normaliza as características com a média e o desvio do treinamento"""
+        return (np.asarray(X, dtype=np.float32) - self.mean) / self.scale
+
+    def predict_members(self, X):
+        """Executa o passo à frente sobre dados já normalizados; retorna (membros, jogos, saídas)"""
+        h = np.asarray(X, dtype=np.float32)
+        for kernel, bias, scale, activation in zip(self.kernels, self.biases, self.kernel_scales, self.activations):
+            h = activation(_dense(h, kernel.astype(np.float32) * scale, bias))
+        return h if h.ndim == 3 else h[None]
+
+    def predict_on_batch(self, X):
+        """Executa o passo à frente sobre dados já normalizados (média dos membros)"""
+        return self.predict_members(X).mean(axis=0)
+
+    def predict(self, X, verbose=0):
+        """Mesma interface de keras.Model.predict"""
+        return self.predict_on_batch(X)
+
+
+def verify_inference(model, scaler, engine, X=None, n_samples=256, seed=0):
+    """Compara as saídas do Keras e do NumPy; retorna a maior diferença absoluta
+
+    Sem X, usa amostras sorteadas em torno da média e do desvio do scaler. Num
+    ensemble, model é a lista de membros e cada um é comparado individualmente.
+    """
+    if X is None:
+        rng = np.random.default_rng(seed)
+        X = scaler.mean_ + scaler.scale_ * rng.normal(size=(n_samples, len(scaler.mean_)))
+    models = model if isinstance(model, (list, tuple)) else [model]
+    expected = np.stack([np.asarray(m.predict_on_batch(scaler.transform(X))) for m in models])
+    actual = engine.predict_members(engine.transform(X))
+    return float(np.abs(expected - actual).max())
@@ -0,0 +1,68 @@
+import numpy as np
+
+# Seleções na ordem das colunas das matrizes de probabilidade/odds
+SELECTIONS = [
+    ('1X2', 'Home'),
+    ('1X2', 'Draw'),
+    ('1X2', 'Away'),
+    ('BTTS', 'Yes'),
+    ('BTTS', 'No'),
+    ('Over/Under 2.5', 'Over'),
+    ('Over/Under 2.5', 'Under')
+]
+
+MARKETS = ['1X2', 'BTTS', 'Over/Under 2.5']
+
+# Índice da coluna de cada mercado/seleção
+SELECTION_INDEX = {selection: i for i, selection in enumerate(SELECTIONS)}
+MARKET_COLUMNS = {market: [i for i, (m, _) in enumerate(SELECTIONS) if m == market] for market in MARKETS}
+
+
+def selection_probabilities(outputs):
+    """Converte as 5 saídas da rede [Home, Draw, Away, BTTS-Yes, Over2.5] em 7 seleções"""
+    outputs = np.asarray(outputs, dtype=float)
+    return np.column_stack([
+        outputs[:, 0], outputs[:, 1], outputs[:, 2],
+        outputs[:, 3], 1 - outputs[:, 3],
+        outputs[:, 4], 1 - outputs[:, 4]
+    ])
+
+
+def selection_outcomes(labels):
+    """Converte os rótulos [Home, Draw, Away, BTTS-Yes, Over2.5] em acertos por seleção"""
+    labels = np.asarray(labels).astype(bool)
+    return np.column_stack([
+        labels[:, 0], labels[:, 1], labels[:, 2],
+        labels[:, 3], ~labels[:, 3],
+        labels[:, 4], ~labels[:, 4]
+    ])
+
+
+def to_prediction(probabilities):
+    """Converte uma linha de 7 probabilidades no dicionário {mercado: {seleção: probabilidade}}"""
+    prediction = {market: {} for market in MARKETS}
+    for (market, selection), probability in zip(SELECTIONS, probabilities):
+        prediction[market][selection] = float(probability)
+    return prediction
+
+
+def to_odds(odds):
+    """Converte uma linha de 7 odds em {mercado: {seleção: odd}}, omitindo as seleções sem cotação"""
+    result = {market: {} for market in MARKETS}
+    for (market, selection), odd in zip(SELECTIONS, odds):
+        if not np.isnan(odd):
+            result[market][selection] = float(odd)
+    return result
+
+
+def odds_matrix(odds, n_rows=1):
+    """Converte um dicionário {mercado: {seleção: odd}} numa matriz (n_rows, 7), com NaN onde faltar"""
+    row = [odds.get(market, {}).get(selection, np.nan) for market, selection in SELECTIONS]
+    return np.tile(np.array(row, dtype=float), (n_rows, 1))
+
+
+def selection_matrix(values):
+    """Empilha dicionários {mercado: {seleção: valor}} (ou None) numa matriz (n, 7), com NaN onde faltar"""
+    if not values:
+        return np.empty((0, len(SELECTIONS)))
+    return np.vstack([odds_matrix(value or {}) for value in values])
@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import uuid
+import pickle
+import threading
+from datetime import datetime
+from src.models.ai_model import BettingModel
+from src.models.team_state import TeamStateStore
+from src.models.standings import StandingsEngine
+from src.models.goal_model import GoalRateModel
+
+
+class ModelRegistry:
+    """Mantém a versão em uso do BettingModel, compartilhada entre as threads do servidor
+
+    O modelo é carregado uma única vez, sob um lock, na primeira consulta. A cada
+    check_interval segundos o registro confere o arquivo de versão (ou, na falta
+    dele, a data de modificação dos artefatos) e, se mudou, carrega a nova versão
+    e a troca atomicamente. Previsões em andamento continuam usando a instância
+    antiga, que não é alterada. O arquivo de versão pode apontar outro artefato
+    de inferência (ex.: a versão quantizada) a ser servido no lugar do float32.
+    """
+
+    def __init__(self, model_file, scaler_file, inference_file, team_state_file, standings_file,
+                 version_file, goal_model_file=None, check_interval=1.0):
+        self.model_file = model_file
+        self.scaler_file = scaler_file
+        self.inference_file = inference_file
+        self.team_state_file = team_state_file
+        self.standings_file = standings_file
+        self.version_file = version_file
+        self.goal_model_file = goal_model_file
+        self.check_interval = check_interval
+        self._model = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _read_version_file(self):
+        try:
+            with open(self.version_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _current_version(self):
+        """Identifica a versão dos artefatos em disco"""
+        version = self._read_version_file().get('version')
+        if version:
+            return version
+
+        # Sem arquivo de versão: usa a data de modificação dos artefatos
+        mtimes = []
+        for path in (self.inference_file, self.model_file, self.scaler_file):
+            try:
+                mtimes.append(str(os.stat(path).st_mtime_ns))
+            except OSError:
+                mtimes.append('-')
+        return 'mtime-' + '-'.join(mtimes)
+
+    def _load(self):
+        """Carrega os artefatos salvos numa nova instância de BettingModel"""
+        model = BettingModel(
+            team_state=TeamStateStore.load(self.team_state_file),
+            standings=StandingsEngine.load(self.standings_file)
+        )
+        if self.goal_model_file and os.path.exists(self.goal_model_file):
+            model.goal_model = GoalRateModel.load(self.goal_model_file)
+
+        # De preferência a versão em NumPy, que não importa o TensorFlow (ou a indicada no arquivo de versão)
+        inference_file = self._read_version_file().get('inference') or self.inference_file
+        if os.path.exists(inference_file) and model.load_inference(inference_file):
+            return model
+        if os.path.exists(self.model_file) and os.path.exists(self.scaler_file) and model.load_model(self.model_file):
+            with open(self.scaler_file, 'rb') as f:
+                model.scaler = pickle.load(f)
+        return model
+
+    def get(self):
+        """Retorna o modelo em uso, recarregando-o se os artefatos mudaram"""
+        model = self._model
+        now = time.monotonic()
+        if model is not None and now - self._checked_at < self.check_interval:
+            return model
+        self._checked_at = now
+
+        version = self._current_version()
+        if model is not None and version == self._version:
+            return model
+
+        # Enquanto uma thread recarrega, as demais seguem com a versão atual
+        if not self._lock.acquire(blocking=model is None):
+            return model
+        try:
+            if self._model is None or version != self._version:
+                new_model = self._load()
+                if new_model.model is not None or self._model is None:
+                    new_model.version = version
+                    self._model = new_model
+                    self._version = version
+                    print(f"Modelo carregado (versão {version})")
+            return self._model
+        except Exception as e:
+            print(f"Erro ao carregar o modelo: {e}")
+            return self._model or model
+        finally:
+            self._lock.release()
+
+    @property
+    def version(self):
+        """Versão do modelo em uso"""
+        self.get()
+        return self._version
+
+    def _write_version_file(self, **fields):
+        version = uuid.uuid4().hex
+        tmp_path = f'{self.version_file}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(dict(fields, version=version, created_at=datetime.utcnow().isoformat()), f)
+        os.replace(tmp_path, self.version_file)
+        return version
+
+    def publish(self, model):
+        """Registra um modelo recém-treinado (já salvo em disco) como a versão em uso"""
+        with self._lock:
+            version = self._write_version_file()
+            model.version = version
+            self._model = model
+            self._version = version
+        return version
+
+    def publish_inference(self, inference_file):
+        """Passa a servir outro artefato de inferência (ex.: quantizado) com os demais artefatos atuais
+
+        Vale até o próximo publish, que volta ao artefato float32 do novo treinamento.
+        """
+        with self._lock:
+            version = self._write_version_file(inference=inference_file)
+            model = self._load()
+            model.version = version
+            self._model = model
+            self._version = version
+        return version
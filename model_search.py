@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from src.models.ai_model import DEFAULT_CONFIG
+
+# Espaço de busca de arquitetura e hiperparâmetros
+SEARCH_SPACE = {
+    'layers': [[64, 32, 16], [128, 64, 32], [128, 64], [64, 32], [32, 16], [256, 128, 64]],
+    'dropout': [0.0, 0.1, 0.2, 0.3, 0.4],
+    'learning_rate': (1e-4, 3e-3),  # Amostrado em escala logarítmica
+    'batch_size': [16, 32, 64, 128]
+}
+
+TRIALS_FILE = 'trials.jsonl'
+BEST_CONFIG_FILE = 'best_config.json'
+
+
+def sample_config(rng):
+    """Sorteia uma configuração do espaço de busca"""
+    low, high = SEARCH_SPACE['learning_rate']
+    return {
+        'layers': list(SEARCH_SPACE['layers'][rng.integers(len(SEARCH_SPACE['layers']))]),
+        'dropout': float(rng.choice(SEARCH_SPACE['dropout'])),
+        'learning_rate': float(np.exp(rng.uniform(np.log(low), np.log(high)))),
+        'batch_size': int(rng.choice(SEARCH_SPACE['batch_size']))
+    }
+
+
+def run_trial(cache_path, config, prune_threshold, deadline, max_epochs=100, min_epochs=5, seed=42):
+    """Treina e avalia uma configuração (executado num processo separado)
+
+    A matriz de características é lida do cache por memory mapping, então os
+    processos compartilham as mesmas páginas em modo somente leitura. O
+    treinamento é interrompido se, após min_epochs, a perda de validação
+    estiver acima de prune_threshold, ou se o prazo (deadline) acabar.
+    """
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.model_selection import train_test_split
+    from tensorflow import keras
+    from src.models.ai_model import BettingModel
+
+    X = np.load(os.path.join(cache_path, 'X.npy'), mmap_mode='r')
+    y = np.load(os.path.join(cache_path, 'y.npy'), mmap_mode='r')
+    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=seed)
+
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X_train)
+    X_val = scaler.transform(X_val)
+
+    pruned = {'value': False}
+
+    class Pruner(keras.callbacks.Callback):
+        def on_epoch_end(self, epoch, logs=None):
+            val_loss = (logs or {}).get('val_loss')
+            if time.time() > deadline:
+                self.model.stop_training = True
+            elif (prune_threshold is not None and val_loss is not None and
+                    epoch + 1 >= min_epochs and val_loss > prune_threshold):
+                pruned['value'] = True
+                self.model.stop_training = True
+
+    keras.utils.set_random_seed(seed)
+    model = BettingModel(config=config)._build_model(X.shape[1])
+    started = time.time()
+    history = model.fit(
+        X_train, y_train,
+        epochs=max_epochs,
+        batch_size=config['batch_size'],
+        validation_data=(X_val, y_val),
+        callbacks=[
+            keras.callbacks.EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True),
+            Pruner()
+        ],
+        verbose=0
+    )
+
+    val_losses = history.history.get('val_loss', [])
+    best_epoch = int(np.argmin(val_losses)) if val_losses else 0
+    return {
+        'config': config,
+        'val_loss': float(val_losses[best_epoch]) if val_losses else None,
+        'val_accuracy': float(history.history['val_accuracy'][best_epoch]) if val_losses else None,
+        'epochs': len(val_losses),
+        'pruned': pruned['value'],
+        'seconds': time.time() - started
+    }
+
+
+class ModelSearch:
+    """Busca paralela de arquitetura e hiperparâmetros do BettingModel"""
+
+    def __init__(self, cache_path, output_path, n_workers=None, seed=None):
+        self.cache_path = cache_path
+        self.output_path = output_path
+        self.n_workers = n_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.rng = np.random.default_rng(seed)
+        os.makedirs(output_path, exist_ok=True)
+
+    def _record(self, trial):
+        with open(os.path.join(self.output_path, TRIALS_FILE), 'a') as f:
+            f.write(json.dumps(trial) + '\n')
+
+    def run(self, budget_seconds=600, max_trials=50, prune_tolerance=0.05, on_trial=None):
+        """Executa a busca dentro do tempo disponível e salva a melhor configuração
+
+        Retorna (melhor resultado, lista de resultados).
+        """
+        deadline = time.time() + budget_seconds
+        results = []
+        best = None
+
+        # 'spawn' evita herdar o estado do TensorFlow do processo principal
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.n_workers, mp_context=context) as executor:
+            pending = set()
+            submitted = 0
+
+            # A primeira tentativa usa a configuração padrão, como referência
+            configs = [dict(DEFAULT_CONFIG)]
+
+            while True:
+                while (len(pending) < self.n_workers and submitted < max_trials and
+                       time.time() < deadline):
+                    config = configs.pop() if configs else sample_config(self.rng)
+                    threshold = best['val_loss'] * (1 + prune_tolerance) if best else None
+                    pending.add(executor.submit(run_trial, self.cache_path, config, threshold, deadline))
+                    submitted += 1
+
+                if not pending:
+                    break
+
+                done, pending = wait(pending, timeout=max(1, deadline - time.time()),
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        trial = future.result()
+                    except Exception as e:
+                        print(f"Erro numa tentativa da busca: {e}")
+                        continue
+                    results.append(trial)
+                    self._record(trial)
+                    if trial['val_loss'] is not None and not trial['pruned'] and (
+                            best is None or trial['val_loss'] < best['val_loss']):
+                        best = trial
+                    if on_trial:
+                        on_trial(len(results) - 1, trial)
+
+        if best:
+            tmp_path = os.path.join(self.output_path, f'{BEST_CONFIG_FILE}.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(best, f)
+            os.replace(tmp_path, os.path.join(self.output_path, BEST_CONFIG_FILE))
+
+        return best, results
+
+
+def load_best_config(output_path):
+    """Retorna a melhor configuração encontrada pela busca (ou None)"""
+    try:
+        with open(os.path.join(output_path, BEST_CONFIG_FILE)) as f:
+            return json.load(f)['config']
+    except (OSError, ValueError, KeyError):
+        return None
@@ -33,6 +33,7 @@ class Fixture(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     api_id = db.Column(db.Integer, unique=True)
     league_id = db.Column(db.Integer, db.ForeignKey('league.id'), nullable=False)
+    season = db.Column(db.Integer)  # Temporada do jogo, como na API-Football (ex.: 2024)
     home_team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
     away_team_id = db.Column(db.Integer, db.ForeignKey('team.id'), nullable=False)
     date = db.Column(db.DateTime, nullable=False)
@@ -80,3 +81,47 @@ class Prediction(db.Model):
     
     def __repr__(self):
         return f'<Prediction {self.prediction_type} {self.prediction_value} ({self.confidence:.2f})>'
+
+class Odds(db.Model):
+    """Modelo para as odds mais recentes de cada seleção, por casa de apostas"""
+    __table_args__ = (
+        db.UniqueConstraint('fixture_id', 'bookmaker_id', 'market', 'selection', name='uq_odds_key'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    fixture_id = db.Column(db.Integer, db.ForeignKey('fixture.id'), nullable=False)
+    bookmaker_id = db.Column(db.Integer, nullable=False)  # ID da casa na API
+    bookmaker_name = db.Column(db.String(100))
+    market = db.Column(db.String(50), nullable=False)  # 1X2, BTTS, Over/Under 2.5
+    selection = db.Column(db.String(50), nullable=False)  # Home, Draw, Away, Yes, No, Over, Under
+    odd = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Odds {self.market} {self.selection} {self.odd} (Fixture {self.fixture_id})>'
+
+class OddsHistory(db.Model):
+    """Modelo para o histórico de odds de um jogo, num bloco binário compactado"""
+    fixture_id = db.Column(db.Integer, db.ForeignKey('fixture.id'), primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)  # Séries por seleção/casa, com delta encoding + zlib
+    points = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<OddsHistory Fixture {self.fixture_id} ({self.points} pontos)>'
+
+class CachedPrediction(db.Model):
+    """Modelo para previsões já calculadas, por jogo, versão do modelo e características de entrada"""
+    __table_args__ = (
+        db.Index('ix_cached_prediction_key', 'fixture_id', 'model_version', 'feature_hash'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    fixture_id = db.Column(db.Integer, db.ForeignKey('fixture.id'), nullable=False)
+    model_version = db.Column(db.String(64), nullable=False)
+    feature_hash = db.Column(db.String(40), nullable=False)
+    result = db.Column(db.Text, nullable=False)  # JSON com a previsão e o desvio entre membros do ensemble
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CachedPrediction Fixture {self.fixture_id} ({self.model_version})>'
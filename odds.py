@@ -0,0 +1,59 @@
+import numpy as np
+from datetime import datetime
+from src.models.database import db
+from src.models.models import Fixture, Odds
+from src.models.markets import SELECTIONS, SELECTION_INDEX
+
+
+def latest_odds(fixture_ids, with_ids=False):
+    """Busca as odds mais recentes de vários jogos numa única consulta
+
+    Retorna (odds, casas): odds tem forma (jogos, seleções, casas), alinhada com
+    fixture_ids e SELECTIONS, com NaN onde não houver cotação; casas é a lista
+    de nomes na ordem do último eixo. Com with_ids, retorna também os ids das
+    casas, na mesma ordem.
+    """
+    fixture_ids = list(fixture_ids)
+    rows = db.session.query(
+        Odds.fixture_id, Odds.bookmaker_id, Odds.bookmaker_name, Odds.market, Odds.selection, Odds.odd
+    ).filter(Odds.fixture_id.in_(fixture_ids)).all() if fixture_ids else []
+
+    bookmaker_ids = sorted({row.bookmaker_id for row in rows})
+    bookmaker_index = {bookmaker_id: i for i, bookmaker_id in enumerate(bookmaker_ids)}
+    names = {row.bookmaker_id: row.bookmaker_name or str(row.bookmaker_id) for row in rows}
+    fixture_index = {fixture_id: i for i, fixture_id in enumerate(fixture_ids)}
+
+    odds = np.full((len(fixture_ids), len(SELECTIONS), len(bookmaker_ids)), np.nan)
+    for row in rows:
+        column = SELECTION_INDEX.get((row.market, row.selection))
+        if column is not None:
+            odds[fixture_index[row.fixture_id], column, bookmaker_index[row.bookmaker_id]] = row.odd
+
+    if with_ids:
+        return odds, [names[bookmaker_id] for bookmaker_id in bookmaker_ids], bookmaker_ids
+    return odds, [names[bookmaker_id] for bookmaker_id in bookmaker_ids]
+
+
+def odds_updated_at(fixture_ids):
+    """Instante da última cotação salva de cada jogo: {jogo: updated_at}, numa única consulta"""
+    fixture_ids = list(fixture_ids)
+    if not fixture_ids:
+        return {}
+    return dict(db.session.query(Odds.fixture_id, db.func.max(Odds.updated_at)).filter(
+        Odds.fixture_id.in_(fixture_ids)).group_by(Odds.fixture_id).all())
+
+
+def started_fixtures(fixture_ids, now=None):
+    """Retorna, entre os jogos informados, os que já começaram (data em UTC até now)"""
+    fixture_ids = list(fixture_ids)
+    if not fixture_ids:
+        return []
+    now = now or datetime.utcnow()
+    return [fixture_id for fixture_id, in db.session.query(Fixture.id).filter(
+        Fixture.id.in_(fixture_ids), Fixture.date <= now)]
+
+
+def best_odds(odds):
+    """Melhor odd de cada seleção entre as casas: (jogos, seleções), NaN sem cotação"""
+    best = np.where(np.isnan(odds), -np.inf, odds).max(axis=2, initial=-np.inf)
+    return np.where(np.isinf(best), np.nan, best)
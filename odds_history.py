@@ -0,0 +1,234 @@
+import zlib
+import struct
+import numpy as np
+from datetime import datetime
+from src.models.database import db
+from src.models.models import Odds, OddsHistory
+from src.models.markets import SELECTIONS
+
+# Cabeçalho do bloco: identificador, versão do formato e número de pontos
+BLOCK_HEADER = struct.Struct('<4sBI')
+BLOCK_MAGIC = b'ODDH'
+BLOCK_VERSION = 1
+
+# As odds são gravadas em milésimos (ex.: 2.125 -> 2125)
+PRICE_SCALE = 1000
+
+# Jogos por consulta ao carregar blocos
+LOAD_BATCH_SIZE = 500
+
+EMPTY_SERIES = {
+    'selection': np.empty(0, dtype=np.int8),
+    'bookmaker': np.empty(0, dtype=np.int32),
+    'timestamp': np.empty(0, dtype=np.int64),
+    'price': np.empty(0, dtype=np.int32)
+}
+
+
+def _sorted(series):
+    """Ordena os pontos por (seleção, casa, instante), mantendo cada série contígua"""
+    order = np.lexsort((series['timestamp'], series['bookmaker'], series['selection']))
+    return {name: values[order] for name, values in series.items()}
+
+
+def encode_block(series):
+    """Codifica as séries de um jogo num bloco binário compactado
+
+    Instantes e preços são gravados como diferenças em relação ao ponto
+    anterior (delta encoding), o que deixa os valores pequenos e repetitivos
+    para o zlib.
+    """
+    series = _sorted(series)
+    n = len(series['timestamp'])
+    timestamps = np.diff(series['timestamp'], prepend=np.int64(0)).astype(np.int64)
+    prices = np.diff(series['price'], prepend=np.int32(0)).astype(np.int32)
+    payload = b''.join([
+        series['selection'].astype(np.int8).tobytes(),
+        series['bookmaker'].astype(np.int32).tobytes(),
+        timestamps.tobytes(),
+        prices.tobytes()
+    ])
+    return BLOCK_HEADER.pack(BLOCK_MAGIC, BLOCK_VERSION, n) + zlib.compress(payload)
+
+
+def decode_block(block):
+    """Decodifica um bloco em arrays {selection, bookmaker, timestamp, price}"""
+    if not block:
+        return dict(EMPTY_SERIES)
+    magic, version, n = BLOCK_HEADER.unpack_from(block)
+    if magic != BLOCK_MAGIC or version != BLOCK_VERSION:
+        raise ValueError("Bloco de histórico de odds inválido")
+
+    payload = zlib.decompress(block[BLOCK_HEADER.size:])
+    offset = 0
+    arrays = {}
+    for name, dtype in (('selection', np.int8), ('bookmaker', np.int32),
+                        ('timestamp', np.int64), ('price', np.int32)):
+        size = n * np.dtype(dtype).itemsize
+        arrays[name] = np.frombuffer(payload, dtype=dtype, count=n, offset=offset)
+        offset += size
+    arrays['timestamp'] = np.cumsum(arrays['timestamp'])
+    arrays['price'] = np.cumsum(arrays['price']).astype(np.int32)
+    return arrays
+
+
+def _group_starts(series):
+    """Marca o primeiro ponto de cada série (seleção, casa) nos arrays ordenados"""
+    new_group = np.ones(len(series['timestamp']), dtype=bool)
+    new_group[1:] = ((series['selection'][1:] != series['selection'][:-1]) |
+                     (series['bookmaker'][1:] != series['bookmaker'][:-1]))
+    return new_group
+
+
+def _to_timestamp(value):
+    """Converte datetime/np.datetime64/segundos em segundos desde a época"""
+    if isinstance(value, datetime):
+        return int(np.datetime64(value, 's').astype(np.int64))
+    if isinstance(value, np.datetime64):
+        return int(value.astype('datetime64[s]').astype(np.int64))
+    return int(value)
+
+
+class OddsHistoryStore:
+    """Histórico de odds por jogo, uma série de (instante, preço, casa) por seleção
+
+    Cada jogo ocupa uma linha de odds_history com um bloco binário compactado.
+    Um ponto só é gravado quando o preço muda, então sincronizações repetidas
+    não fazem o histórico crescer.
+    """
+
+    def _load(self, fixture_ids):
+        """Carrega os blocos de vários jogos numa única consulta"""
+        fixture_ids = list(fixture_ids)
+        rows = {}
+        # Em lotes, para respeitar o limite de parâmetros do SQLite
+        for start in range(0, len(fixture_ids), LOAD_BATCH_SIZE):
+            batch = fixture_ids[start:start + LOAD_BATCH_SIZE]
+            rows.update((row.fixture_id, row) for row in OddsHistory.query.filter(OddsHistory.fixture_id.in_(batch)))
+        return rows
+
+    def append(self, points):
+        """Acrescenta pontos {fixture_id: [(instante, coluna da seleção, casa, odd)]}
+
+        As alterações são adicionadas à sessão do banco; o commit fica a cargo
+        de quem chama. Retorna o número de pontos gravados.
+        """
+        rows = self._load(points)
+        written = 0
+
+        for fixture_id, fixture_points in points.items():
+            if not fixture_points:
+                continue
+            row = rows.get(fixture_id)
+            series = decode_block(row.data) if row else dict(EMPTY_SERIES)
+
+            timestamp, selection, bookmaker, price = zip(*fixture_points)
+            new = {
+                'selection': np.array(selection, dtype=np.int8),
+                'bookmaker': np.array(bookmaker, dtype=np.int32),
+                'timestamp': np.array([_to_timestamp(t) for t in timestamp], dtype=np.int64),
+                'price': np.round(np.array(price, dtype=float) * PRICE_SCALE).astype(np.int32)
+            }
+
+            # Descarta pontos que repetem o preço anterior da mesma série
+            merged = _sorted({name: np.concatenate([series[name], new[name]]) for name in series})
+            keep = _group_starts(merged)
+            keep[1:] |= merged['price'][1:] != merged['price'][:-1]
+            merged = {name: values[keep] for name, values in merged.items()}
+
+            added = len(merged['timestamp']) - len(series['timestamp'])
+            if added <= 0:
+                continue
+            written += added
+
+            if row is None:
+                row = OddsHistory(fixture_id=fixture_id)
+                db.session.add(row)
+            row.data = encode_block(merged)
+            row.points = len(merged['timestamp'])
+            row.updated_at = datetime.utcnow()
+
+        return written
+
+    def series(self, fixture_id):
+        """Retorna os pontos de um jogo como arrays (preço em odd decimal)"""
+        row = self._load([fixture_id]).get(fixture_id)
+        series = decode_block(row.data) if row else dict(EMPTY_SERIES)
+        return dict(series, price=series['price'] / PRICE_SCALE)
+
+    def as_of(self, fixture_ids, timestamps):
+        """Odds em vigor em um instante (ou num instante por jogo), numa única consulta
+
+        Retorna (odds, casas) no mesmo formato de latest_odds: odds com forma
+        (jogos, seleções, casas) e NaN onde não havia cotação naquele instante.
+        """
+        odds, bookmakers = self._as_of(fixture_ids, timestamps)
+        return odds, self._bookmaker_names(bookmakers)
+
+    def _as_of(self, fixture_ids, timestamps):
+        fixture_ids = list(fixture_ids)
+        if not isinstance(timestamps, (list, tuple, np.ndarray)):
+            timestamps = [timestamps] * len(fixture_ids)
+        rows = self._load(fixture_ids)
+
+        selected = []
+        for i, (fixture_id, timestamp) in enumerate(zip(fixture_ids, timestamps)):
+            row = rows.get(fixture_id)
+            if row is None:
+                continue
+            series = decode_block(row.data)
+            valid = series['timestamp'] <= _to_timestamp(timestamp)
+            series = {name: values[valid] for name, values in series.items()}
+            # Último ponto de cada série até o instante
+            last = np.ones(len(series['timestamp']), dtype=bool)
+            last[:-1] = _group_starts(series)[1:]
+            selected.append((i, series['selection'][last], series['bookmaker'][last], series['price'][last]))
+
+        return self._to_matrix(len(fixture_ids), selected)
+
+    def opening_closing(self, fixture_ids, kickoffs):
+        """Odds de abertura (primeira cotação) e de fechamento (última antes do início)"""
+        fixture_ids = list(fixture_ids)
+        rows = self._load(fixture_ids)
+
+        opening = []
+        for i, fixture_id in enumerate(fixture_ids):
+            row = rows.get(fixture_id)
+            if row is None:
+                continue
+            series = decode_block(row.data)
+            first = _group_starts(series)
+            opening.append((i, series['selection'][first], series['bookmaker'][first], series['price'][first]))
+
+        opening, opening_bookmakers = self._to_matrix(len(fixture_ids), opening)
+        closing, closing_bookmakers = self._as_of(fixture_ids, list(kickoffs))
+
+        # Alinha as casas dos dois resultados
+        bookmakers = sorted(set(opening_bookmakers) | set(closing_bookmakers))
+        return (self._align(opening, opening_bookmakers, bookmakers),
+                self._align(closing, closing_bookmakers, bookmakers),
+                self._bookmaker_names(bookmakers))
+
+    @staticmethod
+    def _align(odds, current, bookmakers):
+        aligned = np.full(odds.shape[:2] + (len(bookmakers),), np.nan)
+        for i, bookmaker in enumerate(current):
+            aligned[:, :, bookmakers.index(bookmaker)] = odds[:, :, i]
+        return aligned
+
+    def _to_matrix(self, n_fixtures, selected):
+        """Monta a matriz (jogos, seleções, casas) a partir dos pontos selecionados"""
+        bookmakers = sorted({int(b) for _, _, bks, _ in selected for b in bks})
+        index = {bookmaker: i for i, bookmaker in enumerate(bookmakers)}
+        odds = np.full((n_fixtures, len(SELECTIONS), len(bookmakers)), np.nan)
+        for i, selections, bks, prices in selected:
+            columns = np.array([index[int(b)] for b in bks], dtype=np.int64)
+            odds[i, selections.astype(np.int64), columns] = prices / PRICE_SCALE
+        return odds, bookmakers
+
+    @staticmethod
+    def _bookmaker_names(bookmaker_ids):
+        """Nomes das casas (a partir da tabela de odds atuais)"""
+        names = dict(db.session.query(Odds.bookmaker_id, Odds.bookmaker_name)
+                     .filter(Odds.bookmaker_id.in_(bookmaker_ids)).distinct()) if bookmaker_ids else {}
+        return [names.get(bookmaker) or str(bookmaker) for bookmaker in bookmaker_ids]
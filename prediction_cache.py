@@ -0,0 +1,98 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from src.models.models import CachedPrediction
+from src.models.database import db
+
+
+def feature_hash(row):
+    """Hash do vetor de características de um jogo"""
+    return hashlib.sha1(np.ascontiguousarray(row, dtype=np.float64).tobytes()).hexdigest()
+
+
+class PredictionCache:
+    """Cache de previsões por (jogo, versão do modelo, hash das características)
+
+    Consulta primeiro a memória (LRU) e depois o banco; só os jogos ausentes nos
+    dois passam pela rede. Como a chave inclui a versão do modelo e as
+    características de entrada, um novo treinamento ou novas estatísticas geram
+    uma nova entrada em vez de devolver um resultado antigo.
+    """
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            prediction = self._entries.get(key)
+            if prediction is not None:
+                self._entries.move_to_end(key)
+            return prediction
+
+    def _put(self, key, prediction):
+        with self._lock:
+            self._entries[key] = prediction
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def predict(self, model, version, fixtures, statistics, history=None):
+        """Retorna [(previsão, desvio entre membros, veio_do_cache)] alinhado com fixtures
+
+        Jogos sem estatísticas recebem (None, None, False). O desvio só existe
+        para ensembles (None para um modelo simples). As entradas novas são adicionadas à sessão do banco; o commit fica a cargo
+        de quem chama. history é repassado a model.feature_matrix.
+        """
+        results = [(None, None, False)] * len(fixtures)
+        X, rows = model.feature_matrix(fixtures, statistics, history)
+        keys = {i: (fixtures[i].id, version, feature_hash(x)) for i, x in zip(rows, X)}
+
+        # 1) Memória
+        missing = []
+        for i, key in keys.items():
+            entry = self._get(key)
+            if entry is not None:
+                results[i] = entry + (True,)
+            else:
+                missing.append(i)
+
+        # 2) Banco de dados (uma consulta para todos os jogos ausentes)
+        if missing:
+            stored = {
+                (entry.fixture_id, entry.model_version, entry.feature_hash): entry.result
+                for entry in CachedPrediction.query.filter(
+                    CachedPrediction.fixture_id.in_([keys[i][0] for i in missing]),
+                    CachedPrediction.model_version == version
+                )
+            }
+            still_missing = []
+            for i in missing:
+                if keys[i] in stored:
+                    result = json.loads(stored[keys[i]])
+                    entry = (result['prediction'], result.get('spread'))
+                    self._put(keys[i], entry)
+                    results[i] = entry + (True,)
+                else:
+                    still_missing.append(i)
+            missing = still_missing
+
+        # 3) Modelo (uma única passada para os jogos restantes)
+        if missing:
+            positions = {i: n for n, i in enumerate(rows)}
+            predictions, spreads = model.predict_features(X[[positions[i] for i in missing]], with_spread=True)
+            for i, prediction, spread in zip(missing, predictions, spreads):
+                fixture_id, model_version, hashed = keys[i]
+                db.session.add(CachedPrediction(
+                    fixture_id=fixture_id,
+                    model_version=model_version,
+                    feature_hash=hashed,
+                    result=json.dumps({'prediction': prediction, 'spread': spread})
+                ))
+                self._put(keys[i], (prediction, spread))
+                results[i] = (prediction, spread, False)
+
+        return results
@@ -0,0 +1,134 @@
+import os
+import json
+import shutil
+import numpy as np
+from src.models.inference import InferenceEngine
+from src.models.markets import MARKETS, MARKET_COLUMNS, selection_probabilities, selection_outcomes
+
+MANIFEST_FILE = 'manifest.json'
+QUANTIZED_DTYPES = ('int8', 'float16')
+
+# Número de faixas de probabilidade usadas no erro de calibração
+CALIBRATION_BINS = 10
+
+
+def _quantize(kernel, dtype):
+    """Quantiza os pesos de uma camada; retorna (pesos, escala da camada)"""
+    if dtype == 'float16':
+        return kernel.astype(np.float16), 1.0
+    # int8 simétrico: o maior peso absoluto da camada vira 127
+    scale = float(np.abs(kernel).max()) / 127 or 1.0
+    return np.clip(np.round(kernel / scale), -127, 127).astype(np.int8), scale
+
+
+def export_quantized(engine, path, dtype='int8'):
+    """Grava o modelo num diretório com um .npy por camada e um manifest.json
+
+    Os pesos são gravados em int8 (com uma escala por camada) ou float16; bias
+    e normalização permanecem em float32, pois são pequenos.
+    """
+    if dtype not in QUANTIZED_DTYPES:
+        raise ValueError(f"Formato não suportado: {dtype}")
+
+    tmp_path = f'{path}.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    layers = []
+    for i, (kernel, bias, activation) in enumerate(zip(engine.kernels, engine.biases, engine.activation_names)):
+        weights, scale = _quantize(np.asarray(kernel, dtype=np.float32), dtype)
+        np.save(os.path.join(tmp_path, f'kernel_{i}.npy'), weights)
+        np.save(os.path.join(tmp_path, f'bias_{i}.npy'), np.asarray(bias, dtype=np.float32))
+        layers.append({
+            'kernel': f'kernel_{i}.npy',
+            'bias': f'bias_{i}.npy',
+            'scale': scale,
+            'activation': activation
+        })
+    np.save(os.path.join(tmp_path, 'mean.npy'), np.asarray(engine.mean, dtype=np.float32))
+    np.save(os.path.join(tmp_path, 'scale.npy'), np.asarray(engine.scale, dtype=np.float32))
+
+    with open(os.path.join(tmp_path, MANIFEST_FILE), 'w') as f:
+        json.dump({'format': 1, 'dtype': dtype, 'layers': layers}, f)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return True
+
+
+def artifact_size(path):
+    """Tamanho em bytes de um artefato (arquivo .npz ou diretório quantizado)"""
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+class QuantizedEngine(InferenceEngine):
+    """Passo à frente sobre pesos quantizados, lidos do disco por memory mapping"""
+
+    def __init__(self, kernels, biases, activations, mean, scale, kernel_scales, dtype):
+        super().__init__(kernels, biases, activations, mean, scale, kernel_scales)
+        self.dtype = dtype
+
+    @classmethod
+    def load(cls, path):
+        """Carrega um modelo quantizado (ou None, se não existir ou for inválido)"""
+        try:
+            with open(os.path.join(path, MANIFEST_FILE)) as f:
+                manifest = json.load(f)
+            layers = manifest['layers']
+            return cls(
+                [np.load(os.path.join(path, layer['kernel']), mmap_mode='r') for layer in layers],
+                [np.load(os.path.join(path, layer['bias'])) for layer in layers],
+                [layer['activation'] for layer in layers],
+                np.load(os.path.join(path, 'mean.npy')),
+                np.load(os.path.join(path, 'scale.npy')),
+                [np.float32(layer['scale']) for layer in layers],
+                manifest['dtype']
+            )
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Erro ao carregar o modelo quantizado: {e}")
+            return None
+
+
+def load_engine(path):
+    """Carrega um modelo de inferência, em float32 (.npz) ou quantizado (diretório)"""
+    if os.path.isdir(path):
+        return QuantizedEngine.load(path)
+    return InferenceEngine.load(path)
+
+
+def _calibration(probabilities, outcomes):
+    """Brier score e erro esperado de calibração (ECE) de um conjunto de seleções"""
+    p = probabilities.ravel()
+    o = outcomes.ravel().astype(float)
+    bins = np.minimum((p * CALIBRATION_BINS).astype(int), CALIBRATION_BINS - 1)
+    gap = np.abs(np.bincount(bins, weights=p - o, minlength=CALIBRATION_BINS))
+    return {
+        'brier': float(np.mean((p - o) ** 2)),
+        'ece': float(gap.sum() / max(len(p), 1))
+    }
+
+
+def quantization_report(reference, candidate, X, y=None):
+    """Compara as probabilidades de dois modelos por mercado num conjunto separado
+
+    Retorna a diferença absoluta máxima e média de cada mercado e, se os
+    rótulos y forem informados, Brier score e ECE dos dois modelos.
+    """
+    expected = selection_probabilities(reference.predict_on_batch(reference.transform(X)))
+    actual = selection_probabilities(candidate.predict_on_batch(candidate.transform(X)))
+    outcomes = selection_outcomes(y) if y is not None else None
+
+    report = {}
+    for market in MARKETS:
+        columns = MARKET_COLUMNS[market]
+        difference = np.abs(expected[:, columns] - actual[:, columns])
+        report[market] = {
+            'max_abs_diff': float(difference.max()) if difference.size else 0.0,
+            'mean_abs_diff': float(difference.mean()) if difference.size else 0.0
+        }
+        if outcomes is not None:
+            report[market]['reference'] = _calibration(expected[:, columns], outcomes[:, columns])
+            report[market]['quantized'] = _calibration(actual[:, columns], outcomes[:, columns])
+    return report
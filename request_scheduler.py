@@ -0,0 +1,190 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+from datetime import datetime, timezone
+
+# Prioridades das requisições (menor valor é atendido primeiro)
+LIVE = 0
+UPCOMING = 1
+BACKFILL = 2
+
+PRIORITY_NAMES = {LIVE: 'live', UPCOMING: 'upcoming', BACKFILL: 'backfill'}
+
+# Fração da cota diária reservada para jogos ao vivo e próximos (o backfill não a usa)
+BACKFILL_RESERVE = 0.1
+
+# A cota diária da API-Football é renovada à meia-noite UTC
+DAY = 24 * 60 * 60
+
+
+class TokenBucket:
+    """Balde de fichas: até capacity requisições, repostas continuamente a cada period segundos"""
+
+    def __init__(self, capacity=None, period=60.0):
+        self.capacity = capacity
+        self.period = period
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        if self.capacity is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / self.period)
+        self.updated = now
+
+    def wait_time(self, now):
+        """Segundos até haver uma ficha disponível (0 se já houver, ou sem limite)"""
+        self._refill(now)
+        if self.capacity is None or self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) * self.period / self.capacity
+
+    def consume(self, now):
+        self._refill(now)
+        if self.capacity is not None:
+            self.tokens -= 1
+
+    def sync(self, capacity, remaining, now):
+        """Ajusta o limite e as fichas ao informado pela API"""
+        self._refill(now)
+        self.tokens = remaining if self.capacity is None else min(self.tokens, remaining)
+        self.capacity = capacity
+
+
+class QuotaWindow:
+    """Cota fixa por janela (ex.: por dia), renovada no início de cada janela"""
+
+    def __init__(self, limit=None, period=DAY):
+        self.limit = limit
+        self.period = period
+        self.remaining = limit
+        self.reset_at = self._next_reset(time.time())
+
+    def _next_reset(self, now):
+        return (now // self.period + 1) * self.period
+
+    def _roll(self, now):
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = self._next_reset(now)
+
+    def available(self, now, reserve=0):
+        """Verifica se ainda há cota na janela além das reserve requisições reservadas"""
+        self._roll(now)
+        return self.limit is None or self.remaining - reserve >= 1
+
+    def consume(self, now):
+        self._roll(now)
+        if self.limit is not None:
+            self.remaining -= 1
+
+    def sync(self, limit, remaining, now):
+        """Ajusta o limite e o saldo ao informado pela API"""
+        self._roll(now)
+        self.remaining = remaining if self.limit is None else min(self.remaining, remaining)
+        self.limit = limit
+
+
+class RequestScheduler:
+    """Controla o ritmo das requisições à API dentro dos limites por minuto e por dia
+
+    Os limites vêm dos cabeçalhos x-ratelimit de cada resposta (ou dos valores
+    iniciais). Cada requisição pede uma ficha com uma prioridade; as fichas são
+    concedidas em ordem de prioridade (ao vivo, próximos jogos, backfill) e
+    chegada, esperando o balde por minuto se reabastecer. O backfill não usa a
+    parte da cota diária reservada às demais prioridades: quando só resta a
+    reserva, ele espera a próxima janela diária em vez de falhar.
+    """
+
+    def __init__(self, per_minute=None, per_day=None, reserve=BACKFILL_RESERVE):
+        self.minute = TokenBucket(per_minute, 60.0)
+        self.day = QuotaWindow(per_day, DAY)
+        self.reserve = reserve
+        self.granted = {priority: 0 for priority in PRIORITY_NAMES}
+        self.deferred = {priority: 0 for priority in PRIORITY_NAMES}
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def _wait_time(self, priority):
+        """Segundos até a requisição de maior prioridade poder ser feita"""
+        reserve = 0
+        if priority >= BACKFILL and self.day.limit:
+            reserve = math.ceil(self.day.limit * self.reserve)
+        now = time.time()
+        if not self.day.available(now, reserve):
+            return self.day.reset_at - now
+        return self.minute.wait_time(time.monotonic())
+
+    def acquire(self, priority=UPCOMING, timeout=None):
+        """Aguarda a vez e a cota para uma requisição
+
+        Retorna True quando a requisição pode ser feita, ou False se timeout
+        segundos se passarem antes disso (sem timeout, espera o tempo necessário,
+        inclusive a próxima janela diária). Quando a espera necessária já passa
+        do timeout (ex.: cota diária esgotada), retorna False na hora.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    wait = None
+                    if self._queue[0] == ticket:
+                        wait = self._wait_time(priority)
+                        if wait <= 0:
+                            heapq.heappop(self._queue)
+                            self.day.consume(time.time())
+                            self.minute.consume(time.monotonic())
+                            self.granted[priority] += 1
+                            return True
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0 or (wait is not None and wait > remaining):
+                            self._queue.remove(ticket)
+                            heapq.heapify(self._queue)
+                            self.deferred[priority] += 1
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._condition.wait(wait)
+            finally:
+                # O próximo da fila reavalia a sua vez
+                self._condition.notify_all()
+
+    def update(self, headers):
+        """Atualiza os limites com os cabeçalhos x-ratelimit de uma resposta"""
+        def header(name):
+            try:
+                return int(headers.get(name))
+            except (TypeError, ValueError):
+                return None
+
+        day_limit, day_remaining = header('x-ratelimit-requests-limit'), header('x-ratelimit-requests-remaining')
+        minute_limit, minute_remaining = header('x-ratelimit-limit'), header('x-ratelimit-remaining')
+        with self._condition:
+            if day_limit is not None and day_remaining is not None:
+                self.day.sync(day_limit, day_remaining, time.time())
+            if minute_limit is not None and minute_remaining is not None:
+                self.minute.sync(minute_limit, minute_remaining, time.monotonic())
+            self._condition.notify_all()
+
+    def stats(self):
+        """Limites, saldo e contadores por prioridade"""
+        with self._condition:
+            self.minute._refill(time.monotonic())
+            queued = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _ in self._queue:
+                queued[PRIORITY_NAMES[priority]] += 1
+            return {
+                'minute': {'limit': self.minute.capacity, 'available': self.minute.tokens},
+                'day': {
+                    'limit': self.day.limit,
+                    'remaining': self.day.remaining,
+                    'reset_at': datetime.fromtimestamp(self.day.reset_at, timezone.utc).isoformat()
+                },
+                'queued': queued,
+                'granted': {PRIORITY_NAMES[p]: n for p, n in self.granted.items()},
+                'deferred': {PRIORITY_NAMES[p]: n for p, n in self.deferred.items()}
+            }
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+from src.models.feature_engine import FINISHED_STATUS
+
+DAY = 24 * 60 * 60
+
+# Validade das respostas por endpoint, em segundos (None = para sempre, 0 = não guardar)
+DEFAULT_TTLS = {
+    'leagues': 7 * DAY,
+    'teams': 7 * DAY,
+    'fixtures': 10 * 60,          # Jogos não finalizados; jogos finalizados não mudam mais
+    'fixtures/statistics': 10 * 60,  # Jogos em andamento; estatísticas de jogos finalizados não mudam mais
+    'odds': 5 * 60,
+    'odds/bookmakers': 7 * DAY
+}
+
+
+def cache_key(endpoint, params):
+    """Chave canônica de uma requisição: endpoint e parâmetros ordenados, como texto"""
+    items = sorted((str(name), str(value)) for name, value in (params or {}).items())
+    return endpoint.strip('/') + '?' + '&'.join(f'{name}={value}' for name, value in items)
+
+
+def _all_finished(response):
+    """Verifica se todos os jogos de uma resposta do endpoint 'fixtures' estão finalizados"""
+    items = response.get('response') or []
+    return bool(items) and all(
+        (item.get('fixture') or {}).get('status', {}).get('long') == FINISHED_STATUS for item in items)
+
+
+class ResponseCache:
+    """Cache em disco das respostas da API-Football, com validade por endpoint
+
+    Cada resposta fica num arquivo JSON (diretório do endpoint, nome pelo hash da
+    chave canônica) com a chave e a data de gravação; a validade é conferida na
+    leitura, com os TTLs atuais. Respostas com erro ou vazias não são guardadas;
+    respostas marcadas como finais (ex.: estatísticas de um jogo finalizado)
+    valem para sempre. No modo offline as respostas guardadas são devolvidas mesmo vencidas, permitindo
+    repetir uma sincronização sem consumir a cota diária.
+    """
+
+    def __init__(self, directory, ttls=None, offline=False):
+        self.directory = directory
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        endpoint = key.split('?', 1)[0].replace('/', '_')
+        return os.path.join(self.directory, endpoint, hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+    def ttl(self, endpoint, response):
+        """Validade de uma resposta (segundos, None para sempre)"""
+        endpoint = endpoint.strip('/')
+        if endpoint == 'fixtures' and _all_finished(response):
+            return None
+        if endpoint == 'fixtures/statistics' and not response.get('response'):
+            # Estatísticas ainda não publicadas: consultar de novo na próxima vez
+            return 0
+        return self.ttls.get(endpoint, 0)
+
+    def _expired(self, entry, now):
+        if entry.get('final'):
+            return False
+        ttl = self.ttl(entry['endpoint'], entry['response'])
+        return ttl is not None and entry['stored_at'] + ttl <= now
+
+    def get(self, endpoint, params=None):
+        """Retorna a resposta guardada e ainda válida (ou qualquer uma, offline), ou None"""
+        key = cache_key(endpoint, params)
+        try:
+            with open(self._path(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+
+        valid = entry is not None and entry.get('key') == key and (
+            self.offline or not self._expired(entry, time.time()))
+        with self._lock:
+            if valid:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry['response'] if valid else None
+
+    def put(self, endpoint, params, response, final=False):
+        """Guarda uma resposta bem-sucedida, se o endpoint tiver validade
+
+        final indica que a resposta não muda mais (guardada para sempre).
+        """
+        if not isinstance(response, dict) or response.get('errors') or self.ttl(endpoint, response) == 0:
+            return False
+
+        key = cache_key(endpoint, params)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'key': key, 'endpoint': endpoint.strip('/'), 'stored_at': time.time(),
+                       'final': bool(final), 'response': response}, f)
+        os.replace(tmp_path, path)
+        return True
+
+    def purge(self):
+        """Remove do disco as respostas vencidas; retorna quantas foram removidas"""
+        removed = 0
+        now = time.time()
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    with open(path) as f:
+                        expired = self._expired(json.load(f), now)
+                except (OSError, ValueError, KeyError):
+                    expired = True
+                if expired:
+                    os.remove(path)
+                    removed += 1
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
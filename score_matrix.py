@@ -0,0 +1,139 @@
+import numpy as np
+
+# Gols considerados por time; a última linha/coluna acumula "MAX_GOALS ou mais"
+MAX_GOALS = 10
+
+OVER_UNDER_LINES = [0.5, 1.5, 2.5, 3.5, 4.5]
+
+# Linhas de handicap asiático do mandante (inteiras, meias e de quarto)
+ASIAN_HANDICAP_LINES = [line / 4 for line in range(-10, 11)]
+
+# Placares listados no mercado de placar exato (0-0 a 5-5)
+CORRECT_SCORE_MAX = 5
+
+
+def poisson_pmf(rates, max_goals=MAX_GOALS):
+    """Probabilidades de 0..max_goals gols para cada taxa: (n, max_goals + 1)
+
+    A última coluna recebe toda a cauda (max_goals ou mais), então cada linha soma 1.
+    """
+    rates = np.asarray(rates, dtype=float)[:, None]
+    goals = np.arange(max_goals + 1)
+    # log(k!) acumulado, sem depender do scipy
+    log_factorial = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, max_goals + 1)))])
+    with np.errstate(divide='ignore'):
+        pmf = np.exp(goals * np.log(rates) - rates - log_factorial)
+    pmf = np.nan_to_num(pmf)
+    pmf[:, -1] = np.clip(1 - pmf[:, :-1].sum(axis=1), 0, None)
+    return pmf
+
+
+def score_matrix(home_rates, away_rates, max_goals=MAX_GOALS):
+    """Matriz de probabilidades dos placares de vários jogos: (n, gols mandante, gols visitante)
+
+    Supõe gols de mandante e visitante independentes, com distribuição de
+    Poisson de médias home_rates e away_rates.
+    """
+    return poisson_pmf(home_rates, max_goals)[:, :, None] * poisson_pmf(away_rates, max_goals)[:, None, :]
+
+
+def _distribution(matrix, values):
+    """Soma as probabilidades dos placares com o mesmo valor (ex.: saldo ou total de gols)"""
+    n, size = len(matrix), matrix.shape[1]
+    values = values.ravel()
+    offset = values.min()
+    one_hot = np.zeros((size * size, values.max() - offset + 1))
+    one_hot[np.arange(size * size), values - offset] = 1
+    return matrix.reshape(n, -1) @ one_hot, np.arange(offset, values.max() + 1)
+
+
+def goal_difference(matrix):
+    """Distribuição do saldo (mandante - visitante): (probabilidades (n, saldos), saldos)"""
+    goals = np.arange(matrix.shape[1])
+    return _distribution(matrix, goals[:, None] - goals[None, :])
+
+
+def total_goals(matrix):
+    """Distribuição do total de gols: (probabilidades (n, totais), totais)"""
+    goals = np.arange(matrix.shape[1])
+    return _distribution(matrix, goals[:, None] + goals[None, :])
+
+
+def asian_handicap(matrix, lines=ASIAN_HANDICAP_LINES):
+    """Probabilidades equivalentes do handicap asiático do mandante em cada linha: (n, linhas)
+
+    Linhas de quarto dividem a aposta em duas meias-linhas vizinhas. Com p e q
+    as chances médias de ganhar e perder (o empate devolve a aposta), a odd
+    justa é 1 + q / p; a probabilidade equivalente p / (p + q) é o inverso
+    dela, e a do visitante é o complemento. Assim as duas seleções podem ser
+    comparadas com odds como qualquer outro mercado.
+    """
+    probabilities, differences = goal_difference(matrix)
+    lines = np.asarray(lines, dtype=float)
+    # Meias-linhas: iguais à linha, exceto nas linhas de quarto
+    quarter = (lines * 4) % 2 == 1
+    halves = np.stack([lines - 0.25 * quarter, lines + 0.25 * quarter])
+
+    adjusted = differences[None, None, :] + halves[:, :, None]
+    win = probabilities @ (adjusted > 0).reshape(-1, len(differences)).T
+    lose = probabilities @ (adjusted < 0).reshape(-1, len(differences)).T
+    win = win.reshape(len(matrix), 2, len(lines)).mean(axis=1)
+    lose = lose.reshape(len(matrix), 2, len(lines)).mean(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.nan_to_num(win / (win + lose), nan=0.5)
+
+
+def price_markets(matrix):
+    """Calcula, com operações sobre arrays, os mercados de todos os jogos da matriz de placares
+
+    Retorna um dicionário de arrays com um jogo por linha: '1X2' (casa, empate,
+    fora), 'Double Chance' (1X, 12, X2), 'BTTS' (sim, não), 'Over/Under'
+    (jogos, OVER_UNDER_LINES, [over, under]), 'Asian Handicap' (jogos,
+    ASIAN_HANDICAP_LINES, [casa, fora]) e 'Correct Score' (a própria matriz).
+    """
+    differences, difference_values = goal_difference(matrix)
+    totals, total_values = total_goals(matrix)
+
+    home = differences[:, difference_values > 0].sum(axis=1)
+    draw = differences[:, difference_values == 0].sum(axis=1)
+    away = differences[:, difference_values < 0].sum(axis=1)
+
+    # Nenhum dos dois marca = primeira linha ou primeira coluna da matriz
+    btts_no = matrix[:, 0, :].sum(axis=1) + matrix[:, :, 0].sum(axis=1) - matrix[:, 0, 0]
+
+    over = totals @ (total_values[:, None] > np.asarray(OVER_UNDER_LINES)[None, :])
+    handicap = asian_handicap(matrix)
+
+    return {
+        '1X2': np.column_stack([home, draw, away]),
+        'Double Chance': np.column_stack([home + draw, home + away, draw + away]),
+        'BTTS': np.column_stack([1 - btts_no, btts_no]),
+        'Over/Under': np.stack([over, 1 - over], axis=2),
+        'Asian Handicap': np.stack([handicap, 1 - handicap], axis=2),
+        'Correct Score': matrix
+    }
+
+
+def _line(line):
+    """Formata uma linha de handicap com sinal (ex.: -0.25, +1)"""
+    return f'{line:+g}' if line else '0'
+
+
+def to_markets(prices, row):
+    """Converte uma linha de price_markets em {mercado: {seleção: probabilidade}}"""
+    markets = {
+        '1X2': dict(zip(['Home', 'Draw', 'Away'], prices['1X2'][row].tolist())),
+        'Double Chance': dict(zip(['1X', '12', 'X2'], prices['Double Chance'][row].tolist())),
+        'BTTS': dict(zip(['Yes', 'No'], prices['BTTS'][row].tolist()))
+    }
+    for i, line in enumerate(OVER_UNDER_LINES):
+        markets[f'Over/Under {line}'] = dict(zip(['Over', 'Under'], prices['Over/Under'][row, i].tolist()))
+    for i, line in enumerate(ASIAN_HANDICAP_LINES):
+        markets[f'Asian Handicap {_line(line)}'] = dict(zip(['Home', 'Away'], prices['Asian Handicap'][row, i].tolist()))
+
+    scores = prices['Correct Score'][row, :CORRECT_SCORE_MAX + 1, :CORRECT_SCORE_MAX + 1]
+    markets['Correct Score'] = {
+        f'{home}-{away}': float(scores[home, away])
+        for home in range(CORRECT_SCORE_MAX + 1) for away in range(CORRECT_SCORE_MAX + 1)
+    }
+    return markets
@@ -0,0 +1,59 @@
+import numpy as np
+
+# Limites padrão, em fração da banca
+KELLY_FRACTION = 0.25
+MAX_BET = 0.05                # Por aposta
+MAX_FIXTURE_EXPOSURE = 0.10   # Soma das apostas de um mesmo jogo (resultados correlacionados)
+MAX_EXPOSURE = 0.25           # Soma das apostas da rodada
+
+
+def kelly_fractions(probabilities, odds, kelly_fraction=KELLY_FRACTION):
+    """Fração de Kelly (p * odd - 1) / (odd - 1) multiplicada por kelly_fraction
+
+    Retorna 0 onde não há vantagem ou cotação.
+    """
+    probabilities = np.asarray(probabilities, dtype=float)
+    odds = np.asarray(odds, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        kelly = (probabilities * odds - 1) / (odds - 1)
+    return np.clip(np.nan_to_num(kelly * kelly_fraction), 0, None)
+
+
+def _cap_groups(fractions, groups, cap):
+    """Reduz proporcionalmente as frações dos grupos cuja soma ultrapassa cap"""
+    totals = np.bincount(groups, weights=fractions)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scale = np.minimum(1.0, cap / totals)
+    return fractions * np.nan_to_num(scale, nan=1.0)[groups]
+
+
+def allocate(fractions, fixtures, slates=None, max_bet=MAX_BET,
+             max_fixture_exposure=MAX_FIXTURE_EXPOSURE, max_exposure=MAX_EXPOSURE):
+    """Aplica os limites de exposição a um conjunto de apostas simultâneas
+
+    fractions são as frações de Kelly de cada aposta; fixtures e slates são
+    identificadores inteiros (>= 0) do jogo e da rodada de cada aposta (sem
+    slates, todas pertencem à mesma rodada). Cada aposta é limitada a max_bet;
+    depois, os jogos cuja soma passa de max_fixture_exposure e as rodadas cuja
+    soma passa de max_exposure são reduzidos proporcionalmente, preservando a
+    proporção entre as apostas. Tudo é feito com somas por grupo (bincount),
+    sem percorrer as apostas.
+    """
+    fractions = np.minimum(np.asarray(fractions, dtype=float), max_bet)
+    if not fractions.size:
+        return fractions
+    fractions = _cap_groups(fractions, np.asarray(fixtures, dtype=np.int64), max_fixture_exposure)
+    slates = np.zeros(len(fractions), dtype=np.int64) if slates is None else np.asarray(slates, dtype=np.int64)
+    return _cap_groups(fractions, slates, max_exposure)
+
+
+def stake_value_bets(bets, bankroll, kelly_fraction=KELLY_FRACTION, max_bet=MAX_BET,
+                     max_fixture_exposure=MAX_FIXTURE_EXPOSURE, max_exposure=MAX_EXPOSURE):
+    """Calcula o valor a apostar em cada value bet de uma rodada
+
+    bets é o array VALUE_BET_DTYPE de detect_value_bets; retorna os valores,
+    na mesma ordem, em unidades da banca.
+    """
+    fractions = kelly_fractions(bets['probability'], bets['market_odds'], kelly_fraction)
+    return allocate(fractions, bets['fixture'], max_bet=max_bet,
+                    max_fixture_exposure=max_fixture_exposure, max_exposure=max_exposure) * bankroll
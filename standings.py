@@ -0,0 +1,306 @@
+import os
+import pickle
+import threading
+import numpy as np
+from src.models.feature_engine import FINISHED_STATUS, LEAGUE_POSITION_PLACEHOLDER
+
+# Intervalo sem jogos que separa as temporadas de jogos gravados sem temporada (registros antigos)
+SEASON_GAP = np.timedelta64(60, 'D').astype('timedelta64[ns]').astype(np.int64)
+
+
+def _season_array(seasons, n):
+    """Temporadas como float, com NaN onde não houver (None ou ausente)"""
+    if seasons is None:
+        return np.full(n, np.nan)
+    return np.array([np.nan if season is None else season for season in seasons], dtype=float)
+
+
+class SeasonTable:
+    """Tabela acumulada de uma temporada, com uma linha por jogo disputado
+
+    Com previous (a tabela anterior da mesma temporada) e since, as linhas
+    acumuladas dos jogos anteriores a since são reaproveitadas e só as
+    seguintes são recalculadas, desde que os times sejam os mesmos.
+    """
+
+    def __init__(self, dates, home, away, home_goals, away_goals, previous=None, since=None):
+        self.dates = dates
+        self.start = dates[0]
+        self.end = dates[-1]
+        self.teams, team_index = np.unique(np.concatenate([home, away]), return_inverse=True)
+        n_teams = len(self.teams)
+
+        first = 0
+        if previous is not None and since is not None and np.array_equal(previous.teams, self.teams):
+            first = int(np.searchsorted(dates, since, side='left'))
+
+        home_index, away_index = team_index[first:len(home)], team_index[len(home) + first:]
+        home_goals, away_goals = home_goals[first:], away_goals[first:]
+        n_matches = len(home_index)
+        rows = np.arange(n_matches)
+
+        points = np.zeros((n_matches, n_teams), dtype=np.int64)
+        goal_diff = np.zeros((n_matches, n_teams), dtype=np.int64)
+        goals_for = np.zeros((n_matches, n_teams), dtype=np.int64)
+        played = np.zeros((n_matches, n_teams), dtype=np.int64)
+
+        points[rows, home_index] = np.where(home_goals > away_goals, 3, np.where(home_goals == away_goals, 1, 0))
+        points[rows, away_index] = np.where(away_goals > home_goals, 3, np.where(home_goals == away_goals, 1, 0))
+        goal_diff[rows, home_index] = home_goals - away_goals
+        goal_diff[rows, away_index] = away_goals - home_goals
+        goals_for[rows, home_index] = home_goals
+        goals_for[rows, away_index] = away_goals
+        played[rows, home_index] = 1
+        played[rows, away_index] = 1
+
+        # Critérios de desempate (pontos, saldo, gols pró) combinados numa única chave
+        score = points * 10 ** 8 + goal_diff * 10 ** 4 + goals_for
+        if first:
+            head_score, head_played = previous.score[:first + 1], previous.played[:first + 1]
+        else:
+            head_score = head_played = np.zeros((1, n_teams), dtype=np.int64)
+        self.score = np.concatenate([head_score, head_score[-1] + np.cumsum(score, axis=0)])
+        self.played = np.concatenate([head_played, head_played[-1] + np.cumsum(played, axis=0)])
+
+    def positions(self, team_ids, dates):
+        """Retorna a posição de cada time antes de cada data (placeholder se ainda não jogou)"""
+        k = np.searchsorted(self.dates, dates, side='left')
+        column = np.searchsorted(self.teams, team_ids)
+        column = np.minimum(column, len(self.teams) - 1)
+        known = self.teams[column] == team_ids
+
+        score = self.score[k]
+        played = self.played[k] > 0
+        team_score = score[np.arange(len(k)), column]
+        better = ((score > team_score[:, None]) & played).sum(axis=1)
+
+        has_played = known & played[np.arange(len(k)), column]
+        return np.where(has_played, better + 1, LEAGUE_POSITION_PLACEHOLDER)
+
+
+class StandingsEngine:
+    """Classificação incremental por liga e temporada a partir dos resultados dos jogos
+
+    Cada jogo é guardado com a sua temporada (a da API-Football). Um resultado
+    novo ou corrigido invalida apenas a tabela da sua temporada, que na
+    próxima consulta é recompilada a partir da data alterada. Jogos sem
+    temporada (registros antigos) são separados por intervalos longos sem
+    jogos (SEASON_GAP).
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        # (league_id, temporada) -> {fixture_id: (data, mandante, visitante, gols mandante, gols visitante)}
+        self.matches = {}
+        # fixture_id -> (league_id, temporada)
+        self._keys = {}
+        # (league_id, temporada) -> tabelas compiladas, e data a partir da qual precisam ser recompiladas
+        self._tables = {}
+        self._dirty = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_tables'] = {}
+        state['_dirty'] = {}
+        return state
+
+    def __setstate__(self, state):
+        if '_keys' not in state:
+            # Formato anterior: league_id -> {fixture_id: resultado}, sem temporada
+            state['matches'] = {(league_id, None): matches for league_id, matches in state['matches'].items()}
+            state['_keys'] = {fixture_id: key for key, matches in state['matches'].items() for fixture_id in matches}
+            state.pop('_seasons', None)
+            state['_tables'] = {}
+            state['_dirty'] = {}
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _invalidate(self, key, date):
+        self._dirty[key] = min(self._dirty.get(key, date), date)
+
+    def record(self, fixture):
+        """Registra (ou corrige) o resultado de um jogo finalizado"""
+        if (fixture.status != FINISHED_STATUS or
+                fixture.home_goals is None or fixture.away_goals is None):
+            return False
+
+        date = int(np.datetime64(fixture.date, 'ns').astype(np.int64))
+        season = getattr(fixture, 'season', None)
+        key = (fixture.league_id, None if season is None else int(season))
+        result = (date, fixture.home_team_id, fixture.away_team_id, fixture.home_goals, fixture.away_goals)
+        with self._lock:
+            previous_key = self._keys.get(fixture.id)
+            previous = self.matches.get(previous_key, {}).get(fixture.id)
+            if previous_key == key and previous == result:
+                return True
+            if previous is not None:
+                del self.matches[previous_key][fixture.id]
+                self._invalidate(previous_key, previous[0])
+            self.matches.setdefault(key, {})[fixture.id] = result
+            self._keys[fixture.id] = key
+            self._invalidate(key, date)
+        return True
+
+    def rebuild_from(self, engine):
+        """Reconstrói todas as classificações a partir dos jogos finalizados de um FeatureEngine"""
+        finished = engine.finished_fixtures()
+        dates = finished['date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        seasons = _season_array(finished['season'], len(finished))
+        matches = {}
+        keys = {}
+        for fixture_id, league_id, season, date, home, away, home_goals, away_goals in zip(
+                finished['id'], finished['league_id'], seasons, dates,
+                finished['home_team_id'], finished['away_team_id'],
+                finished['home_goals'], finished['away_goals']):
+            key = (int(league_id), None if np.isnan(season) else int(season))
+            matches.setdefault(key, {})[int(fixture_id)] = (
+                int(date), int(home), int(away), int(home_goals), int(away_goals)
+            )
+            keys[int(fixture_id)] = key
+
+        with self._lock:
+            self.matches = matches
+            self._keys = keys
+            self._tables = {}
+            self._dirty = {}
+        return self
+
+    def _compile(self, key, previous, since):
+        """Compila as tabelas de uma temporada (várias, pelos intervalos, para jogos sem temporada)"""
+        records = self.matches.get(key)
+        if not records:
+            return []
+        data = np.array([result + (fixture_id,) for fixture_id, result in records.items()], dtype=np.int64)
+        data = data[np.lexsort((data[:, 5], data[:, 0]))]
+
+        if key[1] is None:
+            breaks = np.flatnonzero(np.diff(data[:, 0]) > SEASON_GAP) + 1
+            return [SeasonTable(chunk[:, 0], chunk[:, 1], chunk[:, 2], chunk[:, 3], chunk[:, 4])
+                    for chunk in np.split(data, breaks)]
+        previous = previous[0] if previous else None
+        return [SeasonTable(data[:, 0], data[:, 1], data[:, 2], data[:, 3], data[:, 4], previous, since)]
+
+    def _league_seasons(self, league_id):
+        """Retorna [(temporada, tabela)] de uma liga, pelo início, recompilando só as temporadas alteradas
+
+        Consulta, compilação e gravação acontecem sob o lock, para que uma
+        invalidação feita por record() não seja sobrescrita por uma tabela antiga.
+        """
+        with self._lock:
+            seasons = []
+            for key in [key for key in self.matches if key[0] == league_id]:
+                if key in self._dirty or key not in self._tables:
+                    self._tables[key] = self._compile(key, self._tables.get(key), self._dirty.pop(key, None))
+                seasons.extend((key[1], table) for table in self._tables[key])
+            return sorted(seasons, key=lambda item: item[1].start)
+
+    def positions(self, league_ids, team_ids, dates, seasons=None):
+        """Retorna a posição de cada time na sua liga antes de cada data
+
+        Com seasons, cada consulta usa a tabela da própria temporada; sem
+        temporada, usa a temporada em andamento na data.
+        """
+        league_ids = np.asarray(league_ids, dtype=np.int64)
+        team_ids = np.asarray(team_ids, dtype=np.int64)
+        dates = np.asarray(dates, dtype='datetime64[ns]').astype(np.int64)
+        seasons = _season_array(seasons, len(team_ids))
+        result = np.full(len(team_ids), LEAGUE_POSITION_PLACEHOLDER, dtype=np.int64)
+
+        for league_id in np.unique(league_ids):
+            rows = np.flatnonzero(league_ids == league_id)
+            league_seasons = self._league_seasons(int(league_id))
+            if not league_seasons:
+                continue
+
+            for season, table in league_seasons:
+                if season is None:
+                    continue
+                selected = rows[seasons[rows] == season]
+                if len(selected):
+                    result[selected] = table.positions(team_ids[selected], dates[selected])
+
+            # Sem temporada: a temporada em andamento em cada data (ou nenhuma, no intervalo entre temporadas)
+            rows = rows[np.isnan(seasons[rows])]
+            tables = [table for _, table in league_seasons]
+            starts = np.array([table.start for table in tables])
+            index = np.searchsorted(starts, dates[rows], side='right') - 1
+            for table_index in np.unique(index[index >= 0]):
+                table = tables[table_index]
+                selected = rows[index == table_index]
+                selected = selected[dates[selected] - table.end <= SEASON_GAP]
+                if len(selected):
+                    result[selected] = table.positions(team_ids[selected], dates[selected])
+
+        return result
+
+    def position(self, league_id, team_id, date, season=None):
+        """Retorna a posição do time T na liga L antes da data D"""
+        return int(self.positions([league_id], [team_id], [date], None if season is None else [season])[0])
+
+    def save(self, path=None):
+        """Persiste as classificações em disco"""
+        path = path or self.path
+        if not path:
+            return False
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self, f)
+        os.replace(tmp_path, path)
+        return True
+
+    @classmethod
+    def load(cls, path):
+        """Carrega as classificações salvas (ou cria vazias se não existirem)"""
+        if os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    standings = pickle.load(f)
+                standings.path = path
+                return standings
+            except Exception as e:
+                print(f"Erro ao carregar classificações: {e}")
+        return cls(path)
+
+
+class RunningStandings:
+    """Classificação corrente de cada liga para leituras em ordem cronológica
+
+    Mantém apenas a temporada em andamento de cada liga (memória proporcional
+    ao número de times), com as mesmas regras de desempate e de separação de
+    temporadas do StandingsEngine.
+    """
+
+    def __init__(self):
+        # league_id -> (temporada, data do último jogo, {time: [pontos, saldo, gols pró]})
+        self.leagues = {}
+
+    def position(self, league_id, team_id, date, season=None):
+        """Retorna a posição do time antes da data (que deve ser >= a última registrada)"""
+        date = np.datetime64(date, 'ns').astype(np.int64)
+        current, last_date, table = self.leagues.get(league_id, (None, None, None))
+        if not table or team_id not in table:
+            return LEAGUE_POSITION_PLACEHOLDER
+        if season is not None and season != current:
+            return LEAGUE_POSITION_PLACEHOLDER
+        if season is None and date - last_date > SEASON_GAP:
+            return LEAGUE_POSITION_PLACEHOLDER
+        team_row = table[team_id]
+        return 1 + sum(1 for row in table.values() if row > team_row)
+
+    def record(self, league_id, date, home_team_id, away_team_id, home_goals, away_goals, season=None):
+        """Acrescenta um resultado (em ordem cronológica) à temporada corrente da liga"""
+        date = np.datetime64(date, 'ns').astype(np.int64)
+        current, last_date, table = self.leagues.get(league_id, (None, None, None))
+        if table is None or season != current or (season is None and date - last_date > SEASON_GAP):
+            table = {}
+
+        for team_id, scored, conceded in ((home_team_id, home_goals, away_goals),
+                                          (away_team_id, away_goals, home_goals)):
+            row = table.setdefault(team_id, [0, 0, 0])
+            row[0] += 3 if scored > conceded else 1 if scored == conceded else 0
+            row[1] += scored - conceded
+            row[2] += scored
+
+        self.leagues[league_id] = (season, date, table)
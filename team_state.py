@@ -0,0 +1,195 @@
+import os
+import pickle
+import threading
+import numpy as np
+from src.models.feature_engine import FORM_WINDOW, FINISHED_STATUS
+
+
+class TeamState:
+    """Buffer circular com os últimos resultados de um time e seus agregados"""
+
+    __slots__ = ('fixture_ids', 'dates', 'points', 'scored', 'conceded',
+                 'head', 'size', 'points_sum', 'scored_sum', 'conceded_sum')
+
+    def __init__(self, window=FORM_WINDOW):
+        self.fixture_ids = np.zeros(window, dtype=np.int64)
+        self.dates = np.zeros(window, dtype='datetime64[s]')
+        self.points = np.zeros(window, dtype=np.int64)
+        self.scored = np.zeros(window, dtype=np.int64)
+        self.conceded = np.zeros(window, dtype=np.int64)
+        self._reset()
+
+    def _reset(self):
+        self.head = 0  # Próxima posição a ser sobrescrita
+        self.size = 0
+        self.points_sum = 0
+        self.scored_sum = 0
+        self.conceded_sum = 0
+
+    def _ordered(self):
+        """Retorna os índices do buffer do resultado mais antigo ao mais recente"""
+        window = len(self.points)
+        return [(self.head - self.size + i) % window for i in range(self.size)]
+
+    def push(self, fixture_id, date, points, scored, conceded):
+        """Adiciona um resultado mais recente que todos os do buffer"""
+        window = len(self.points)
+        if self.size == window:
+            old = self.head
+            self.points_sum -= self.points[old]
+            self.scored_sum -= self.scored[old]
+            self.conceded_sum -= self.conceded[old]
+        else:
+            self.size += 1
+        i = self.head
+        self.fixture_ids[i] = fixture_id
+        self.dates[i] = date
+        self.points[i] = points
+        self.scored[i] = scored
+        self.conceded[i] = conceded
+        self.points_sum += points
+        self.scored_sum += scored
+        self.conceded_sum += conceded
+        self.head = (self.head + 1) % window
+
+    def insert(self, fixture_id, date, points, scored, conceded):
+        """Insere (ou corrige) um resultado fora de ordem mantendo a janela ordenada por data"""
+        date = np.datetime64(date, 's')
+        entries = [(self.dates[i], self.fixture_ids[i], self.points[i], self.scored[i], self.conceded[i])
+                   for i in self._ordered() if self.fixture_ids[i] != fixture_id]
+
+        # Jogo mais antigo que toda a janela cheia não altera a forma recente
+        if len(entries) == len(self.points) and date < entries[0][0]:
+            return
+
+        entries.append((date, fixture_id, points, scored, conceded))
+        entries.sort(key=lambda entry: entry[0])
+        self._reset()
+        for entry_date, entry_id, entry_points, entry_scored, entry_conceded in entries[-len(self.points):]:
+            self.push(entry_id, entry_date, entry_points, entry_scored, entry_conceded)
+
+    def record(self, fixture_id, date, points, scored, conceded):
+        """Registra um resultado, usando o caminho O(1) quando ele é o mais recente"""
+        date = np.datetime64(date, 's')
+        if self.size:
+            last = (self.head - 1) % len(self.points)
+            if date < self.dates[last] or fixture_id in self.fixture_ids[self._ordered()]:
+                self.insert(fixture_id, date, points, scored, conceded)
+                return
+        self.push(fixture_id, date, points, scored, conceded)
+
+    def last_date(self):
+        """Data do resultado mais recente (ou None)"""
+        if not self.size:
+            return None
+        return self.dates[(self.head - 1) % len(self.points)]
+
+    def features(self):
+        """Retorna (forma, média de gols marcados, média de gols sofridos)"""
+        if not self.size:
+            return 0, 0, 0
+        return (int(self.points_sum),
+                float(self.scored_sum) / self.size,
+                float(self.conceded_sum) / self.size)
+
+
+class TeamStateStore:
+    """Armazena o estado recente de cada time para consultas em tempo constante"""
+
+    def __init__(self, path=None, window=FORM_WINDOW):
+        self.path = path
+        self.window = window
+        self.teams = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _team(self, team_id):
+        state = self.teams.get(team_id)
+        if state is None:
+            state = self.teams[team_id] = TeamState(self.window)
+        return state
+
+    def record(self, fixture):
+        """Atualiza o estado dos dois times com um jogo finalizado"""
+        if (fixture.status != FINISHED_STATUS or
+                fixture.home_goals is None or fixture.away_goals is None):
+            return False
+
+        home_goals, away_goals = fixture.home_goals, fixture.away_goals
+        home_points = 3 if home_goals > away_goals else 1 if home_goals == away_goals else 0
+        away_points = 3 if away_goals > home_goals else 1 if home_goals == away_goals else 0
+
+        with self._lock:
+            self._team(fixture.home_team_id).record(fixture.id, fixture.date, home_points, home_goals, away_goals)
+            self._team(fixture.away_team_id).record(fixture.id, fixture.date, away_points, away_goals, home_goals)
+        return True
+
+    def features(self, team_id):
+        """Retorna (forma, média de gols marcados, média de gols sofridos) de um time"""
+        state = self.teams.get(team_id)
+        if state is None:
+            return 0, 0, 0
+        return state.features()
+
+    def is_current(self, team_id, date):
+        """Verifica se o estado do time ainda não inclui jogos a partir de date
+
+        Só nesse caso features(team_id) vale para um jogo nessa data; para jogos
+        já finalizados, o estado inclui o próprio resultado.
+        """
+        state = self.teams.get(team_id)
+        last = state.last_date() if state is not None else None
+        return last is None or last < np.datetime64(date, 's')
+
+    def rebuild_from(self, engine):
+        """Reconstrói o estado a partir do histórico ordenado de um FeatureEngine"""
+        history = engine._history if engine._history is not None else engine._build_history()
+        team = history['team']
+        dates = history['date'].view('datetime64[ns]')
+
+        # Últimas posições de cada grupo (time) no histórico ordenado por data
+        group_end = np.flatnonzero(np.append(team[1:] != team[:-1], True)) + 1 if len(team) else []
+        group_start = np.concatenate([[0], group_end[:-1]]) if len(team) else []
+
+        teams = {}
+        for start, end in zip(group_start, group_end):
+            state = TeamState(self.window)
+            for i in range(max(start, end - self.window), end):
+                state.push(history['fixture_id'][i], dates[i], int(history['points'][i]),
+                           int(history['scored'][i]), int(history['conceded'][i]))
+            teams[int(team[start])] = state
+
+        with self._lock:
+            self.teams = teams
+
+    def save(self, path=None):
+        """Persiste o estado em disco"""
+        path = path or self.path
+        if not path:
+            return False
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self, f)
+        os.replace(tmp_path, path)
+        return True
+
+    @classmethod
+    def load(cls, path):
+        """Carrega o estado salvo (ou cria um vazio se não existir)"""
+        if os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    store = pickle.load(f)
+                store.path = path
+                return store
+            except Exception as e:
+                print(f"Erro ao carregar estado dos times: {e}")
+        return cls(path)
@@ -0,0 +1,31 @@
+import os
+import sys
+import types
+
+import pytest
+from flask import Flask
+
+# Os módulos ficam na raiz do repositório, mas a aplicação os importa como
+# src.models.* e src.routes.*; os pacotes apontam para a raiz
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for name, path in (('src', []), ('src.models', [ROOT]), ('src.routes', [ROOT])):
+    if name not in sys.modules:
+        package = types.ModuleType(name)
+        package.__path__ = path
+        sys.modules[name] = package
+
+from src.models.database import db  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    """Aplicação com banco SQLite em memória e as tabelas criadas"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
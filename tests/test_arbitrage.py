@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from src.models.arbitrage import ArbitrageScanner, find_surebets, stake_split
+from src.models.markets import SELECTIONS, SELECTION_INDEX
+
+YES = SELECTION_INDEX[('BTTS', 'Yes')]
+NO = SELECTION_INDEX[('BTTS', 'No')]
+
+
+def test_stake_split_equalizes_payout():
+    stakes, payout = stake_split([2.1, 2.1], total_stake=100)
+    assert stakes.tolist() == pytest.approx([50, 50])
+    assert payout == pytest.approx(105)
+
+
+def test_update_detects_and_clears_surebet():
+    scanner = ArbitrageScanner()
+    assert scanner.update(1, YES, 8, 1.9, 'Bet365') is None
+
+    surebet = scanner.update(1, NO, 6, 2.3, 'Bwin')
+    assert surebet['market'] == 'BTTS'
+    assert [s['bookmaker'] for s in surebet['selections']] == ['Bet365', 'Bwin']
+    assert surebet['profit'] == pytest.approx((1 / (1 / 1.9 + 1 / 2.3) - 1) * 100)
+
+    # A melhor odd cai: o máximo é recalculado entre as casas restantes
+    scanner.update(1, NO, 8, 2.0)
+    assert scanner.update(1, NO, 6, 1.8) is None
+    assert scanner.surebets() == []
+
+
+def test_withdrawn_quote_falls_back_to_next_bookmaker():
+    scanner = ArbitrageScanner()
+    scanner.update(1, YES, 8, 2.2)
+    scanner.update(1, YES, 6, 2.05)
+    scanner.update(1, NO, 9, 2.1)
+    assert scanner.surebets()[0]['selections'][0]['odds'] == 2.2
+
+    surebet = scanner.update(1, YES, 8, None)
+    assert surebet['selections'][0]['bookmaker'] == 6
+    assert scanner.update(1, YES, 6, float('nan')) is None
+
+
+def test_remove_stops_tracking_fixture():
+    scanner = ArbitrageScanner()
+    scanner.update(1, YES, 8, 2.2)
+    scanner.update(1, NO, 6, 2.2)
+    scanner.update(2, YES, 8, 2.2)
+    scanner.update(2, NO, 6, 2.2)
+
+    scanner.remove(1)
+    assert 1 not in scanner
+    assert sorted(scanner.fixture_ids()) == [2]
+    assert [s['fixture_id'] for s in scanner.surebets()] == [2]
+    assert scanner.surebets(fixture_ids=[1]) == []
+
+
+def test_load_matches_batch_scan():
+    rng = np.random.default_rng(20)
+    odds = rng.uniform(1.5, 4.5, size=(30, len(SELECTIONS), 4))
+    odds[rng.random(odds.shape) < 0.2] = np.nan
+    fixture_ids = list(range(100, 130))
+    bookmaker_ids = [8, 6, 11, 3]
+
+    scanner = ArbitrageScanner()
+    scanner.load(odds, fixture_ids, bookmaker_ids)
+    key = lambda s: (s['fixture_id'], s['market'])
+    expected = sorted(find_surebets(odds, fixture_ids, bookmaker_ids), key=key)
+    actual = sorted(scanner.surebets(), key=key)
+    assert expected
+    assert [key(s) for s in actual] == [key(s) for s in expected]
+    assert [s['profit'] for s in actual] == pytest.approx([s['profit'] for s in expected])
+
+    scaled = scanner.surebets(total_stake=10)
+    assert all(s['total_stake'] == 10 for s in scaled)
@@ -0,0 +1,90 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.models.feature_cache import FeatureCache
+from src.models.feature_engine import FeatureEngine
+from tests.test_feature_engine import random_history
+
+FEATURES = ['f%d' % i for i in range(22)]
+
+
+def engine(fixtures, statistics):
+    return FeatureEngine.from_orm(fixtures, statistics)
+
+
+def test_update_matches_full_build(tmp_path):
+    fixtures, statistics = random_history()
+    cache = FeatureCache(str(tmp_path), FEATURES)
+    assert cache.load() is None
+
+    assert cache.update(engine(fixtures, statistics)) > 0
+    assert cache.update(engine(fixtures, statistics)) == 0
+
+    fixtures[-20].home_goals += 1
+    assert cache.update(engine(fixtures, statistics)) > 0
+
+    expected_ids, expected_X, _ = engine(fixtures, statistics).build()
+    ids, X, y = cache.load()
+    order = np.argsort(ids)
+    np.testing.assert_array_equal(np.asarray(ids)[order], np.sort(expected_ids))
+    np.testing.assert_allclose(np.asarray(X)[order], expected_X[np.argsort(expected_ids)])
+    assert len(cache.load_dates()) == len(ids)
+
+
+def test_crash_mid_update_keeps_previous_generation(tmp_path, monkeypatch):
+    fixtures, statistics = random_history()
+    cache = FeatureCache(str(tmp_path), FEATURES)
+    cache.update(engine(fixtures, statistics))
+    before_ids, before_X, _ = (np.array(a) for a in cache.load())
+
+    fixtures[-20].home_goals += 1
+    calls = []
+    original_save = np.save
+
+    def failing_save(path, values):
+        calls.append(path)
+        if len(calls) == 3:
+            raise OSError('disco cheio')
+        original_save(path, values)
+
+    monkeypatch.setattr(np, 'save', failing_save)
+    with pytest.raises(OSError):
+        cache.update(engine(fixtures, statistics))
+    monkeypatch.undo()
+
+    ids, X, _ = cache.load()
+    np.testing.assert_array_equal(ids, before_ids)
+    np.testing.assert_array_equal(X, before_X)
+
+    # A próxima atualização recupera normalmente
+    assert cache.update(engine(fixtures, statistics)) > 0
+    generations = [entry for entry in os.listdir(tmp_path) if entry.startswith('generation_')]
+    assert len(generations) == 2
+
+
+def test_row_count_mismatch_invalidates(tmp_path):
+    fixtures, statistics = random_history()
+    cache = FeatureCache(str(tmp_path), FEATURES)
+    cache.update(engine(fixtures, statistics))
+
+    meta_path = tmp_path / 'meta.json'
+    meta = json.loads(meta_path.read_text())
+    meta['rows'] += 1
+    meta_path.write_text(json.dumps(meta))
+    assert cache.load() is None
+    assert cache.update(engine(fixtures, statistics)) == meta['rows'] - 1
+
+
+def test_previous_format_is_rebuilt(tmp_path):
+    fixtures, statistics = random_history()
+    cache = FeatureCache(str(tmp_path), FEATURES)
+    np.save(tmp_path / 'ids.npy', np.arange(3))
+    (tmp_path / 'meta.json').write_text(json.dumps({'schema': cache.schema, 'rows': 3}))
+    assert not cache.is_valid()
+
+    cache.update(engine(fixtures, statistics))
+    assert cache.is_valid()
+    assert not (tmp_path / 'ids.npy').exists()
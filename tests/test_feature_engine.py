@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.models.ai_model import BettingModel
+from src.models.feature_engine import FeatureEngine, STAT_COLUMNS, labels_from_goals
+
+POSITION_COLUMNS = [16, 17]
+
+
+def legacy_prepare_data(fixtures, statistics):
+    """Laço original do BettingModel._prepare_data (posição na liga fixa em 10)"""
+    data = []
+    labels = []
+    for fixture in fixtures:
+        if fixture.status != 'Match Finished' or not fixture.home_goals or not fixture.away_goals:
+            continue
+        stats = next((s for s in statistics if s.fixture_id == fixture.id), None)
+        if not stats:
+            continue
+
+        def recent(team_id):
+            played = [f for f in fixtures if (f.home_team_id == team_id or f.away_team_id == team_id) and
+                      f.date < fixture.date and f.status == 'Match Finished']
+            return sorted(played, key=lambda x: x.date, reverse=True)[:5]
+
+        def summary(team_id):
+            form, scored, conceded = 0, [], []
+            for f in recent(team_id):
+                goals, against = (f.home_goals, f.away_goals) if f.home_team_id == team_id else (f.away_goals, f.home_goals)
+                form += 3 if goals > against else 1 if goals == against else 0
+                scored.append(goals)
+                conceded.append(against)
+            return (form, sum(scored) / len(scored) if scored else 0,
+                    sum(conceded) / len(conceded) if conceded else 0)
+
+        home_form, home_scored, home_conceded = summary(fixture.home_team_id)
+        away_form, away_scored, away_conceded = summary(fixture.away_team_id)
+        stats_values = [getattr(stats, column) or (50 if column.endswith('possession') else 0)
+                        for column in STAT_COLUMNS]
+        data.append(stats_values + [home_form, away_form, 10, 10, home_scored, away_scored,
+                                    home_conceded, away_conceded])
+
+        result = 0 if fixture.home_goals > fixture.away_goals else 1 if fixture.home_goals == fixture.away_goals else 2
+        label = [0, 0, 0]
+        label[result] = 1
+        labels.append(label + [int(fixture.home_goals > 0 and fixture.away_goals > 0),
+                               int(fixture.home_goals + fixture.away_goals > 2.5)])
+    return np.array(data), np.array(labels)
+
+
+def random_history(seed=1, n=300, n_teams=12):
+    rng = np.random.default_rng(seed)
+    start = datetime(2023, 8, 1)
+    fixtures, statistics = [], []
+    for i in range(n):
+        home, away = rng.choice(n_teams, 2, replace=False) + 1
+        finished = rng.random() < 0.9
+        fixtures.append(SimpleNamespace(
+            id=i + 1, league_id=1, season=2023, home_team_id=int(home), away_team_id=int(away),
+            date=start + timedelta(days=int(i // 3), hours=int(rng.integers(0, 3)) * 3 + i % 3),
+            status='Match Finished' if finished else 'Not Started',
+            home_goals=int(rng.poisson(1.5)) if finished else None,
+            away_goals=int(rng.poisson(1.1)) if finished else None
+        ))
+        if rng.random() < 0.85:
+            values = {column: (None if rng.random() < 0.1 else int(rng.integers(0, 20))) for column in STAT_COLUMNS}
+            statistics.append(SimpleNamespace(fixture_id=i + 1, **values))
+    return fixtures, statistics
+
+
+def test_matches_legacy_loop():
+    fixtures, statistics = random_history()
+    expected_X, expected_y = legacy_prepare_data(fixtures, statistics)
+
+    ids, X, y = FeatureEngine.from_orm(fixtures, statistics).build()
+    assert len(ids) == len(expected_X) > 100
+    keep = [i for i in range(X.shape[1]) if i not in POSITION_COLUMNS]
+    assert X[:, keep] == pytest.approx(expected_X[:, keep])
+    assert y.tolist() == expected_y.tolist()
+
+
+def test_prepare_data_uses_engine():
+    fixtures, statistics = random_history(seed=2)
+    X, y = BettingModel()._prepare_data(fixtures, statistics)
+    _, expected_X, expected_y = FeatureEngine.from_orm(fixtures, statistics).build()
+    assert np.array_equal(X, expected_X)
+    assert np.array_equal(y, expected_y)
+
+
+def test_include_scoreless():
+    fixtures, statistics = random_history(seed=3)
+    engine = FeatureEngine.from_orm(fixtures, statistics)
+    ids, _, _ = engine.build()
+    all_ids, _, y = engine.build(include_scoreless=True)
+
+    assert set(ids) < set(all_ids)
+    goals = engine.goals(all_ids)
+    assert np.array_equal(y, labels_from_goals(goals[:, 0], goals[:, 1]))
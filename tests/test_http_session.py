@@ -0,0 +1,85 @@
+import pytest
+import requests
+
+from src.models import http_session
+from src.models.http_session import PooledSession
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(http_session.time, 'sleep', sleeps.append)
+    return sleeps
+
+
+def scripted(session, outcomes):
+    """Faz session.get devolver (ou levantar) os resultados em sequência"""
+    calls = []
+
+    def get(url, params=None, timeout=None):
+        calls.append(url)
+        outcome = outcomes[len(calls) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    session.session.get = get
+    return calls
+
+
+def test_retries_server_errors_with_bounded_backoff(sleeps):
+    session = PooledSession(max_retries=3, backoff=0.5, max_backoff=1.0)
+    calls = scripted(session, [FakeResponse(503), FakeResponse(502), FakeResponse(200)])
+
+    assert session.get('http://api/x', endpoint='x').status_code == 200
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 0.5 and 0 <= sleeps[1] <= 1.0
+    assert session.stats()['x']['requests'] == 3
+    assert session.stats()['x']['retries'] == 2
+
+
+def test_honors_retry_after(sleeps):
+    session = PooledSession(max_retries=1, max_backoff=30.0)
+    scripted(session, [FakeResponse(429, {'Retry-After': '7'}), FakeResponse(200)])
+    session.get('http://api/x')
+    assert sleeps == [7.0]
+
+
+def test_returns_last_response_after_max_retries(sleeps):
+    session = PooledSession(max_retries=2)
+    calls = scripted(session, [FakeResponse(500)] * 3)
+    assert session.get('http://api/x').status_code == 500
+    assert len(calls) == 3
+
+
+def test_does_not_retry_client_errors(sleeps):
+    session = PooledSession(max_retries=3)
+    calls = scripted(session, [FakeResponse(404)])
+    assert session.get('http://api/x').status_code == 404
+    assert len(calls) == 1
+    assert sleeps == []
+
+
+def test_retries_connection_errors_then_raises(sleeps):
+    session = PooledSession(max_retries=1)
+    scripted(session, [requests.exceptions.ConnectionError(), requests.exceptions.Timeout()])
+    with pytest.raises(requests.exceptions.Timeout):
+        session.get('http://api/x', endpoint='x')
+    assert session.stats()['x']['errors'] == 2
+
+
+def test_before_retry_can_stop_retries(sleeps):
+    session = PooledSession(max_retries=3)
+    calls = scripted(session, [FakeResponse(503), FakeResponse(200)])
+    responses = []
+    response = session.get('http://api/x', before_retry=lambda: False, on_response=responses.append)
+    assert response.status_code == 503
+    assert len(calls) == 1
+    assert [r.status_code for r in responses] == [503]
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from src.models.ai_model import BettingModel
+from src.models.inference import InferenceEngine, export_inference, verify_inference, VERIFY_TOLERANCE
+from src.models.quantization import QuantizedEngine, export_quantized, load_engine, quantization_report, artifact_size
+from src.models.markets import MARKETS
+
+pytest.importorskip('tensorflow')
+
+N_FEATURES = 22
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(11)
+    X = rng.normal(loc=5, scale=3, size=(300, N_FEATURES))
+    y = np.zeros((300, 5))
+    y[np.arange(300), rng.integers(0, 3, 300)] = 1
+    y[:, 3:] = rng.integers(0, 2, (300, 2))
+    return X, y
+
+
+@pytest.fixture(scope='module')
+def members(data):
+    import tensorflow as tf
+    tf.keras.utils.set_random_seed(14)
+    model = BettingModel()
+    return [model._build_model(N_FEATURES) for _ in range(2)]
+
+
+@pytest.fixture(scope='module')
+def scaler(data):
+    return StandardScaler().fit(data[0])
+
+
+def test_numpy_matches_keras(tmp_path, members, scaler, data):
+    path = str(tmp_path / 'model.npz')
+    export_inference(members[0], scaler, path)
+    engine = InferenceEngine.load(path)
+
+    assert engine.n_members == 1
+    assert verify_inference(members[0], scaler, engine) <= VERIFY_TOLERANCE
+    assert verify_inference(members[0], scaler, engine, X=data[0]) <= VERIFY_TOLERANCE
+    # Saída softmax única sobre as 5 posições
+    assert engine.predict_on_batch(engine.transform(data[0])).sum(axis=1) == pytest.approx(np.ones(300), abs=1e-5)
+
+
+def test_numpy_matches_keras_ensemble(tmp_path, members, scaler, data):
+    path = str(tmp_path / 'ensemble.npz')
+    export_inference(members, scaler, path)
+    engine = InferenceEngine.load(path)
+
+    assert engine.n_members == 2
+    assert verify_inference(members, scaler, engine) <= VERIFY_TOLERANCE
+    expected = np.mean([m.predict_on_batch(scaler.transform(data[0])) for m in members], axis=0)
+    assert engine.predict_on_batch(engine.transform(data[0])) == pytest.approx(expected, abs=VERIFY_TOLERANCE)
+
+
+@pytest.mark.parametrize('dtype, bound', [('float16', 1e-3), ('int8', 2e-2)])
+def test_quantized_error_is_bounded(tmp_path, members, scaler, data, dtype, bound):
+    reference_path = str(tmp_path / 'model.npz')
+    export_inference(members[0], scaler, reference_path)
+    reference = InferenceEngine.load(reference_path)
+
+    path = str(tmp_path / dtype)
+    export_quantized(reference, path, dtype)
+    engine = load_engine(path)
+    assert isinstance(engine, QuantizedEngine)
+    assert engine.dtype == dtype
+    assert artifact_size(path) < artifact_size(reference_path)
+
+    report = quantization_report(reference, engine, *data)
+    for market in MARKETS:
+        assert report[market]['max_abs_diff'] <= bound
+        assert report[market]['quantized']['brier'] == pytest.approx(report[market]['reference']['brier'], abs=bound)
+
+
+def test_missing_artifacts_load_as_none(tmp_path):
+    assert InferenceEngine.load(str(tmp_path / 'missing.npz')) is None
+    assert QuantizedEngine.load(str(tmp_path)) is None
+    with pytest.raises(ValueError):
+        export_quantized(None, str(tmp_path / 'q'), 'int4')
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import numpy as np
+
+from src.models.database import db
+from src.models.markets import SELECTION_INDEX
+from src.models.odds_history import OddsHistoryStore, encode_block, decode_block
+
+HOME = SELECTION_INDEX[('1X2', 'Home')]
+DRAW = SELECTION_INDEX[('1X2', 'Draw')]
+
+
+def test_block_round_trip():
+    rng = np.random.default_rng(18)
+    n = 500
+    series = {
+        'selection': rng.integers(0, 7, n).astype(np.int8),
+        'bookmaker': rng.integers(1, 30, n).astype(np.int32),
+        'timestamp': rng.integers(1_700_000_000, 1_800_000_000, n).astype(np.int64),
+        'price': rng.integers(1010, 20000, n).astype(np.int32)
+    }
+    decoded = decode_block(encode_block(series))
+
+    order = np.lexsort((series['timestamp'], series['bookmaker'], series['selection']))
+    for name in series:
+        assert decoded[name].tolist() == series[name][order].tolist()
+
+
+def test_empty_block():
+    assert len(decode_block(b'')['timestamp']) == 0
+    assert len(decode_block(encode_block(decode_block(b'')))['price']) == 0
+
+
+def test_append_skips_repeated_prices(app):
+    store = OddsHistoryStore()
+    t0 = datetime(2024, 5, 1, 12)
+    assert store.append({1: [(t0, HOME, 8, 2.1), (t0, DRAW, 8, 3.3)]}) == 2
+    db.session.commit()
+
+    later = datetime(2024, 5, 1, 13)
+    assert store.append({1: [(later, HOME, 8, 2.1), (later, DRAW, 8, 3.25)]}) == 1
+    db.session.commit()
+
+    series = store.series(1)
+    assert len(series['timestamp']) == 3
+    assert sorted(series['price'].tolist()) == [2.1, 3.25, 3.3]
+
+
+def test_as_of_returns_prices_in_effect(app):
+    store = OddsHistoryStore()
+    store.append({
+        1: [(datetime(2024, 5, 1, 10), HOME, 8, 2.0),
+            (datetime(2024, 5, 1, 12), HOME, 8, 2.2),
+            (datetime(2024, 5, 1, 11), HOME, 6, 1.9)],
+        2: [(datetime(2024, 5, 1, 11), DRAW, 6, 3.1)]
+    })
+    db.session.commit()
+
+    odds, bookmakers = store.as_of([1, 2, 3], datetime(2024, 5, 1, 11, 30))
+    assert bookmakers == ['6', '8']
+    assert odds.shape == (3, 7, 2)
+    assert odds[0, HOME].tolist() == [1.9, 2.0]
+    assert odds[1, DRAW, 0] == 3.1
+    assert np.isnan(odds[2]).all()
+
+    # Um instante por jogo; antes da primeira cotação não há odds
+    odds, _ = store.as_of([1, 2], [datetime(2024, 5, 1, 13), datetime(2024, 5, 1, 10)])
+    assert odds[0, HOME].tolist() == [1.9, 2.2]
+    assert np.isnan(odds[1]).all()
+
+
+def test_opening_closing(app):
+    store = OddsHistoryStore()
+    store.append({1: [(datetime(2024, 5, 1, 10), HOME, 8, 2.0),
+                      (datetime(2024, 5, 1, 12), HOME, 8, 2.2),
+                      (datetime(2024, 5, 1, 16), HOME, 8, 2.5)]})
+    db.session.commit()
+
+    opening, closing, bookmakers = store.opening_closing([1], [datetime(2024, 5, 1, 15)])
+    assert bookmakers == ['8']
+    assert opening[0, HOME, 0] == 2.0
+    assert closing[0, HOME, 0] == 2.2
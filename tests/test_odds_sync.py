@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.models.database import db
+from src.models.models import League, Team, Fixture, Odds
+from src.models.api_client import DataManager
+from src.models.fake_api import FakeFootballAPI
+from src.models.markets import SELECTION_INDEX
+from src.models.odds import latest_odds, odds_updated_at
+
+FIXTURE_API_ID = 1001
+
+
+@pytest.fixture
+def fixture(app):
+    league = League(api_id=39, name='Premier League', season=2024)
+    home, away = Team(api_id=101, name='Home FC'), Team(api_id=102, name='Away FC')
+    db.session.add_all([league, home, away])
+    db.session.flush()
+    fixture = Fixture(api_id=FIXTURE_API_ID, league_id=league.id, home_team_id=home.id, away_team_id=away.id,
+                      date=datetime.utcnow() + timedelta(days=1), status='Not Started')
+    db.session.add(fixture)
+    db.session.commit()
+    return fixture
+
+
+@pytest.fixture
+def api():
+    api = FakeFootballAPI()
+    api.add_odds(FIXTURE_API_ID, 8, 'Bet365', {
+        'Match Winner': {'Home': 2.1, 'Draw': 3.3, 'Away': 3.6},
+        'Goals Over/Under': {'Over 2.5': 1.9, 'Under 2.5': 1.95}
+    })
+    api.add_odds(FIXTURE_API_ID, 6, 'Bwin', {
+        'Match Winner': {'Home': 2.2, 'Draw': 3.2, 'Away': 3.4},
+        'Both Teams Score': {'Yes': 1.8, 'No': 2.0}
+    })
+    return api
+
+
+def test_sync_odds_then_latest_odds(fixture, api):
+    manager = DataManager('fake', api=api)
+
+    assert manager.sync_odds(fixture_id=FIXTURE_API_ID) == 10
+    assert api.calls == [('odds', {'page': 1, 'fixture': FIXTURE_API_ID})]
+
+    odds, bookmakers = latest_odds([fixture.id])
+    assert odds.shape == (1, len(SELECTION_INDEX), 2)
+    # Casas ordenadas pelo id da API
+    assert bookmakers == ['Bwin', 'Bet365']
+    assert odds[0, SELECTION_INDEX[('1X2', 'Home')]].tolist() == [2.2, 2.1]
+    assert odds[0, SELECTION_INDEX[('Over/Under 2.5', 'Over')]].tolist()[1] == 1.9
+    assert np.isnan(odds[0, SELECTION_INDEX[('Over/Under 2.5', 'Over')], 0])
+    assert np.isnan(odds[0, SELECTION_INDEX[('BTTS', 'Yes')], 1])
+
+
+def test_sync_odds_updates_changed_prices(fixture, api):
+    manager = DataManager('fake', api=api)
+    manager.sync_odds(fixture_id=FIXTURE_API_ID)
+
+    api.add_odds(FIXTURE_API_ID, 8, 'Bet365', {
+        'Match Winner': {'Home': 2.3, 'Draw': 3.3, 'Away': 3.6},
+        'Goals Over/Under': {'Over 2.5': 1.9, 'Under 2.5': 1.95}
+    })
+    assert manager.sync_odds(fixture_id=FIXTURE_API_ID) == 1
+    assert Odds.query.count() == 10
+
+    odds, bookmakers = latest_odds([fixture.id])
+    assert odds[0, SELECTION_INDEX[('1X2', 'Home')], bookmakers.index('Bet365')] == 2.3
+
+
+def test_scanner_reloads_quotes_saved_by_another_process(fixture, api):
+    # Dois processos: cada DataManager tem o seu índice de arbitragem
+    worker_a, worker_b = DataManager('fake', api=api), DataManager('fake', api=api)
+    worker_a.sync_odds(fixture_id=FIXTURE_API_ID)
+    assert worker_a.arbitrage.is_current(fixture.id, odds_updated_at([fixture.id])[fixture.id])
+
+    odds, bookmakers, bookmaker_ids = latest_odds([fixture.id], with_ids=True)
+    worker_b.arbitrage.load(odds, [fixture.id], bookmaker_ids, bookmakers, as_of=datetime.utcnow())
+    assert worker_b.arbitrage.is_current(fixture.id, odds_updated_at([fixture.id])[fixture.id])
+
+    api.add_odds(FIXTURE_API_ID, 8, 'Bet365', {
+        'Match Winner': {'Home': 2.3, 'Draw': 3.3, 'Away': 3.6},
+        'Goals Over/Under': {'Over 2.5': 1.9, 'Under 2.5': 1.95}
+    })
+    worker_a.sync_odds(fixture_id=FIXTURE_API_ID)
+    assert not worker_b.arbitrage.is_current(fixture.id, odds_updated_at([fixture.id])[fixture.id])
+
+    # A sincronização do outro processo recarrega o jogo desatualizado antes de aplicar as
+    # cotações recebidas (aqui, só as da Bwin): a melhor odd do mandante vem do banco
+    home = SELECTION_INDEX[('1X2', 'Home')]
+    worker_b.api = FakeFootballAPI()
+    worker_b.api.add_odds(FIXTURE_API_ID, 6, 'Bwin', {
+        'Match Winner': {'Home': 2.2, 'Draw': 3.2, 'Away': 3.4},
+        'Both Teams Score': {'Yes': 1.8, 'No': 2.0}
+    })
+    worker_b.sync_odds(fixture_id=FIXTURE_API_ID)
+    assert worker_b.arbitrage.is_current(fixture.id, odds_updated_at([fixture.id])[fixture.id])
+    assert worker_b.arbitrage._best[fixture.id][home] == 2.3
@@ -0,0 +1,70 @@
+import threading
+import time
+
+from src.models.request_scheduler import RequestScheduler, TokenBucket, LIVE, UPCOMING, BACKFILL
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def release(scheduler, tokens):
+    with scheduler._condition:
+        scheduler.minute.tokens = tokens
+        scheduler._condition.notify_all()
+
+
+def test_grants_by_priority_then_arrival():
+    scheduler = RequestScheduler()
+    # Balde vazio que praticamente não se reabastece
+    scheduler.minute = TokenBucket(10, period=10 ** 9)
+    scheduler.minute.tokens = 0
+
+    granted = []
+    threads = []
+    for name, priority in (('backfill', BACKFILL), ('upcoming-1', UPCOMING), ('live', LIVE), ('upcoming-2', UPCOMING)):
+        thread = threading.Thread(target=lambda n=name, p=priority: scheduler.acquire(p) and granted.append(n))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: len(scheduler._queue) == len(threads))
+
+    for i in range(len(threads)):
+        release(scheduler, 1)
+        wait_until(lambda: len(granted) == i + 1)
+    for thread in threads:
+        thread.join()
+
+    assert granted == ['live', 'upcoming-1', 'upcoming-2', 'backfill']
+    assert scheduler.stats()['granted'] == {'live': 1, 'upcoming': 2, 'backfill': 1}
+
+
+def test_backfill_leaves_daily_reserve():
+    scheduler = RequestScheduler(per_day=10)
+    for _ in range(9):
+        assert scheduler.acquire(BACKFILL, timeout=1)
+
+    # Só resta a reserva (10% da cota): o backfill não a usa, as demais prioridades sim
+    assert not scheduler.acquire(BACKFILL, timeout=0.05)
+    assert scheduler.acquire(UPCOMING, timeout=1)
+    assert scheduler.stats()['deferred']['backfill'] == 1
+
+
+def test_fails_fast_when_daily_quota_is_exhausted():
+    scheduler = RequestScheduler(per_day=1)
+    assert scheduler.acquire(LIVE, timeout=1)
+
+    start = time.monotonic()
+    assert not scheduler.acquire(LIVE, timeout=30)
+    assert time.monotonic() - start < 1
+    assert scheduler.stats()['deferred']['live'] == 1
+
+
+def test_syncs_limits_from_headers():
+    scheduler = RequestScheduler(per_day=100)
+    scheduler.update({'x-ratelimit-requests-limit': '100', 'x-ratelimit-requests-remaining': '0',
+                      'x-ratelimit-limit': '30', 'x-ratelimit-remaining': '29'})
+    assert scheduler.minute.capacity == 30
+    assert not scheduler.acquire(UPCOMING, timeout=0.05)
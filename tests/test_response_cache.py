@@ -0,0 +1,65 @@
+import pytest
+
+from src.models import response_cache
+from src.models.fake_api import FakeFootballAPI
+from src.models.response_cache import ResponseCache
+
+FINISHED = {'response': [{'fixture': {'id': 1, 'status': {'long': 'Match Finished'}}}]}
+SCHEDULED = {'response': [{'fixture': {'id': 2, 'status': {'long': 'Not Started'}}}]}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = {'now': 1_700_000_000.0}
+    monkeypatch.setattr(response_cache.time, 'time', lambda: clock['now'])
+    return clock
+
+
+def test_ttl_expiry(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path), ttls={'odds': 60})
+    assert cache.put('odds', {'fixture': 1}, {'response': [1]})
+    assert cache.get('odds', {'fixture': 1}) == {'response': [1]}
+
+    clock['now'] += 61
+    assert cache.get('odds', {'fixture': 1}) is None
+    assert cache.stats() == {'hits': 1, 'misses': 1}
+    assert cache.purge() == 1
+
+
+def test_finished_fixtures_never_expire(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path))
+    cache.put('fixtures', {'league': 39}, FINISHED)
+    cache.put('fixtures', {'league': 40}, SCHEDULED)
+    cache.put('fixtures/statistics', {'fixture': 3}, {'response': [{'team': {'id': 1}}]}, final=True)
+
+    clock['now'] += 365 * response_cache.DAY
+    assert cache.get('fixtures', {'league': 39}) == FINISHED
+    assert cache.get('fixtures', {'league': 40}) is None
+    assert cache.get('fixtures/statistics', {'fixture': 3}) is not None
+
+
+def test_does_not_store_errors_or_missing_statistics(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    assert not cache.put('odds', {}, {'errors': {'rateLimit': 'Too many requests'}})
+    assert not cache.put('fixtures/statistics', {'fixture': 3}, {'response': []})
+    assert not cache.put('unknown', {}, {'response': [1]})
+
+
+def test_key_ignores_parameter_order(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put('odds', {'league': 39, 'season': 2024}, {'response': [1]})
+    assert cache.get('/odds', {'season': '2024', 'league': '39'}) == {'response': [1]}
+
+
+def test_offline_replay(tmp_path, clock):
+    online = FakeFootballAPI(cache_dir=str(tmp_path))
+    online.register('odds', {'fixture': 1, 'page': 1}, {'response': [{'fixture': {'id': 1}}]})
+    assert online.get_odds(fixture_id=1) is not None
+    assert len(online.calls) == 1
+
+    # Offline, a resposta guardada é devolvida mesmo vencida, sem chamar a API
+    clock['now'] += response_cache.DAY
+    offline = FakeFootballAPI(cache_dir=str(tmp_path), offline=True)
+    assert offline.get_odds(fixture_id=1) == {'response': [{'fixture': {'id': 1}}]}
+    assert offline.get_odds(fixture_id=2) is None
+    assert offline.calls == []
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from src.models.score_matrix import (score_matrix, price_markets, to_markets, asian_handicap,
+                                     OVER_UNDER_LINES)
+
+RATES = (np.array([0.3, 1.4, 2.1, 4.0]), np.array([0.5, 1.1, 0.9, 3.5]))
+
+
+def test_matrix_sums_to_one():
+    matrix = score_matrix(*RATES)
+    assert matrix.shape == (4, 11, 11)
+    assert matrix.sum(axis=(1, 2)) == pytest.approx(np.ones(4))
+    assert (matrix >= 0).all()
+
+
+def test_markets_are_consistent():
+    prices = price_markets(score_matrix(*RATES))
+
+    assert prices['1X2'].sum(axis=1) == pytest.approx(np.ones(4))
+    assert prices['BTTS'].sum(axis=1) == pytest.approx(np.ones(4))
+    assert prices['Over/Under'].sum(axis=2) == pytest.approx(np.ones((4, len(OVER_UNDER_LINES))))
+    home, draw, away = prices['1X2'].T
+    assert prices['Double Chance'] == pytest.approx(np.column_stack([home + draw, home + away, draw + away]))
+    # Over cai a cada linha
+    assert (np.diff(prices['Over/Under'][:, :, 0], axis=1) <= 0).all()
+    # Mais gols esperados do mandante, mais chance de vitória
+    assert prices['1X2'][2, 0] > prices['1X2'][0, 0]
+
+
+def test_over_under_matches_poisson_total():
+    # A soma de Poissons independentes é Poisson de taxa somada
+    prices = price_markets(score_matrix(np.array([1.2]), np.array([0.8])))
+    rate = 2.0
+    p_at_most_2 = np.exp(-rate) * (1 + rate + rate ** 2 / 2)
+    assert prices['Over/Under'][0, OVER_UNDER_LINES.index(2.5), 1] == pytest.approx(p_at_most_2)
+
+
+def test_asian_handicap():
+    matrix = score_matrix(*RATES)
+    prices = price_markets(matrix)
+    home, draw, away = prices['1X2'].T
+
+    handicap = asian_handicap(matrix, lines=[0.0, -0.5, 0.5])
+    # Linha 0 devolve a aposta no empate; -0.5 equivale à vitória do mandante
+    assert handicap[:, 0] == pytest.approx(home / (home + away))
+    assert handicap[:, 1] == pytest.approx(home)
+    assert handicap[:, 2] == pytest.approx(home + draw)
+
+
+def test_to_markets():
+    prices = price_markets(score_matrix(*RATES))
+    markets = to_markets(prices, 1)
+    assert sum(markets['1X2'].values()) == pytest.approx(1)
+    assert markets['Over/Under 2.5']['Over'] == pytest.approx(prices['Over/Under'][1, 2, 0])
+    assert markets['Asian Handicap 0']['Home'] + markets['Asian Handicap 0']['Away'] == pytest.approx(1)
+    assert markets['Correct Score']['1-0'] == pytest.approx(prices['Correct Score'][1, 1, 0])
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from src.models.staking import allocate, kelly_fractions, stake_value_bets
+from src.models.value_bets import VALUE_BET_DTYPE
+
+
+def test_kelly_fractions():
+    fractions = kelly_fractions([0.5, 0.4, 0.5], [3.0, 2.0, np.nan], kelly_fraction=0.5)
+    # (0.5 * 3 - 1) / 2 * 0.5; sem vantagem ou sem cotação, 0
+    assert fractions.tolist() == [0.125, 0.0, 0.0]
+
+
+def test_caps_each_bet():
+    stakes = allocate([0.2, 0.01], fixtures=[0, 1], max_bet=0.05, max_fixture_exposure=1, max_exposure=1)
+    assert stakes.tolist() == [0.05, 0.01]
+
+
+def test_caps_fixture_exposure_proportionally():
+    stakes = allocate([0.04, 0.02, 0.03], fixtures=[0, 0, 1], max_bet=0.05,
+                      max_fixture_exposure=0.03, max_exposure=1)
+    assert stakes == pytest.approx([0.02, 0.01, 0.03])
+
+
+def test_caps_slate_exposure():
+    fractions = np.full(10, 0.05)
+    fixtures = np.arange(10)
+    slates = np.repeat([0, 1], 5)
+    stakes = allocate(fractions, fixtures, slates, max_bet=0.05, max_fixture_exposure=0.1, max_exposure=0.2)
+    assert np.bincount(slates, weights=stakes) == pytest.approx([0.2, 0.2])
+    assert stakes == pytest.approx(np.full(10, 0.04))
+
+
+def test_empty():
+    assert allocate([], []).size == 0
+
+
+def test_stake_value_bets_in_bankroll_units():
+    bets = np.zeros(2, dtype=VALUE_BET_DTYPE)
+    bets['fixture'] = [0, 0]
+    bets['probability'] = [0.6, 0.6]
+    bets['market_odds'] = [2.5, 2.5]
+    stakes = stake_value_bets(bets, bankroll=1000, kelly_fraction=1.0, max_bet=0.05, max_fixture_exposure=0.08)
+    assert stakes == pytest.approx([40.0, 40.0])
@@ -0,0 +1,119 @@
+import pickle
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.models.standings import StandingsEngine, RunningStandings, SeasonTable
+from src.models.feature_engine import LEAGUE_POSITION_PLACEHOLDER
+
+
+def result(fixture_id, date, home, away, home_goals, away_goals, season=2024, league_id=1):
+    return SimpleNamespace(id=fixture_id, league_id=league_id, season=season, date=date, status='Match Finished',
+                           home_team_id=home, away_team_id=away, home_goals=home_goals, away_goals=away_goals)
+
+
+def random_season(rng, n=120, n_teams=8, season=2024, start=datetime(2024, 8, 1), first_id=1):
+    fixtures = []
+    for i in range(n):
+        home, away = rng.choice(n_teams, 2, replace=False) + 1
+        fixtures.append(result(first_id + i, start + timedelta(days=i // 2), int(home), int(away),
+                               int(rng.poisson(1.4)), int(rng.poisson(1.1)), season))
+    return fixtures
+
+
+def all_positions(standings, fixtures):
+    league_ids = [f.league_id for f in fixtures] * 2
+    team_ids = [f.home_team_id for f in fixtures] + [f.away_team_id for f in fixtures]
+    dates = [f.date for f in fixtures] * 2
+    seasons = [f.season for f in fixtures] * 2
+    return standings.positions(league_ids, team_ids, dates, seasons)
+
+
+def rebuilt(fixtures):
+    standings = StandingsEngine()
+    for fixture in fixtures:
+        standings.record(fixture)
+    return standings
+
+
+def test_incremental_recompile_matches_full_compile():
+    rng = np.random.default_rng(4)
+    fixtures = random_season(rng)
+    standings = rebuilt(fixtures[:100])
+    all_positions(standings, fixtures)
+
+    # Resultado corrigido no meio da temporada e jogos novos no fim
+    fixtures[60] = result(61, fixtures[60].date, fixtures[60].home_team_id, fixtures[60].away_team_id, 5, 0)
+    for fixture in [fixtures[60]] + fixtures[100:]:
+        standings.record(fixture)
+
+    assert np.array_equal(all_positions(standings, fixtures), all_positions(rebuilt(fixtures), fixtures))
+
+
+def test_recompile_reuses_rows_before_change():
+    rng = np.random.default_rng(5)
+    fixtures = random_season(rng)
+    full = rebuilt(fixtures)
+    previous = full._league_seasons(1)[0][1]
+
+    arrays = [np.array([getattr(f, name) for f in fixtures], dtype=np.int64)
+              for name in ('home_team_id', 'away_team_id', 'home_goals', 'away_goals')]
+    reused = SeasonTable(previous.dates, *arrays, previous=previous, since=previous.dates[50])
+    assert np.array_equal(reused.score, previous.score)
+    assert np.array_equal(reused.played, previous.played)
+
+
+def test_seasons_are_separated_by_stored_season():
+    standings = StandingsEngine()
+    standings.record(result(1, datetime(2024, 5, 1), 1, 2, 3, 0, season=2023))
+    # Nova temporada sem intervalo longo desde o último jogo
+    standings.record(result(2, datetime(2024, 5, 10), 3, 4, 1, 0, season=2024))
+
+    assert standings.position(1, 1, datetime(2024, 5, 5), season=2023) == 1
+    assert standings.position(1, 2, datetime(2024, 5, 20), season=2024) == LEAGUE_POSITION_PLACEHOLDER
+    assert standings.position(1, 3, datetime(2024, 5, 20), season=2024) == 1
+    assert standings.position(1, 4, datetime(2024, 5, 20), season=2024) == 2
+
+
+def test_moved_fixture_leaves_previous_season():
+    standings = StandingsEngine()
+    standings.record(result(1, datetime(2024, 5, 1), 1, 2, 3, 0, season=2023))
+    standings.record(result(1, datetime(2024, 9, 1), 1, 2, 3, 0, season=2024))
+
+    assert standings.position(1, 1, datetime(2024, 6, 1), season=2023) == LEAGUE_POSITION_PLACEHOLDER
+    assert standings.position(1, 1, datetime(2024, 9, 2), season=2024) == 1
+
+
+def test_running_standings_match_engine():
+    rng = np.random.default_rng(6)
+    fixtures = random_season(rng, season=2023, start=datetime(2023, 8, 1))
+    fixtures += random_season(rng, season=2024, start=fixtures[-1].date + timedelta(days=7), first_id=1000)
+    standings = rebuilt(fixtures)
+
+    running = RunningStandings()
+    expected = all_positions(standings, fixtures)
+    actual = []
+    for date in sorted({fixture.date for fixture in fixtures}):
+        # Como no FixtureStream: resultados do mesmo instante entram depois de todas as consultas
+        same_date = [fixture for fixture in fixtures if fixture.date == date]
+        for fixture in same_date:
+            actual.append((running.position(1, fixture.home_team_id, date, fixture.season),
+                           running.position(1, fixture.away_team_id, date, fixture.season)))
+        for fixture in same_date:
+            running.record(1, date, fixture.home_team_id, fixture.away_team_id,
+                           fixture.home_goals, fixture.away_goals, fixture.season)
+    actual = np.array(actual)
+    assert np.array_equal(np.concatenate([actual[:, 0], actual[:, 1]]), expected)
+
+
+def test_loads_previous_format():
+    standings = StandingsEngine()
+    standings.record(result(1, datetime(2024, 5, 1), 1, 2, 3, 0, season=None))
+    state = standings.__getstate__()
+    legacy = {'path': None, 'matches': {1: state['matches'][(1, None)]}, '_seasons': {}}
+
+    loaded = StandingsEngine.__new__(StandingsEngine)
+    loaded.__setstate__(legacy)
+    assert loaded.position(1, 1, datetime(2024, 5, 2)) == 1
+    assert pickle.loads(pickle.dumps(loaded)).position(1, 2, datetime(2024, 5, 2)) == 2
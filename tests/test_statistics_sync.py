@@ -0,0 +1,72 @@
+from datetime import datetime
+
+import pytest
+
+from src.models.database import db
+from src.models.models import League, Team, Fixture, FixtureStatistics
+from src.models.api_client import DataManager
+from src.models.fake_api import FakeFootballAPI
+
+HOME, AWAY = 101, 102
+
+
+def statistics_response(home_shots, away_shots):
+    return {'response': [
+        {'team': {'id': HOME}, 'statistics': [{'type': 'Total Shots', 'value': home_shots},
+                                              {'type': 'Ball Possession', 'value': '58%'}]},
+        {'team': {'id': AWAY}, 'statistics': [{'type': 'Total Shots', 'value': away_shots},
+                                              {'type': 'Ball Possession', 'value': '42%'}]}
+    ]}
+
+
+@pytest.fixture
+def fixtures(app):
+    league = League(api_id=39, name='Premier League', season=2024)
+    home, away = Team(api_id=HOME, name='Home FC'), Team(api_id=AWAY, name='Away FC')
+    db.session.add_all([league, home, away])
+    db.session.flush()
+    fixtures = {
+        api_id: Fixture(api_id=api_id, league_id=league.id, home_team_id=home.id, away_team_id=away.id,
+                        date=datetime(2024, 5, 1), status='Match Finished', home_goals=1, away_goals=0)
+        for api_id in (2001, 2002, 2003, 2004)
+    }
+    db.session.add_all(fixtures.values())
+    db.session.commit()
+    return fixtures
+
+
+@pytest.fixture
+def api():
+    api = FakeFootballAPI()
+    api.register('fixtures/statistics', {'fixture': 2001}, statistics_response(12, 7))
+    api.register('fixtures/statistics', {'fixture': 2002}, {'response': []})
+    api.register('fixtures/statistics', {'fixture': 2004}, {'response': [{'team': None}]})
+    return api
+
+
+def test_reports_each_failure(fixtures, api):
+    result = DataManager('fake', api=api).sync_statistics_for([2001, 2002, 2003, 2004, 9999, 2001])
+
+    assert result['synced'] == [2001]
+    assert set(result['failed']) == {2002, 2003, 2004, 9999}
+    assert result['failed'][2002] == 'Estatísticas indisponíveis'
+    assert result['failed'][2003] == 'Falha na requisição (ou cota esgotada)'
+    assert result['failed'][2004].startswith('Erro:')
+    assert result['failed'][9999] == 'Jogo não encontrado'
+    # Ids repetidos são consultados uma única vez
+    assert sorted(params['fixture'] for _, params in api.calls) == [2001, 2002, 2003, 2004]
+
+    stats = FixtureStatistics.query.one()
+    assert stats.fixture_id == fixtures[2001].id
+    assert (stats.home_shots, stats.away_shots) == (12, 7)
+    assert (stats.home_possession, stats.away_possession) == (58.0, 42.0)
+
+
+def test_updates_existing_statistics(fixtures, api):
+    manager = DataManager('fake', api=api)
+    manager.sync_statistics_for([2001])
+    api.register('fixtures/statistics', {'fixture': 2001}, statistics_response(14, 7))
+
+    assert manager.sync_statistics_for([2001]) == {'synced': [2001], 'failed': {}}
+    assert FixtureStatistics.query.count() == 1
+    assert FixtureStatistics.query.one().home_shots == 14
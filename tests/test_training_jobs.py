@@ -0,0 +1,57 @@
+import threading
+from datetime import datetime
+
+from src.models import training_jobs
+from src.models.training_jobs import TrainingJobManager
+
+
+def blocking_task(release):
+    def task(job):
+        release.wait(5)
+        return {'success': True, 'message': 'ok'}
+    return task
+
+
+def test_queued_jobs_report_position():
+    manager = TrainingJobManager(max_workers=1)
+    release = threading.Event()
+    first, _ = manager.submit('model_search', blocking_task(release))
+    second, _ = manager.submit('betting_model', blocking_task(release))
+    third, _ = manager.submit('backtest', blocking_task(release))
+
+    assert manager.jobs_ahead(second) == 1
+    assert manager.jobs_ahead(third) == 2
+    assert manager.status(third)['jobs_ahead'] == 2
+
+    release.set()
+    manager.executor.shutdown(wait=True)
+    assert all(job.status == 'completed' for job in (first, second, third))
+    assert manager.jobs_ahead(third) is None
+
+
+def test_duplicate_model_returns_active_job():
+    manager = TrainingJobManager(max_workers=1)
+    release = threading.Event()
+    job, created = manager.submit('betting_model', blocking_task(release))
+    again, created_again = manager.submit('betting_model', blocking_task(release))
+    assert created and not created_again and again is job
+    release.set()
+    manager.executor.shutdown(wait=True)
+
+
+def test_finished_jobs_are_evicted(monkeypatch):
+    monkeypatch.setattr(training_jobs, 'MAX_FINISHED_JOBS', 3)
+    manager = TrainingJobManager(max_workers=1)
+    finished = []
+    for i in range(5):
+        job, _ = manager.submit(f'model_{i}', lambda job: {'success': True})
+        manager.executor.submit(lambda: None).result()
+        finished.append(job)
+
+    manager.get(finished[-1].id)
+    assert set(manager.jobs) == {job.id for job in finished[-3:]}
+
+    # Finalizados há mais tempo que o TTL também saem
+    finished[-1].finished_at = datetime.utcnow() - training_jobs.FINISHED_JOB_TTL * 2
+    assert manager.get(finished[-1].id) is None
+    assert len(manager.jobs) == 2
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from src.models.ai_model import BettingModel
+from src.models.markets import SELECTIONS, to_prediction, selection_matrix, odds_matrix
+from src.models.value_bets import detect_value_bets, value_bets_to_dicts
+
+
+def legacy_value_bets(prediction, odds):
+    """Regra original (dicionários): odd de mercado acima da odd implícita com 10% de margem"""
+    value_bets = []
+    for market in odds:
+        for selection, market_odds in odds[market].items():
+            probability = prediction.get(market, {}).get(selection)
+            if probability is None:
+                continue
+            implied = 1 / probability if probability > 0 else float('inf')
+            if market_odds > implied * 1.1:
+                value_bets.append({
+                    'market': market,
+                    'selection': selection,
+                    'implied_odds': implied,
+                    'market_odds': market_odds,
+                    'value': (market_odds / implied - 1) * 100
+                })
+    return value_bets
+
+
+def random_case(rng):
+    btts, over = rng.uniform(0.2, 0.8, size=2)
+    prediction = to_prediction(rng.dirichlet(np.ones(3)).tolist() + [btts, 1 - btts, over, 1 - over])
+    odds = {}
+    for market, selection in SELECTIONS:
+        if rng.random() < 0.8:
+            odds.setdefault(market, {})[selection] = round(float(rng.uniform(1.2, 6.0)), 2)
+    return prediction, odds
+
+
+def test_matches_legacy_rule():
+    rng = np.random.default_rng(16)
+    model = BettingModel()
+    for _ in range(200):
+        prediction, odds = random_case(rng)
+        expected = legacy_value_bets(prediction, odds)
+        actual = model.detect_value_bets(prediction, odds)
+
+        key = lambda bet: (bet['market'], bet['selection'])
+        expected, actual = sorted(expected, key=key), sorted(actual, key=key)
+        assert [key(bet) for bet in actual] == [key(bet) for bet in expected]
+        for old, new in zip(expected, actual):
+            assert new['market_odds'] == old['market_odds']
+            assert new['implied_odds'] == pytest.approx(old['implied_odds'])
+            assert new['value'] == pytest.approx(old['value'])
+
+
+def test_uses_best_odds_between_bookmakers():
+    probabilities = selection_matrix([to_prediction([0.5, 0.3, 0.2, 0.5, 0.5, 0.5, 0.5])])
+    odds = np.stack([odds_matrix({'1X2': {'Home': 2.0}}), odds_matrix({'1X2': {'Home': 2.4}})], axis=2)
+
+    bets = detect_value_bets(probabilities, odds)
+    assert len(bets) == 1
+    assert bets['bookmaker'][0] == 1
+    assert bets['market_odds'][0] == 2.4
+
+    grouped = value_bets_to_dicts(bets, bookmakers=['A', 'B'], stakes=[1.5])
+    assert grouped == {0: [{
+        'market': '1X2', 'selection': 'Home', 'implied_odds': 2.0, 'market_odds': 2.4,
+        'value': pytest.approx(20.0), 'spread': None, 'bookmaker': 'B', 'stake': 1.5
+    }]}
+
+
+def test_spread_requires_agreement():
+    probabilities = selection_matrix([to_prediction([0.5, 0.3, 0.2, 0.5, 0.5, 0.5, 0.5])])
+    odds = odds_matrix({'1X2': {'Home': 2.4}})
+
+    assert len(detect_value_bets(probabilities, odds, spread=np.full((1, 7), 0.01))) == 1
+    assert len(detect_value_bets(probabilities, odds, spread=np.full((1, 7), 0.05))) == 0
@@ -0,0 +1,151 @@
+import threading
+import uuid
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+# Jobs finalizados ficam consultáveis por este tempo, limitados aos mais recentes
+FINISHED_JOB_TTL = timedelta(hours=24)
+MAX_FINISHED_JOBS = 100
+
+
+class TrainingJob:
+    """Estado de um treinamento executado em segundo plano"""
+
+    def __init__(self, model_name, total_epochs=None):
+        self.id = uuid.uuid4().hex
+        self.model_name = model_name
+        self.status = 'queued'  # queued, running, completed, failed
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self.total_epochs = total_epochs
+        self.epochs = []
+        self.message = None
+        self.artifact_path = None
+        self.result = None
+        self._lock = threading.Lock()
+
+    def record_epoch(self, epoch, logs=None):
+        """Registra as métricas ao final de uma época (ou de uma tentativa, na busca)"""
+        metrics = {name: value if isinstance(value, (bool, int, str, list, dict, type(None))) else float(value)
+                   for name, value in (logs or {}).items()}
+        with self._lock:
+            self.epochs.append({'epoch': epoch + 1, 'metrics': metrics})
+
+    @property
+    def is_active(self):
+        return self.status in ('queued', 'running')
+
+    def to_dict(self, jobs_ahead=None):
+        with self._lock:
+            epochs = list(self.epochs)
+        return {
+            'job_id': self.id,
+            'model': self.model_name,
+            'status': self.status,
+            'jobs_ahead': jobs_ahead,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'progress': {
+                'epoch': epochs[-1]['epoch'] if epochs else 0,
+                'total_epochs': self.total_epochs
+            },
+            'metrics': epochs[-1]['metrics'] if epochs else {},
+            'history': epochs,
+            'message': self.message,
+            'artifact_path': self.artifact_path,
+            'result': self.result
+        }
+
+
+class TrainingJobManager:
+    """Executa treinamentos em segundo plano, no máximo um por modelo
+
+    Os jobs são executados na ordem em que foram agendados; enquanto um job
+    espera, jobs_ahead informa quantos estão à frente dele (incluindo o que
+    está em execução). Jobs finalizados são descartados após FINISHED_JOB_TTL
+    ou quando passam de MAX_FINISHED_JOBS.
+    """
+
+    def __init__(self, max_workers=1):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='training')
+        self.jobs = {}
+        self._active = {}
+        # Ids dos jobs agendados e ainda não finalizados, em ordem de chegada
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def submit(self, model_name, task, app=None, total_epochs=None):
+        """Agenda um treinamento
+
+        task recebe o TrainingJob e retorna um dict com 'success', 'message' e,
+        opcionalmente, 'artifact_path'. Retorna (job, criado); se já houver um
+        treinamento ativo para o modelo, retorna esse job e False.
+        """
+        with self._lock:
+            self._prune()
+            active = self.jobs.get(self._active.get(model_name))
+            if active is not None and active.is_active:
+                return active, False
+
+            job = TrainingJob(model_name, total_epochs=total_epochs)
+            self.jobs[job.id] = job
+            self._active[model_name] = job.id
+            self._pending.append(job.id)
+
+        self.executor.submit(self._run, job, task, app)
+        return job, True
+
+    def _run(self, job, task, app):
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        try:
+            if app is not None:
+                with app.app_context():
+                    result = task(job)
+            else:
+                result = task(job)
+
+            result = result or {}
+            job.message = result.get('message')
+            job.artifact_path = result.get('artifact_path')
+            job.result = {key: value for key, value in result.items()
+                          if key not in ('success', 'message', 'artifact_path')} or None
+            job.status = 'completed' if result.get('success') else 'failed'
+        except Exception as e:
+            print(f"Erro no treinamento {job.id}: {e}")
+            job.message = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = datetime.utcnow()
+            with self._lock:
+                self._pending.remove(job.id)
+
+    def _prune(self):
+        """Descarta jobs finalizados antigos (chamado com o lock adquirido)"""
+        finished = sorted((job for job in self.jobs.values() if not job.is_active),
+                          key=lambda job: job.finished_at or job.created_at, reverse=True)
+        limit = datetime.utcnow() - FINISHED_JOB_TTL
+        for i, job in enumerate(finished):
+            if i >= MAX_FINISHED_JOBS or (job.finished_at or job.created_at) < limit:
+                del self.jobs[job.id]
+                if self._active.get(job.model_name) == job.id:
+                    del self._active[job.model_name]
+
+    def jobs_ahead(self, job):
+        """Quantos jobs serão executados antes deste (None se já estiver em execução ou finalizado)"""
+        with self._lock:
+            if job.status != 'queued' or job.id not in self._pending:
+                return None
+            return self._pending.index(job.id)
+
+    def get(self, job_id):
+        """Retorna um job pelo id (ou None)"""
+        with self._lock:
+            self._prune()
+            return self.jobs.get(job_id)
+
+    def status(self, job):
+        """Estado do job, com a posição na fila enquanto ele espera"""
+        return job.to_dict(jobs_ahead=self.jobs_ahead(job))
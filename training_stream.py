@@ -0,0 +1,195 @@
+import sqlite3
+import numpy as np
+from src.models.feature_engine import FINISHED_STATUS, STAT_COLUMNS, STAT_DEFAULTS, labels_from_goals
+from src.models.team_state import TeamStateStore
+from src.models.standings import RunningStandings
+
+# Jogos finalizados em ordem cronológica, com o primeiro registro de estatísticas de cada um
+STREAM_QUERY = f"""
+SELECT f.id, f.league_id, f.home_team_id, f.away_team_id, f.date, f.home_goals, f.away_goals,
+       f.season, s.id, {', '.join('s.' + column for column in STAT_COLUMNS)}
+FROM fixture f
+LEFT JOIN (SELECT fixture_id, MIN(id) AS id FROM fixture_statistics GROUP BY fixture_id) first_stats
+       ON first_stats.fixture_id = f.id
+LEFT JOIN fixture_statistics s ON s.id = first_stats.id
+WHERE f.status = ? AND f.home_goals IS NOT NULL AND f.away_goals IS NOT NULL
+ORDER BY f.date, f.id
+"""
+
+COUNT_QUERY = "SELECT COUNT(*), MAX(date) FROM fixture WHERE status = ?"
+
+N_STATS = len(STAT_COLUMNS)
+STAT_DEFAULT_VECTOR = np.array([STAT_DEFAULTS.get(column, 0) for column in STAT_COLUMNS], dtype=float)
+
+
+class FixtureStream:
+    """Lê jogos do SQLite em blocos e gera as características em ordem cronológica
+
+    As características de forma e classificação são obtidas repetindo o
+    histórico num TeamStateStore e num RunningStandings, de modo que a memória
+    usada não depende do tamanho do histórico. Os jogos são divididos de forma
+    determinística (pelo id) em treino, validação (early stopping) e teste
+    (avaliação final).
+    """
+
+    def __init__(self, database_path, chunk_size=1024, validation_fraction=0.2, test_fraction=0.1):
+        self.database_path = database_path
+        self.chunk_size = chunk_size
+        # Jogos com id % 100 abaixo de test_percent ficam no teste; os seguintes, na validação
+        self.test_percent = int(round(test_fraction * 100))
+        self.validation_percent = self.test_percent + int(round(validation_fraction * 100))
+        # Estado dos times ao final da última leitura
+        self.team_state = None
+
+    def _connect(self):
+        # Conexão aberta na própria thread que consome o gerador (exigência do sqlite3)
+        return sqlite3.connect(self.database_path)
+
+    def _summary(self):
+        connection = self._connect()
+        try:
+            return connection.execute(COUNT_QUERY, (FINISHED_STATUS,)).fetchone()
+        finally:
+            connection.close()
+
+    def count(self):
+        """Conta os jogos finalizados disponíveis"""
+        return self._summary()[0]
+
+    def max_date(self):
+        """Retorna a data do último jogo finalizado (ou None)"""
+        date = self._summary()[1]
+        return np.datetime64(date, 'ns') if date else None
+
+    def split_of(self, fixture_id):
+        """Divisão ('train', 'validation' ou 'test') de um jogo"""
+        bucket = fixture_id % 100
+        if bucket < self.test_percent:
+            return 'test'
+        if bucket < self.validation_percent:
+            return 'validation'
+        return 'train'
+
+    def iter_chunks(self, split=None, standings=None):
+        """Gera blocos (ids, X, y) de jogos treináveis
+
+        split pode ser None (todos), 'train', 'validation' ou 'test'. Com
+        standings (um StandingsEngine, o armazenamento incremental das
+        classificações), os resultados lidos também são registrados nele.
+        """
+        team_state = TeamStateStore()
+        running = RunningStandings()
+        connection = self._connect()
+        cursor = connection.cursor()
+        cursor.execute(STREAM_QUERY, (FINISHED_STATUS,))
+
+        # Resultados do mesmo instante só entram no estado depois de todos serem lidos
+        pending = []
+        current_date = None
+        ids, vectors, goals = [], [], []
+
+        try:
+            while True:
+                rows = cursor.fetchmany(self.chunk_size)
+                if not rows:
+                    break
+
+                for row in rows:
+                    fixture_id, league_id, home_id, away_id, date, home_goals, away_goals, season, stats_id = row[:9]
+                    if date != current_date:
+                        for fixture in pending:
+                            team_state.record(fixture)
+                            running.record(fixture.league_id, fixture.date, fixture.home_team_id,
+                                           fixture.away_team_id, fixture.home_goals, fixture.away_goals,
+                                           fixture.season)
+                            if standings is not None:
+                                standings.record(fixture)
+                        pending = []
+                        current_date = date
+                    pending.append(_FinishedFixture(fixture_id, league_id, home_id, away_id,
+                                                    date, home_goals, away_goals, season))
+
+                    # Mesmo critério do FeatureEngine para jogos treináveis
+                    if not home_goals or not away_goals or stats_id is None:
+                        continue
+                    if split is not None and self.split_of(fixture_id) != split:
+                        continue
+
+                    home_form, home_scored, home_conceded = team_state.features(home_id)
+                    away_form, away_scored, away_conceded = team_state.features(away_id)
+                    vectors.append(list(row[9:9 + N_STATS]) + [
+                        home_form, away_form,
+                        running.position(league_id, home_id, date, season),
+                        running.position(league_id, away_id, date, season),
+                        home_scored, away_scored,
+                        home_conceded, away_conceded
+                    ])
+                    ids.append(fixture_id)
+                    goals.append((home_goals, away_goals))
+
+                if len(ids) >= self.chunk_size:
+                    yield self._to_arrays(ids, vectors, goals)
+                    ids, vectors, goals = [], [], []
+
+            if ids:
+                yield self._to_arrays(ids, vectors, goals)
+
+            for fixture in pending:
+                team_state.record(fixture)
+                if standings is not None:
+                    standings.record(fixture)
+            self.team_state = team_state
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _to_arrays(ids, vectors, goals):
+        X = np.array(vectors, dtype=float)
+        stats = X[:, :N_STATS]
+        # Estatísticas ausentes ou zeradas recebem o valor padrão
+        missing = np.isnan(stats) | (stats == 0)
+        X[:, :N_STATS] = np.where(missing, STAT_DEFAULT_VECTOR, stats)
+        goals = np.array(goals, dtype=float)
+        return np.array(ids, dtype=np.int64), X, labels_from_goals(goals[:, 0], goals[:, 1])
+
+    def dataset(self, scaler, split, batch_size=32, shuffle_buffer=10000):
+        """Cria um tf.data.Dataset normalizado e com prefetch a partir do gerador"""
+        import tensorflow as tf
+
+        n_features = N_STATS + 8
+
+        def generator():
+            for _, X, y in self.iter_chunks(split):
+                yield scaler.transform(X).astype(np.float32), y.astype(np.float32)
+
+        dataset = tf.data.Dataset.from_generator(
+            generator,
+            output_signature=(
+                tf.TensorSpec(shape=(None, n_features), dtype=tf.float32),
+                tf.TensorSpec(shape=(None, 5), dtype=tf.float32)
+            )
+        ).unbatch()
+
+        if split == 'train':
+            dataset = dataset.shuffle(shuffle_buffer)
+
+        return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+class _FinishedFixture:
+    """Resultado mínimo de um jogo, no formato esperado por TeamStateStore.record"""
+
+    __slots__ = ('id', 'league_id', 'home_team_id', 'away_team_id', 'date',
+                 'home_goals', 'away_goals', 'season', 'status')
+
+    def __init__(self, fixture_id, league_id, home_team_id, away_team_id, date, home_goals, away_goals,
+                 season=None):
+        self.id = fixture_id
+        self.league_id = league_id
+        self.season = season
+        self.home_team_id = home_team_id
+        self.away_team_id = away_team_id
+        self.date = date
+        self.home_goals = home_goals
+        self.away_goals = away_goals
+        self.status = FINISHED_STATUS
@@ -0,0 +1,88 @@
+import numpy as np
+from src.models.markets import SELECTIONS
+
+# Margem mínima sobre a odd implícita para considerar uma value bet (10%)
+VALUE_MARGIN = 0.1
+
+VALUE_BET_DTYPE = np.dtype([
+    ('fixture', np.int32),       # Linha na matriz de probabilidades
+    ('selection', np.int8),      # Coluna (índice em SELECTIONS)
+    ('bookmaker', np.int16),     # Casa com a melhor odd
+    ('probability', np.float64),
+    ('implied_odds', np.float64),
+    ('market_odds', np.float64),
+    ('edge', np.float64),        # Valor esperado por unidade apostada (p * odd - 1)
+    ('value', np.float64),       # Valor em percentual sobre a odd implícita
+    ('spread', np.float64)       # Desvio entre membros do ensemble (NaN se não houver)
+])
+
+
+def detect_value_bets(probabilities, odds, margin=VALUE_MARGIN, spread=None, agreement=1.0):
+    """Detecta value bets em todos os jogos, seleções e casas de uma só vez
+
+    probabilities tem forma (jogos, seleções) e odds (jogos, seleções, casas),
+    com NaN onde não houver cotação. Para cada jogo e seleção usa a melhor odd
+    entre as casas; é value bet quando odd > odd implícita * (1 + margin). Com
+    spread (forma de probabilities), a margem também precisa se manter para a
+    probabilidade menos agreement desvios. Retorna um array estruturado
+    VALUE_BET_DTYPE, uma linha por value bet.
+    """
+    probabilities = np.asarray(probabilities, dtype=float)
+    odds = np.asarray(odds, dtype=float)
+    if odds.ndim == 2:
+        odds = odds[:, :, None]
+    if not odds.size:
+        return np.empty(0, dtype=VALUE_BET_DTYPE)
+
+    # Melhor odd de cada seleção entre as casas
+    priced = ~np.isnan(odds)
+    bookmaker = np.where(priced, odds, -np.inf).argmax(axis=2)
+    best = np.take_along_axis(odds, bookmaker[:, :, None], axis=2)[:, :, 0]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        edge = probabilities * best - 1
+        is_value = (probabilities > 0) & (edge > margin)
+        if spread is not None:
+            spread = np.asarray(spread, dtype=float)
+            conservative = probabilities - agreement * np.nan_to_num(spread)
+            is_value &= conservative * best > 1 + margin
+        implied = 1 / probabilities
+
+    fixture, selection = np.nonzero(is_value)
+    bets = np.empty(len(fixture), dtype=VALUE_BET_DTYPE)
+    bets['fixture'] = fixture
+    bets['selection'] = selection
+    bets['bookmaker'] = bookmaker[fixture, selection]
+    bets['probability'] = probabilities[fixture, selection]
+    bets['implied_odds'] = implied[fixture, selection]
+    bets['market_odds'] = best[fixture, selection]
+    bets['edge'] = edge[fixture, selection]
+    bets['value'] = edge[fixture, selection] * 100
+    bets['spread'] = spread[fixture, selection] if spread is not None else np.nan
+    return bets
+
+
+def value_bets_to_dicts(bets, bookmakers=None, stakes=None):
+    """Converte o array de value bets em dicionários serializáveis, agrupados por linha
+
+    Retorna {linha: [value bets]} no formato usado pelas rotas; com stakes
+    (um valor por value bet), inclui o valor sugerido para a aposta.
+    """
+    grouped = {}
+    for i, bet in enumerate(bets):
+        market, selection = SELECTIONS[bet['selection']]
+        entry = {
+            'market': market,
+            'selection': selection,
+            'implied_odds': float(bet['implied_odds']),
+            'market_odds': float(bet['market_odds']),
+            'value': float(bet['value']),
+            'spread': None if np.isnan(bet['spread']) else float(bet['spread'])
+        }
+        if bookmakers is not None:
+            entry['bookmaker'] = bookmakers[bet['bookmaker']]
+        if stakes is not None:
+            entry['stake'] = float(stakes[i])
+        grouped.setdefault(int(bet['fixture']), []).append(entry)
+    return grouped
+